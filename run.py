@@ -11,5 +11,10 @@ if __name__ == "__main__":
         host=settings.api_host,
         port=settings.api_port,
         workers=settings.api_workers,
+        loop=settings.api_loop,
+        http=settings.api_http,
+        backlog=settings.api_backlog,
+        limit_concurrency=settings.api_limit_concurrency,
+        timeout_keep_alive=settings.api_timeout_keep_alive,
         log_level=settings.log_level.lower()
     )
\ No newline at end of file
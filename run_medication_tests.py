@@ -5,15 +5,85 @@ Run medication-specific tests for ElderWise
 import subprocess
 import sys
 import os
+import glob
+import hashlib
+import json
+import pathlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Results of the last green run, so unchanged suites can be skipped
+FINGERPRINT_CACHE = pathlib.Path(".pytest_cache/med_tests.json")
+
+# Files whose contents determine the outcome of each pytest suite
+TEST_INPUTS = {
+    "tests/test_medication_services.py": [
+        "tests/test_medication_services.py",
+        "tests/conftest.py",
+        "src/services/*.py",
+        "src/models/medication.py",
+        "src/config/settings.py",
+        "src/utils/*.py",
+    ],
+    # The suite imports src.api.main, which pulls in every router and,
+    # through them, the AI, memory and utility modules
+    "tests/test_medication_api.py": [
+        "tests/test_medication_api.py",
+        "tests/conftest.py",
+        "src/**/*.py",
+    ],
+}
+
+
+def _fingerprint(patterns):
+    """Hash the paths and contents of every file matching the patterns"""
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern, recursive=True)})
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(path.encode())
+        digest.update(pathlib.Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def _load_fingerprints():
+    """Load fingerprints of previously passing suites"""
+    try:
+        return json.loads(FINGERPRINT_CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fingerprints(fingerprints):
+    """Persist fingerprints of passing suites"""
+    FINGERPRINT_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    FINGERPRINT_CACHE.write_text(json.dumps(fingerprints, indent=2))
+
+
+def _run_command(cmd):
+    """Run a single test command and capture its output"""
+    # npm tests run from the frontend directory
+    cwd = "frontend" if cmd[0] == "npm" else None
+    return subprocess.run(
+        cmd,
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+
 
 def run_tests():
     """Run all medication-related tests"""
+    # Leave a couple of cores free for the npm runner and the OS, and split
+    # the rest between the two pytest runs since they execute side by side
+    xdist_workers = str(max(1, ((os.cpu_count() or 1) - 2) // 2))
+    
     test_commands = [
         # Backend medication service tests
-        ["pytest", "tests/test_medication_services.py", "-v", "--tb=short"],
+        ["pytest", "tests/test_medication_services.py", "-n", xdist_workers,
+         "--dist=load", "-q", "--tb=short"],
         
         # Backend medication API tests
-        ["pytest", "tests/test_medication_api.py", "-v", "--tb=short"],
+        ["pytest", "tests/test_medication_api.py", "-n", xdist_workers,
+         "--dist=load", "-q", "--tb=short"],
         
         # Frontend medication component tests
         ["npm", "test", "src/__tests__/MedicationScreen.test.tsx"],
@@ -24,42 +94,55 @@ def run_tests():
     
     all_passed = True
     
-    for i, cmd in enumerate(test_commands, 1):
-        test_name = " ".join(cmd)
-        print(f"\n[{i}/{len(test_commands)}] Running: {test_name}")
-        print("-" * 50)
+    # Skip suites whose inputs haven't changed since their last green run
+    fingerprints = _load_fingerprints()
+    current_fingerprints = {}
+    commands_to_run = []
+    for cmd in test_commands:
+        test_file = cmd[1]
+        if test_file in TEST_INPUTS:
+            current_fingerprints[test_file] = _fingerprint(TEST_INPUTS[test_file])
+            if fingerprints.get(test_file) == current_fingerprints[test_file]:
+                print(f"\n⏭ SKIPPED (cached green): {' '.join(cmd)}")
+                continue
+        commands_to_run.append(cmd)
+    
+    # The commands are independent, so run them side by side and
+    # report each one as it finishes
+    with ThreadPoolExecutor(max_workers=max(1, len(commands_to_run))) as executor:
+        futures = {
+            executor.submit(_run_command, cmd): cmd
+            for cmd in commands_to_run
+        }
         
-        try:
-            if cmd[0] == "npm":
-                # Change to frontend directory for npm tests
-                result = subprocess.run(
-                    cmd,
-                    cwd="frontend",
-                    capture_output=True,
-                    text=True
-                )
-            else:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True
-                )
+        for i, future in enumerate(as_completed(futures), 1):
+            cmd = futures[future]
+            test_name = " ".join(cmd)
+            print(f"\n[{i}/{len(commands_to_run)}] Finished: {test_name}")
+            print("-" * 50)
             
-            if result.returncode == 0:
-                print("✅ PASSED")
-                if result.stdout:
-                    print(result.stdout)
-            else:
-                print("❌ FAILED")
+            try:
+                result = future.result()
+                
+                if result.returncode == 0:
+                    print("✅ PASSED")
+                    if cmd[1] in current_fingerprints:
+                        fingerprints[cmd[1]] = current_fingerprints[cmd[1]]
+                    if result.stdout:
+                        print(result.stdout)
+                else:
+                    print("❌ FAILED")
+                    all_passed = False
+                    if result.stdout:
+                        print(result.stdout)
+                    if result.stderr:
+                        print("STDERR:", result.stderr)
+                        
+            except Exception as e:
+                print(f"❌ ERROR running test: {e}")
                 all_passed = False
-                if result.stdout:
-                    print(result.stdout)
-                if result.stderr:
-                    print("STDERR:", result.stderr)
-                    
-        except Exception as e:
-            print(f"❌ ERROR running test: {e}")
-            all_passed = False
+    
+    _save_fingerprints(fingerprints)
     
     print("\n" + "=" * 50)
     if all_passed:
@@ -77,6 +160,7 @@ def check_dependencies():
     # Check Python dependencies
     try:
         import pytest
+        import xdist
         import aiohttp
         import PIL
         from google.cloud import vision
@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, AsyncGenerator, Optional, List
+from typing import Dict, Any, AsyncGenerator, Optional, List, Tuple, Union
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+import asyncio
+import time
+
+
+# (second, ISO string) of the last formatted timestamp
+_iso_cache: List[Any] = [0, ""]
+
+
+def _iso_now() -> str:
+    """Current UTC time as an ISO string, formatted at most once per second"""
+    now = int(time.time())
+    if now != _iso_cache[0]:
+        _iso_cache[0] = now
+        _iso_cache[1] = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+    return _iso_cache[1]
 
 
 class AIProvider(str, Enum):
@@ -12,7 +27,7 @@ class AIProvider(str, Enum):
     MOCK = "mock"  # For testing
 
 
-@dataclass
+@dataclass(slots=True)
 class AIRequest:
     """Standardized AI request format"""
     context: str
@@ -24,7 +39,7 @@ class AIRequest:
     metadata: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AIResponse:
     """Standardized AI response format"""
     response: str
@@ -37,9 +52,10 @@ class AIResponse:
     error: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
     usage: Optional[Dict[str, int]] = None  # tokens used, etc.
+    provider_timing_ms: Optional[int] = None  # time reported by the provider itself
 
 
-@dataclass
+@dataclass(slots=True)
 class ProviderConfig:
     """Configuration for an AI provider"""
     provider: AIProvider
@@ -49,6 +65,7 @@ class ProviderConfig:
     timeout: int = 60
     max_retries: int = 3
     retry_delay: float = 1.0
+    max_concurrency: Optional[int] = None  # cap on in-flight requests to the backend
     custom_headers: Optional[Dict[str, str]] = None
     additional_config: Optional[Dict[str, Any]] = None
 
@@ -59,6 +76,15 @@ class AIProviderInterface(ABC):
     def __init__(self, config: ProviderConfig):
         self.config = config
         self._initialized = False
+        
+        # Health probes are cached so readiness checks don't hit the backend every time
+        cache_config = config.additional_config or {}
+        self._health_ttl: float = cache_config.get("health_ttl", 5.0)
+        # Keyed by the deep flag: (monotonic time of the probe, result)
+        self._health_cache: Dict[bool, Tuple[float, Dict[str, Any]]] = {}
+        self._model_info_ttl: float = cache_config.get("model_info_ttl", 300.0)
+        self._model_info_cache: Optional[Dict[str, Any]] = None
+        self._model_info_cache_ts = 0.0
     
     @abstractmethod
     async def initialize(self) -> None:
@@ -70,6 +96,28 @@ class AIProviderInterface(ABC):
         """Generate a response for the given request"""
         pass
     
+    async def generate_responses(
+        self, requests: List[AIRequest]
+    ) -> List[Union[AIResponse, BaseException]]:
+        """
+        Generate responses for several requests concurrently
+        
+        Requests are submitted together and bounded by the ``concurrency``
+        entry of ``additional_config`` (default 32). Results are returned in
+        request order; a request that raised yields its exception instead.
+        """
+        concurrency = (self.config.additional_config or {}).get("concurrency", 32)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _generate(request: AIRequest) -> AIResponse:
+            async with semaphore:
+                return await self.generate_response(request)
+        
+        return await asyncio.gather(
+            *(_generate(request) for request in requests),
+            return_exceptions=True
+        )
+    
     @abstractmethod
     async def generate_streaming_response(
         self, request: AIRequest
@@ -89,33 +137,66 @@ class AIProviderInterface(ABC):
     
     async def shutdown(self) -> None:
         """Clean up any resources (connections, etc.)"""
-        pass
+        self._clear_caches()
+    
+    def _clear_caches(self) -> None:
+        """Drop cached health and model information"""
+        self._health_cache.clear()
+        self._model_info_cache = None
+        self._model_info_cache_ts = 0.0
+    
+    async def _get_cached_model_info(self) -> Dict[str, Any]:
+        """Get model info, reusing the last result within the TTL"""
+        now = time.monotonic()
+        if (self._model_info_cache is not None
+                and now - self._model_info_cache_ts < self._model_info_ttl):
+            return self._model_info_cache
+        
+        self._model_info_cache = await self.get_model_info()
+        self._model_info_cache_ts = now
+        return self._model_info_cache
     
     def is_initialized(self) -> bool:
         """Check if the provider has been initialized"""
         return self._initialized
     
-    async def health_check(self) -> Dict[str, Any]:
-        """Perform a health check on the provider"""
+    async def health_check(self, deep: bool = False) -> Dict[str, Any]:
+        """
+        Perform a health check on the provider, cached for a short TTL
+        
+        A shallow check only validates the connection. With deep=True the
+        model info is fetched as well, which may cost an extra round trip.
+        """
+        now = time.monotonic()
+        cached = self._health_cache.get(deep)
+        if cached is not None and now - cached[0] < self._health_ttl:
+            # The timestamp records when the probe ran; initialization state
+            # can change in between, so always report it live
+            return {**cached[1], "initialized": self._initialized}
+        
         try:
             is_valid = await self.validate_connection()
-            model_info = await self.get_model_info() if is_valid else {}
+            model_info = await self._get_cached_model_info() if is_valid and deep else {}
             
-            return {
+            health = {
                 "provider": self.config.provider.value,
                 "status": "healthy" if is_valid else "unhealthy",
                 "initialized": self._initialized,
                 "model_info": model_info,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _iso_now()
             }
         except Exception as e:
+            # Errors are not cached so a transient failure isn't reported for the whole TTL
             return {
                 "provider": self.config.provider.value,
                 "status": "error",
                 "error": str(e),
                 "initialized": self._initialized,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _iso_now()
             }
+        
+        self._health_cache[deep] = (now, health)
+        return health
 
 
 class AIProviderError(Exception):
@@ -0,0 +1,165 @@
+from typing import Awaitable, Callable, List, Optional
+from dataclasses import asdict
+import asyncio
+import hashlib
+import logging
+import orjson
+from src.ai.base import AIResponse, AIProvider
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Two-level cache for AI responses keyed on the prompt context
+    
+    L1 is an exact match on a hash of the user, the generation settings
+    (model, temperature, max tokens) and the context, stored in Redis with a
+    TTL. L2 embeds the context and looks up the nearest previously cached
+    prompt for the same user and settings in Pinecone; a match above the
+    similarity threshold is served from its L1 entry. The Redis and Pinecone clients are
+    synchronous, so their calls run in worker threads. Cache failures never
+    fail the request, they only fall through to the provider.
+    """
+    
+    KEY_PREFIX = "ai_response:"
+    NAMESPACE = "ai-response-cache"
+    
+    def __init__(self, ttl: int = 3600, threshold: float = 0.92):
+        self.ttl = ttl
+        self.threshold = threshold
+    
+    @staticmethod
+    def _generation(model: str, temperature: Optional[float], max_tokens: Optional[int]) -> str:
+        """Identify the generation settings a response was produced with"""
+        return f"{model}|{temperature}|{max_tokens}"
+    
+    @staticmethod
+    def _hash(key: str, user_id: Optional[str] = None, generation: str = "") -> str:
+        """Digest of a prompt scoped to its user and generation settings"""
+        return hashlib.sha256(orjson.dumps([user_id or "", generation, key])).hexdigest()
+    
+    @staticmethod
+    def _redis():
+        from src.utils.database import redis_manager
+        return redis_manager.get_client()
+    
+    @staticmethod
+    def _index():
+        from src.utils.database import pinecone_manager
+        return pinecone_manager.get_index()
+    
+    def _load(self, digest: str) -> Optional[AIResponse]:
+        """Read a cached response from Redis"""
+        raw = self._redis().get(f"{self.KEY_PREFIX}{digest}")
+        if raw is None:
+            return None
+        
+        data = orjson.loads(raw)
+        data["provider"] = AIProvider(data["provider"])
+        return AIResponse(**data)
+    
+    def _store(
+        self,
+        digest: str,
+        response: AIResponse,
+        embedding: Optional[List[float]],
+        user_id: Optional[str],
+        generation: str
+    ) -> None:
+        """Write a response to Redis with the cache TTL and index its prompt"""
+        self._redis().setex(
+            f"{self.KEY_PREFIX}{digest}",
+            self.ttl,
+            orjson.dumps(asdict(response))
+        )
+        if embedding is not None:
+            self._index().upsert(
+                vectors=[(digest, embedding, {"user_id": user_id or "", "generation": generation})],
+                namespace=self.NAMESPACE
+            )
+    
+    def _nearest(
+        self,
+        embedding: List[float],
+        user_id: Optional[str],
+        generation: str
+    ) -> Optional[str]:
+        """Find the digest of the most similar cached prompt above the threshold"""
+        results = self._index().query(
+            vector=embedding,
+            top_k=1,
+            namespace=self.NAMESPACE,
+            filter={"user_id": {"$eq": user_id or ""}, "generation": {"$eq": generation}}
+        )
+        if results.matches and results.matches[0].score >= self.threshold:
+            return results.matches[0].id
+        return None
+    
+    async def get_or_call(
+        self,
+        key: str,
+        embed_fn: Callable[[str], List[float]],
+        coro_factory: Callable[[], Awaitable[AIResponse]],
+        user_id: Optional[str] = None,
+        model: str = "",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AIResponse:
+        """
+        Return a cached response for key, or call the provider and cache it
+        
+        Args:
+            key: Prompt context the response is generated from
+            embed_fn: Blocking function embedding text for the semantic lookup
+            coro_factory: Zero-argument callable producing the provider call
+            user_id: Cached responses are only shared with the same user
+            model, temperature, max_tokens: Generation settings; responses are
+                only shared between requests with identical settings
+        
+        Returns:
+            The cached or freshly generated response
+        """
+        generation = self._generation(model, temperature, max_tokens)
+        digest = self._hash(key, user_id, generation)
+        embedding: Optional[List[float]] = None
+        
+        try:
+            cached = await asyncio.to_thread(self._load, digest)
+            if cached is not None:
+                cached.metadata = {**(cached.metadata or {}), "cache": "exact_hit"}
+                return cached
+            
+            embedding = await asyncio.to_thread(embed_fn, key)
+            match = await asyncio.to_thread(self._nearest, embedding, user_id, generation)
+            if match is not None:
+                cached = await asyncio.to_thread(self._load, match)
+                if cached is not None:
+                    cached.metadata = {**(cached.metadata or {}), "cache": "semantic_hit"}
+                    return cached
+        except Exception as e:
+            logger.warning(f"AI response cache lookup failed: {e}")
+        
+        response = await coro_factory()
+        if not response.success:
+            return response
+        
+        try:
+            await asyncio.to_thread(self._store, digest, response, embedding, user_id, generation)
+        except Exception as e:
+            logger.warning(f"Failed to cache AI response: {e}")
+        
+        return response
+
+
+def embed_prompt(text: str) -> List[float]:
+    """Embed text with the shared sentence-transformer model"""
+    from src.utils.embeddings import embedding_service
+    return embedding_service.embed(text)
+
+
+response_cache = ResponseCache(
+    ttl=settings.ai_response_cache_ttl,
+    threshold=settings.ai_semantic_cache_threshold
+)
@@ -1,6 +1,7 @@
-from typing import Optional, Dict, Any, AsyncGenerator, List
+from typing import Optional, Dict, Any, AsyncGenerator, List, Tuple
 import logging
 import asyncio
+import time
 from src.ai.base import (
     AIProvider,
     AIProviderInterface,
@@ -9,7 +10,7 @@ from src.ai.base import (
     ProviderConfig,
     AIProviderError
 )
-from src.ai.providers import MistralProvider, CleoAIProvider, MockProvider
+from src.ai import providers
 from src.config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -24,19 +25,27 @@ class AIClient:
     - Fallback to secondary providers on failure
     - Cache provider instances
     - Handle provider health checks
+    - Skip providers that keep failing (circuit breaker)
     """
     
-    # Provider class mapping
+    # Provider class mapping, resolved lazily so unused providers are never imported
     PROVIDERS = {
-        AIProvider.MISTRAL: MistralProvider,
-        AIProvider.CLEOAI: CleoAIProvider,
-        AIProvider.MOCK: MockProvider
+        AIProvider.MISTRAL: "MistralProvider",
+        AIProvider.CLEOAI: "CleoAIProvider",
+        AIProvider.MOCK: "MockProvider"
     }
     
+    # Consecutive failures before a provider is skipped, and for how long
+    BREAKER_FAILURE_THRESHOLD = 3
+    BREAKER_COOLDOWN_SECONDS = 30.0
+    
     def __init__(self):
         self.primary_provider: Optional[AIProviderInterface] = None
         self.fallback_providers: List[AIProviderInterface] = []
         self.provider_cache: Dict[AIProvider, AIProviderInterface] = {}
+        # Provider -> (consecutive failures, monotonic time the breaker stays open until)
+        self._breaker: Dict[AIProvider, Tuple[int, float]] = {}
+        self._init_lock = asyncio.Lock()
         self._initialized = False
     
     async def initialize(self) -> None:
@@ -44,27 +53,32 @@ class AIClient:
         if self._initialized:
             return
         
-        try:
-            # Load primary provider from settings
-            primary_config = self._get_provider_config(settings.ai_provider)
-            self.primary_provider = await self._get_or_create_provider(primary_config)
-            
-            # Load fallback providers if configured
-            if hasattr(settings, 'ai_fallback_providers'):
-                for provider_name in settings.ai_fallback_providers:
-                    try:
-                        fallback_config = self._get_provider_config(provider_name)
-                        provider = await self._get_or_create_provider(fallback_config)
-                        self.fallback_providers.append(provider)
-                    except Exception as e:
-                        logger.warning(f"Failed to initialize fallback provider {provider_name}: {e}")
+        # Concurrent first requests must not each build their own providers
+        async with self._init_lock:
+            if self._initialized:
+                return
             
-            self._initialized = True
-            logger.info(f"AI Client initialized with primary provider: {settings.ai_provider}")
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize AI client: {e}")
-            raise
+            try:
+                # Load primary provider from settings
+                primary_config = self._get_provider_config(settings.ai_provider)
+                self.primary_provider = await self._get_or_create_provider(primary_config)
+                
+                # Load fallback providers if configured
+                if hasattr(settings, 'ai_fallback_providers'):
+                    for provider_name in settings.ai_fallback_providers:
+                        try:
+                            fallback_config = self._get_provider_config(provider_name)
+                            provider = await self._get_or_create_provider(fallback_config)
+                            self.fallback_providers.append(provider)
+                        except Exception as e:
+                            logger.warning(f"Failed to initialize fallback provider {provider_name}: {e}")
+                
+                self._initialized = True
+                logger.info(f"AI Client initialized with primary provider: {settings.ai_provider}")
+                
+            except Exception as e:
+                logger.error(f"Failed to initialize AI client: {e}")
+                raise
     
     def _get_provider_config(self, provider_name: str) -> ProviderConfig:
         """Get provider configuration from settings"""
@@ -75,7 +89,11 @@ class AIClient:
                 provider=provider,
                 api_key=settings.hf_token,
                 model_id=getattr(settings, 'mistral_model_id', "mistralai/Mistral-7B-Instruct-v0.3"),
-                timeout=getattr(settings, 'ai_timeout', 60)
+                timeout=getattr(settings, 'ai_timeout', 60),
+                max_concurrency=getattr(settings, 'mistral_max_concurrency', 8),
+                additional_config={
+                    "response_cache": getattr(settings, 'ai_response_cache_enabled', False)
+                }
             )
         
         elif provider == AIProvider.CLEOAI:
@@ -101,10 +119,12 @@ class AIClient:
         if config.provider in self.provider_cache:
             return self.provider_cache[config.provider]
         
-        provider_class = self.PROVIDERS.get(config.provider)
-        if not provider_class:
+        provider_class_name = self.PROVIDERS.get(config.provider)
+        if not provider_class_name:
             raise ValueError(f"No implementation for provider: {config.provider}")
         
+        provider_class = getattr(providers, provider_class_name)
+        
         provider = provider_class(config)
         await provider.initialize()
         
@@ -154,6 +174,11 @@ class AIClient:
         last_error = None
         
         for provider in providers_to_try:
+            if self._is_circuit_open(provider.config.provider):
+                logger.info(f"Skipping {provider.config.provider.value}: circuit open after repeated failures")
+                last_error = f"{provider.config.provider.value} temporarily disabled after repeated failures"
+                continue
+            
             try:
                 logger.info(f"Attempting response generation with {provider.config.provider.value}")
                 
@@ -165,13 +190,16 @@ class AIClient:
                     response = await provider.generate_response(request)
                     
                     if response.success:
+                        self._record_success(provider.config.provider)
                         return response
                     else:
                         logger.warning(f"Provider {provider.config.provider.value} returned unsuccessful response: {response.error}")
+                        self._record_failure(provider.config.provider)
                         last_error = response.error
                         
             except Exception as e:
                 logger.error(f"Provider {provider.config.provider.value} failed: {e}")
+                self._record_failure(provider.config.provider)
                 last_error = str(e)
                 continue
         
@@ -190,6 +218,30 @@ class AIClient:
             error=f"All providers failed. Last error: {last_error}"
         )
     
+    def _is_circuit_open(self, provider: AIProvider) -> bool:
+        """Check whether a provider is currently being skipped"""
+        _, open_until = self._breaker.get(provider, (0, 0.0))
+        return time.monotonic() < open_until
+    
+    def _record_success(self, provider: AIProvider) -> None:
+        """Close the circuit for a provider after a successful call"""
+        self._breaker.pop(provider, None)
+    
+    def _record_failure(self, provider: AIProvider) -> None:
+        """Count a failure and open the circuit once the threshold is reached"""
+        failures, open_until = self._breaker.get(provider, (0, 0.0))
+        failures += 1
+        
+        if failures >= self.BREAKER_FAILURE_THRESHOLD:
+            # The count is kept after the cooldown (half-open), so one more
+            # failure reopens the circuit; only a success clears it
+            open_until = time.monotonic() + self.BREAKER_COOLDOWN_SECONDS
+            logger.warning(
+                f"Opening circuit for {provider.value} for {self.BREAKER_COOLDOWN_SECONDS}s"
+            )
+        
+        self._breaker[provider] = (failures, open_until)
+    
     async def generate_streaming_response(
         self,
         context: str,
@@ -222,8 +274,13 @@ class AIClient:
             # Fallback if something went wrong
             yield "I apologize, but streaming is not available at this time."
     
-    async def health_check(self) -> Dict[str, Any]:
-        """Check health of all configured providers"""
+    async def health_check(self, deep: bool = False) -> Dict[str, Any]:
+        """
+        Check health of all configured providers
+        
+        Args:
+            deep: Also fetch model info from each provider (extra round trip)
+        """
         if not self._initialized:
             await self.initialize()
         
@@ -234,15 +291,30 @@ class AIClient:
             "overall_status": "unhealthy"
         }
         
+        # Probe all providers concurrently
+        probed = ([self.primary_provider] if self.primary_provider else []) + self.fallback_providers
+        results = await asyncio.gather(
+            *(provider.health_check(deep=deep) for provider in probed),
+            return_exceptions=True
+        )
+        
+        provider_healths = [
+            result if not isinstance(result, BaseException) else {
+                "provider": provider.config.provider.value,
+                "status": "error",
+                "error": str(result)
+            }
+            for provider, result in zip(probed, results)
+        ]
+        
         # Check primary provider
         if self.primary_provider:
-            health_status["primary_provider"] = await self.primary_provider.health_check()
+            health_status["primary_provider"] = provider_healths.pop(0)
             if health_status["primary_provider"]["status"] == "healthy":
                 health_status["overall_status"] = "healthy"
         
         # Check fallback providers
-        for provider in self.fallback_providers:
-            provider_health = await provider.health_check()
+        for provider_health in provider_healths:
             health_status["fallback_providers"].append(provider_health)
             if provider_health["status"] == "healthy" and health_status["overall_status"] == "unhealthy":
                 health_status["overall_status"] = "degraded"
@@ -258,6 +330,7 @@ class AIClient:
                 logger.error(f"Error shutting down provider {provider.config.provider.value}: {e}")
         
         self.provider_cache.clear()
+        self._breaker.clear()
         self.primary_provider = None
         self.fallback_providers.clear()
         self._initialized = False
@@ -1,5 +1,21 @@
-from src.ai.providers.mistral import MistralProvider
-from src.ai.providers.cleoai import CleoAIProvider
-from src.ai.providers.mock import MockProvider
+import importlib
 
-__all__ = ["MistralProvider", "CleoAIProvider", "MockProvider"]
\ No newline at end of file
+# Provider classes are imported on first access so that only the
+# configured provider's dependencies (httpx, huggingface_hub, ...) get loaded
+_PROVIDER_MODULES = {
+    "MistralProvider": "src.ai.providers.mistral",
+    "CleoAIProvider": "src.ai.providers.cleoai",
+    "MockProvider": "src.ai.providers.mock",
+}
+
+__all__ = ["MistralProvider", "CleoAIProvider", "MockProvider"]
+
+
+def __getattr__(name: str):
+    module_name = _PROVIDER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    provider_class = getattr(importlib.import_module(module_name), name)
+    globals()[name] = provider_class
+    return provider_class
\ No newline at end of file
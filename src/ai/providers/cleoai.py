@@ -1,6 +1,7 @@
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
 import httpx
-import json
+import orjson
 import time
 import asyncio
 import logging
@@ -18,13 +19,70 @@ from src.ai.base import (
 
 logger = logging.getLogger(__name__)
 
+# HTTP clients shared across provider instances so that rebuilding the
+# AI client reuses warm connections instead of paying a new handshake
+ClientKey = Tuple[str, Tuple[Tuple[str, str], ...], float, int]
+_CLIENT_CACHE: Dict[ClientKey, httpx.AsyncClient] = {}
+_CLIENT_REFCOUNTS: Dict[ClientKey, int] = {}
+
+# GraphQL mutation for inference, built once rather than per request
+_INFER_MUTATION = (
+    "mutation InferText($input: InferenceInput!) { "
+    "inferText(input: $input) { "
+    "text metadata { model temperature maxTokens tokensUsed responseTimeMs } "
+    "error success } }"
+)
+
+# Everything in the inference payload up to the first variable value
+_PAYLOAD_PREFIX = (
+    b'{"query":' + orjson.dumps(_INFER_MUTATION)
+    + b',"variables":{"input":{"text":'
+)
+
+
+@dataclass(slots=True)
+class _InferInput:
+    """GraphQL InferenceInput variables"""
+    text: str
+    temperature: float
+    maxTokens: int
+    userId: Optional[str] = None
+    sessionId: Optional[str] = None
+    stream: bool = False
+    metadata: Optional[Dict[str, Any]] = None
+
+
+def _encode_infer_payload(inference_input: _InferInput) -> bytes:
+    """
+    Encode the inference request body for a known, fixed schema
+    
+    The query and JSON keys never change, so they are pre-encoded once and
+    only the field values are serialized per request.
+    """
+    return b"".join((
+        _PAYLOAD_PREFIX,
+        orjson.dumps(inference_input.text),
+        b',"temperature":', orjson.dumps(inference_input.temperature),
+        b',"maxTokens":', orjson.dumps(inference_input.maxTokens),
+        b',"userId":', orjson.dumps(inference_input.userId),
+        b',"sessionId":', orjson.dumps(inference_input.sessionId),
+        b',"stream":', b"true" if inference_input.stream else b"false",
+        b',"metadata":', orjson.dumps(inference_input.metadata),
+        b"}}}",
+    ))
+
 
 class CleoAIProvider(AIProviderInterface):
     """CleoAI provider using GraphQL/REST API"""
     
+    _MODEL_INFO_QUERY_BODY = orjson.dumps({
+        "query": "query GetModelInfo { modelInfo { name version capabilities contextLength supportedLanguages } }"
+    })
+    
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
         self.client: Optional[httpx.AsyncClient] = None
+        self._server_model_info: Optional[Dict[str, Any]] = None
         self.endpoint = config.endpoint or "http://localhost:8000"
         self.graphql_endpoint = f"{self.endpoint}/graphql"
         self.rest_endpoint = f"{self.endpoint}/api"
@@ -35,15 +93,60 @@ class CleoAIProvider(AIProviderInterface):
         }
         if self.api_key:
             self.headers["Authorization"] = f"Bearer {self.api_key}"
+        # Headers carry the API key and the timeout and retry count are
+        # baked into the client, so all of them are part of its identity
+        self._client_key: ClientKey = (
+            self.endpoint,
+            tuple(sorted(self.headers.items())),
+            float(self.config.timeout),
+            self.config.max_retries
+        )
+    
+    def _acquire_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client for this endpoint, creating it if needed"""
+        client = _CLIENT_CACHE.get(self._client_key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    retries=self.config.max_retries,
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=100,
+                        max_connections=200,
+                        keepalive_expiry=30.0
+                    )
+                ),
+                timeout=httpx.Timeout(self.config.timeout),
+                headers=self.headers
+            )
+            _CLIENT_CACHE[self._client_key] = client
+            _CLIENT_REFCOUNTS[self._client_key] = 0
+        
+        _CLIENT_REFCOUNTS[self._client_key] += 1
+        return client
+    
+    async def _release_client(self) -> None:
+        """Drop this provider's reference and close the client when unused"""
+        if _CLIENT_CACHE.get(self._client_key) is not self.client:
+            # Our client was already replaced in the cache; the refcount
+            # belongs to the new client, so just close our stale one
+            await self.client.aclose()
+            return
+        
+        remaining = _CLIENT_REFCOUNTS.get(self._client_key, 1) - 1
+        if remaining > 0:
+            _CLIENT_REFCOUNTS[self._client_key] = remaining
+            return
+        
+        _CLIENT_REFCOUNTS.pop(self._client_key, None)
+        del _CLIENT_CACHE[self._client_key]
+        await self.client.aclose()
     
     async def initialize(self) -> None:
         """Initialize the HTTP client and validate connection"""
         try:
-            self.client = httpx.AsyncClient(
-                timeout=httpx.Timeout(self.config.timeout),
-                headers=self.headers,
-                limits=httpx.Limits(max_keepalive_connections=10)
-            )
+            if self.client is None:
+                self.client = self._acquire_client()
             
             # Validate the connection
             if await self.validate_connection():
@@ -61,105 +164,47 @@ class CleoAIProvider(AIProviderInterface):
         if not self._initialized:
             await self.initialize()
         
-        start_time = time.time()
-        
-        # GraphQL mutation for inference
-        mutation = """
-        mutation InferText($input: InferenceInput!) {
-            inferText(input: $input) {
-                text
-                metadata {
-                    model
-                    temperature
-                    maxTokens
-                    tokensUsed
-                    responseTimeMs
-                }
-                error
-                success
-            }
-        }
-        """
+        start_ns = time.perf_counter_ns()
         
-        variables = {
-            "input": {
-                "text": request.context,
-                "temperature": request.temperature,
-                "maxTokens": request.max_tokens,
-                "userId": request.user_id,
-                "sessionId": request.session_id,
-                "stream": False,
-                "metadata": request.metadata
-            }
-        }
+        inference_input = _InferInput(
+            text=request.context,
+            temperature=request.temperature,
+            maxTokens=request.max_tokens,
+            userId=request.user_id,
+            sessionId=request.session_id,
+            metadata=request.metadata
+        )
         
         try:
-            # Retry logic for resilience
-            for attempt in range(self.config.max_retries):
-                try:
-                    response = await self.client.post(
-                        self.graphql_endpoint,
-                        json={
-                            "query": mutation,
-                            "variables": variables
-                        }
-                    )
-                    
-                    if response.status_code == 429:  # Rate limited
-                        retry_after = int(response.headers.get("Retry-After", self.config.retry_delay))
-                        if attempt < self.config.max_retries - 1:
-                            await asyncio.sleep(retry_after)
-                            continue
-                        else:
-                            raise AIProviderRateLimitError("Rate limited by CleoAI")
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if "errors" in data:
-                        raise AIProviderResponseError(f"GraphQL errors: {data['errors']}")
-                    
-                    result = data["data"]["inferText"]
-                    
-                    if not result["success"]:
-                        raise AIProviderResponseError(f"CleoAI error: {result.get('error', 'Unknown error')}")
-                    
-                    # Calculate total response time
-                    response_time_ms = int((time.time() - start_time) * 1000)
-                    
-                    # Extract usage information
-                    usage = None
-                    if result["metadata"].get("tokensUsed"):
-                        usage = {
-                            "total_tokens": result["metadata"]["tokensUsed"],
-                            "model": result["metadata"].get("model", "cleoai")
-                        }
-                    
-                    return AIResponse(
-                        response=result["text"],
-                        provider=AIProvider.CLEOAI,
-                        model=result["metadata"].get("model", "cleoai"),
-                        temperature=request.temperature,
-                        max_tokens=request.max_tokens,
-                        response_time_ms=response_time_ms,
-                        success=True,
-                        usage=usage,
-                        metadata={
-                            **(request.metadata or {}),
-                            "cleoai_response_time": result["metadata"].get("responseTimeMs")
-                        }
-                    )
-                    
-                except httpx.HTTPStatusError as e:
-                    if e.response.status_code != 429:  # Not rate limit
-                        raise
-                    
-            # If we get here, all retries failed
-            raise AIProviderRateLimitError("Exceeded maximum retries for CleoAI")
+            result = await self._post_inference(inference_input)
+            
+            # Calculate total response time
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+            
+            # Extract usage information
+            usage = None
+            if result["metadata"].get("tokensUsed"):
+                usage = {
+                    "total_tokens": result["metadata"]["tokensUsed"],
+                    "model": result["metadata"].get("model", "cleoai")
+                }
+            
+            return AIResponse(
+                response=result["text"],
+                provider=AIProvider.CLEOAI,
+                model=result["metadata"].get("model", "cleoai"),
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                response_time_ms=response_time_ms,
+                success=True,
+                usage=usage,
+                metadata=request.metadata,
+                provider_timing_ms=result["metadata"].get("responseTimeMs")
+            )
             
         except Exception as e:
             logger.error(f"Failed to generate CleoAI response: {e}")
-            response_time_ms = int((time.time() - start_time) * 1000)
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             return AIResponse(
                 response="I apologize, but I'm having trouble connecting to my AI service. Please try again.",
@@ -172,6 +217,39 @@ class CleoAIProvider(AIProviderInterface):
                 error=str(e)
             )
     
+    async def _post_inference(self, inference_input: "_InferInput") -> Dict[str, Any]:
+        """Send the inference mutation and return the inferText result"""
+        payload = _encode_infer_payload(inference_input)
+        
+        # Connection failures are retried by the transport; only rate
+        # limiting needs handling here, with one retry after Retry-After
+        response = await self.client.post(self.graphql_endpoint, content=payload)
+        if response.status_code == 429:
+            await asyncio.sleep(self._retry_after(response))
+            response = await self.client.post(self.graphql_endpoint, content=payload)
+            if response.status_code == 429:
+                raise AIProviderRateLimitError("Rate limited by CleoAI")
+        
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        if "errors" in data:
+            raise AIProviderResponseError(f"GraphQL errors: {data['errors']}")
+        
+        result = data["data"]["inferText"]
+        
+        if not result["success"]:
+            raise AIProviderResponseError(f"CleoAI error: {result.get('error', 'Unknown error')}")
+        
+        return result
+    
+    def _retry_after(self, response: httpx.Response) -> float:
+        """Seconds to wait before retrying a rate-limited request"""
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return self.config.retry_delay
+    
     async def generate_streaming_response(
         self, request: AIRequest
     ) -> AsyncGenerator[str, None]:
@@ -186,35 +264,89 @@ class CleoAIProvider(AIProviderInterface):
             async with self.client.stream(
                 "POST",
                 stream_endpoint,
-                json={
+                content=orjson.dumps({
                     "text": request.context,
                     "temperature": request.temperature,
                     "max_tokens": request.max_tokens,
                     "user_id": request.user_id,
                     "session_id": request.session_id,
                     "metadata": request.metadata
-                }
+                })
             ) as response:
                 response.raise_for_status()
                 
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]  # Remove "data: " prefix
-                        
-                        if data == "[DONE]":
-                            break
+                # Scan raw bytes for complete SSE events (terminated by a
+                # blank line) rather than decoding every HTTP line to str
+                buffer = bytearray()
+                async for raw in response.aiter_bytes():
+                    # SSE allows CRLF and CR line endings; normalise to LF.
+                    # A trailing CR may be the first half of a CRLF split
+                    # across chunks, so hold it back until more data arrives.
+                    buffer.extend(raw)
+                    held_cr = buffer.endswith(b"\r")
+                    if held_cr:
+                        del buffer[-1:]
+                    normalised = bytes(buffer).replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                    buffer[:] = normalised
+                    
+                    while (end := buffer.find(b"\n\n")) != -1:
+                        event = bytes(buffer[:end])
+                        del buffer[:end + 2]
                         
-                        try:
-                            chunk = json.loads(data)
-                            if "text" in chunk:
-                                yield chunk["text"]
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse SSE chunk: {data}")
+                        for text in self._parse_sse_event(event):
+                            if text is None:
+                                return
+                            yield text
+                    
+                    if held_cr:
+                        buffer.extend(b"\r")
+                
+                # Flush a final event that was not followed by a blank line
+                leftover = bytes(buffer).replace(b"\r\n", b"\n").replace(b"\r", b"\n").strip(b"\n")
+                if leftover:
+                    for text in self._parse_sse_event(leftover):
+                        if text is None:
+                            return
+                        yield text
                             
         except Exception as e:
             logger.error(f"Failed to generate streaming response: {e}")
             yield "I apologize, but I'm having trouble streaming the response right now."
     
+    @classmethod
+    def _parse_sse_event(cls, event: bytes) -> List[Optional[str]]:
+        """
+        Extract text chunks from one SSE event
+        
+        A None entry marks the [DONE] sentinel; nothing after it is returned.
+        """
+        texts: List[Optional[str]] = []
+        for line in event.split(b"\n"):
+            if not line.startswith(b"data: "):
+                continue
+            
+            data = line[6:]  # Remove "data: " prefix
+            if data == b"[DONE]":
+                texts.append(None)
+                break
+            
+            text = cls._parse_sse_chunk(data)
+            if text is not None:
+                texts.append(text)
+        
+        return texts
+    
+    @staticmethod
+    def _parse_sse_chunk(data: bytes) -> Optional[str]:
+        """Decode an SSE data payload and return its text, if any"""
+        try:
+            chunk = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            logger.warning(f"Failed to parse SSE chunk: {data!r}")
+            return None
+        
+        return chunk.get("text") if isinstance(chunk, dict) else None
+    
     async def validate_connection(self) -> bool:
         """Validate connection to CleoAI service"""
         try:
@@ -231,28 +363,22 @@ class CleoAIProvider(AIProviderInterface):
     
     async def get_model_info(self) -> Dict[str, Any]:
         """Get information about CleoAI model capabilities"""
+        # Model info is fixed for the lifetime of the service, so a
+        # successful answer is kept until shutdown
+        if self._server_model_info is not None:
+            return self._server_model_info
+        
         try:
-            query = """
-            query GetModelInfo {
-                modelInfo {
-                    name
-                    version
-                    capabilities
-                    contextLength
-                    supportedLanguages
-                }
-            }
-            """
-            
             response = await self.client.post(
                 self.graphql_endpoint,
-                json={"query": query}
+                content=self._MODEL_INFO_QUERY_BODY
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "data" in data and "modelInfo" in data["data"]:
-                    return data["data"]["modelInfo"]
+                    self._server_model_info = data["data"]["modelInfo"]
+                    return self._server_model_info
             
         except Exception as e:
             logger.warning(f"Failed to get CleoAI model info: {e}")
@@ -266,9 +392,15 @@ class CleoAIProvider(AIProviderInterface):
             "provider": "CleoAI Service"
         }
     
+    def _clear_caches(self) -> None:
+        """Drop cached health and model information"""
+        super()._clear_caches()
+        self._server_model_info = None
+    
     async def shutdown(self) -> None:
-        """Clean up HTTP client"""
+        """Release the shared HTTP client"""
+        await super().shutdown()
         if self.client:
-            await self.client.aclose()
+            await self._release_client()
             self.client = None
             self._initialized = False
\ No newline at end of file
@@ -1,7 +1,11 @@
-from typing import AsyncGenerator, Dict, Any
-from huggingface_hub import InferenceClient
+from typing import AsyncGenerator, Dict, Any, Optional
+import asyncio
+import functools
+import httpx
+import orjson
 import time
 import logging
+from src.ai.cache import response_cache, embed_prompt
 from src.ai.base import (
     AIProviderInterface,
     AIRequest,
@@ -15,25 +19,80 @@ from src.ai.base import (
 
 logger = logging.getLogger(__name__)
 
+HF_CHAT_COMPLETIONS_URL = "https://api-inference.huggingface.co/models/{model_id}/v1/chat/completions"
+HF_WHOAMI_URL = "https://huggingface.co/api/whoami-v2"
+
+# Sent verbatim as the first message of every chat so the server sees an
+# identical prompt prefix and can reuse its cached encoding
+SYSTEM_PROMPT_MSG = {
+    "role": "system",
+    "content": "You are a caring AI companion with persistent memory, supporting elderly users with empathy and understanding."
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_payload(
+    model_id: str,
+    context: str,
+    temperature: float,
+    max_tokens: int,
+    stream: bool,
+    cache_prompt: bool
+) -> bytes:
+    """Serialize a chat completion body; repeated identical prompts reuse the bytes"""
+    payload: Dict[str, Any] = {
+        "model": model_id,
+        "messages": [SYSTEM_PROMPT_MSG, {"role": "user", "content": context}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": stream
+    }
+    if cache_prompt:
+        # TGI reuses the KV cache for a repeated prompt prefix when asked to
+        payload["cache_prompt"] = True
+    return orjson.dumps(payload)
+
 
 class MistralProvider(AIProviderInterface):
     """Mistral AI provider using Hugging Face Inference API"""
     
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
-        self.client = None
+        self.client: Optional[httpx.AsyncClient] = None
         self.model_id = config.model_id or "mistralai/Mistral-7B-Instruct-v0.3"
+        self.chat_url = HF_CHAT_COMPLETIONS_URL.format(model_id=self.model_id)
+        # Bounds in-flight calls so bursts queue here instead of tripping HF rate limits
+        self._semaphore = asyncio.Semaphore(config.max_concurrency or 8)
+        self.cache_prompt = (config.additional_config or {}).get("cache_prompt", True)
+        self.response_cache = (
+            response_cache if (config.additional_config or {}).get("response_cache") else None
+        )
     
     async def initialize(self) -> None:
-        """Initialize the Hugging Face Inference Client"""
+        """Initialize the pooled HTTP client for the Hugging Face Inference API"""
+        # Already validated; keep the pooled client and skip another probe
+        if self._initialized:
+            return
+        
         try:
             if not self.config.api_key:
                 raise AIProviderAuthenticationError("HuggingFace token not provided")
             
-            self.client = InferenceClient(
-                token=self.config.api_key,
-                timeout=self.config.timeout
-            )
+            if self.client is None:
+                # One pooled client per provider keeps connections to the
+                # inference API warm instead of handshaking per request
+                self.client = httpx.AsyncClient(
+                    headers={
+                        "Authorization": f"Bearer {self.config.api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    timeout=httpx.Timeout(self.config.timeout, connect=10.0),
+                    limits=httpx.Limits(
+                        max_connections=16,
+                        max_keepalive_connections=16,
+                        keepalive_expiry=60.0
+                    )
+                )
             
             # Validate the connection
             if await self.validate_connection():
@@ -47,48 +106,48 @@ class MistralProvider(AIProviderInterface):
             raise AIProviderConnectionError(f"Failed to initialize: {str(e)}")
     
     async def generate_response(self, request: AIRequest) -> AIResponse:
-        """Generate a response using Mistral"""
+        """Generate a response using Mistral, served from the response cache when possible"""
         if not self._initialized:
             await self.initialize()
         
-        start_time = time.time()
+        if self.response_cache is None:
+            return await self._generate_response(request)
+        
+        return await self.response_cache.get_or_call(
+            request.context,
+            embed_prompt,
+            lambda: self._generate_response(request),
+            user_id=request.user_id,
+            model=self.model_id,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens
+        )
+    
+    async def _generate_response(self, request: AIRequest) -> AIResponse:
+        """Call the Mistral chat completions API"""
+        start_ns = time.perf_counter_ns()
         
         try:
-            # Format as chat completion
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a caring AI companion with persistent memory, supporting elderly users with empathy and understanding."
-                },
-                {
-                    "role": "user",
-                    "content": request.context
-                }
-            ]
-            
-            # Generate response
-            response = self.client.chat_completion(
-                messages=messages,
-                model=self.model_id,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                stream=False
-            )
+            # Generate response; awaiting lets other requests run meanwhile
+            response = await self._chat_completion(self._payload(request, stream=False))
             
             # Extract response
-            ai_response = response.choices[0].message.content
+            ai_response = response["choices"][0]["message"]["content"]
             
             # Calculate response time
-            response_time_ms = int((time.time() - start_time) * 1000)
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             # Extract usage if available
             usage = None
-            if hasattr(response, 'usage'):
+            if response.get("usage"):
                 usage = {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens
+                    "prompt_tokens": response["usage"]["prompt_tokens"],
+                    "completion_tokens": response["usage"]["completion_tokens"],
+                    "total_tokens": response["usage"]["total_tokens"]
                 }
+                cached_tokens = self._cached_prompt_tokens(response["usage"])
+                if cached_tokens is not None:
+                    usage["cache_read_input_tokens"] = cached_tokens
             
             logger.info(f"Generated Mistral response in {response_time_ms}ms")
             
@@ -106,7 +165,7 @@ class MistralProvider(AIProviderInterface):
             
         except Exception as e:
             logger.error(f"Failed to generate Mistral response: {e}")
-            response_time_ms = int((time.time() - start_time) * 1000)
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             # Return a fallback response
             return AIResponse(
@@ -128,51 +187,69 @@ class MistralProvider(AIProviderInterface):
             await self.initialize()
         
         try:
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a caring AI companion with persistent memory, supporting elderly users with empathy and understanding."
-                },
-                {
-                    "role": "user",
-                    "content": request.context
-                }
-            ]
-            
             # Generate streaming response
-            stream = self.client.chat_completion(
-                messages=messages,
-                model=self.model_id,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-                stream=True
-            )
+            payload = self._payload(request, stream=True)
             
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            async with self._semaphore, self.client.stream("POST", self.chat_url, content=payload) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = orjson.loads(data)
+                    content = chunk["choices"][0]["delta"].get("content")
+                    if content:
+                        yield content
                     
         except Exception as e:
             logger.error(f"Failed to generate streaming response: {e}")
             yield f"I apologize, but I'm having trouble responding right now."
     
     async def validate_connection(self) -> bool:
-        """Validate that the HF token has proper access"""
+        """Validate that the HF token is accepted, without running an inference"""
         try:
             if not self.client:
                 return False
-                
-            # Try a minimal request to validate token
-            test_response = self.client.chat_completion(
-                messages=[{"role": "user", "content": "Hello"}],
-                model=self.model_id,
-                max_tokens=10
-            )
-            return True
+            
+            # whoami is a cheap authenticated call; a full completion probe
+            # would add seconds to every worker's startup
+            response = await self.client.get(HF_WHOAMI_URL)
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"Mistral connection validation failed: {e}")
             return False
     
+    def _payload(self, request: AIRequest, stream: bool) -> bytes:
+        """Serialized chat completion body for a request"""
+        return _build_payload(
+            self.model_id,
+            request.context,
+            request.temperature,
+            request.max_tokens,
+            stream,
+            self.cache_prompt
+        )
+    
+    async def _chat_completion(self, payload: bytes) -> Dict[str, Any]:
+        """POST a non-streaming chat completion and return the decoded body"""
+        async with self._semaphore:
+            response = await self.client.post(self.chat_url, content=payload)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    @staticmethod
+    def _cached_prompt_tokens(usage: Dict[str, Any]) -> Optional[int]:
+        """Prompt tokens served from the server's prefix cache, if reported"""
+        if "cache_read_input_tokens" in usage:
+            return usage["cache_read_input_tokens"]
+        details = usage.get("prompt_tokens_details") or {}
+        return details.get("cached_tokens")
+    
     async def get_model_info(self) -> Dict[str, Any]:
         """Get information about the current model"""
         return {
@@ -181,4 +258,12 @@ class MistralProvider(AIProviderInterface):
             "type": "chat",
             "context_length": 32768,  # Mistral 7B v0.3 context
             "capabilities": ["chat", "streaming", "instruction_following"]
-        }
\ No newline at end of file
+        }
+    
+    async def shutdown(self) -> None:
+        """Close the pooled HTTP client"""
+        await super().shutdown()
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+            self._initialized = False
\ No newline at end of file
@@ -1,7 +1,8 @@
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, List
 import time
 import random
 import logging
+import zlib
 from src.ai.base import (
     AIProviderInterface,
     AIRequest,
@@ -12,6 +13,15 @@ from src.ai.base import (
 
 logger = logging.getLogger(__name__)
 
+# Fast, unsalted context hash so the same prompt picks the same reply in
+# every process; zlib.crc32 is the fallback when xxhash isn't installed
+try:
+    import xxhash
+    _hash = xxhash.xxh3_64_intdigest
+except ImportError:
+    def _hash(text: str) -> int:
+        return zlib.crc32(text.encode())
+
 
 class MockProvider(AIProviderInterface):
     """Mock AI provider for testing and development"""
@@ -28,6 +38,9 @@ class MockProvider(AIProviderInterface):
             "That must be challenging. How are you coping with this situation?",
             "Thank you for sharing that with me. Your experiences are valuable.",
         ]
+        # The replies are fixed, so split each into about five stream chunks
+        # of several words once, rather than sleeping per word on every stream
+        self._response_chunks = [self._chunk_words(response.split()) for response in self.responses]
     
     async def initialize(self) -> None:
         """Initialize the mock provider"""
@@ -41,24 +54,25 @@ class MockProvider(AIProviderInterface):
         if not self._initialized:
             await self.initialize()
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Simulate processing time based on max_tokens
         processing_time = min(0.5, request.max_tokens / 1000)
         await asyncio.sleep(processing_time)
         
         # Select a response based on context hash for consistency
-        context_hash = hash(request.context) % len(self.responses)
+        context_hash = _hash(request.context) % len(self.responses)
         response_text = self.responses[context_hash]
         
         # Add personalization if user_id is provided
         if request.user_id:
             response_text = f"[User {request.user_id}] {response_text}"
         
-        response_time_ms = int((time.time() - start_time) * 1000)
+        response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         
         # Simulate token usage
         tokens_used = random.randint(50, min(200, request.max_tokens))
+        prompt_tokens = request.context.count(" ") + 1 if request.context else 0
         
         return AIResponse(
             response=response_text,
@@ -69,9 +83,9 @@ class MockProvider(AIProviderInterface):
             response_time_ms=response_time_ms,
             success=True,
             usage={
-                "prompt_tokens": len(request.context.split()),
+                "prompt_tokens": prompt_tokens,
                 "completion_tokens": tokens_used,
-                "total_tokens": len(request.context.split()) + tokens_used
+                "total_tokens": prompt_tokens + tokens_used
             },
             metadata={
                 "mock": True,
@@ -87,17 +101,21 @@ class MockProvider(AIProviderInterface):
             await self.initialize()
         
         # Select a response
-        context_hash = hash(request.context) % len(self.responses)
-        response_text = self.responses[context_hash]
+        context_hash = _hash(request.context) % len(self.responses)
         
-        # Stream word by word
-        words = response_text.split()
-        for i, word in enumerate(words):
+        # Stream a few words at a time
+        for chunk in self._response_chunks[context_hash]:
             await asyncio.sleep(0.05)  # Simulate streaming delay
-            if i < len(words) - 1:
-                yield word + " "
-            else:
-                yield word
+            yield chunk
+    
+    @staticmethod
+    def _chunk_words(words: List[str], chunks: int = 5) -> List[str]:
+        """Join words into roughly equal chunks, keeping the spaces between them"""
+        chunk_size = max(1, len(words) // chunks)
+        return [
+            " ".join(words[i:i + chunk_size]) + (" " if i + chunk_size < len(words) else "")
+            for i in range(0, len(words), chunk_size)
+        ]
     
     async def validate_connection(self) -> bool:
         """Always returns True for mock provider"""
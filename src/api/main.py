@@ -1,12 +1,16 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from typing import Dict, Any
+import asyncio
 import logging
 from src.utils.database import mongodb_manager, redis_manager, pinecone_manager
 from src.utils.scheduler import memory_scheduler
+from src.memory.instances import memory_storage, semantic_memory
 from src.api.routes import ai_router, user_router, memory_router
-from src.api.routes.medication import router as medication_router
+from src.api.routes.medication import router as medication_router, shutdown_image_store
+from src.ai.client import ai_client
 from src.config.settings import settings
 
 # Configure logging
@@ -25,10 +29,15 @@ async def lifespan(app: FastAPI):
     
     # Connect to databases
     try:
-        redis_manager.connect()
-        await mongodb_manager.connect()
-        pinecone_manager.connect()
+        # The Redis and Pinecone clients are synchronous; connect them in
+        # worker threads alongside MongoDB instead of blocking the loop
+        await asyncio.gather(
+            asyncio.to_thread(redis_manager.connect),
+            mongodb_manager.connect(),
+            asyncio.to_thread(pinecone_manager.connect)
+        )
         logger.info("All database connections established")
+        await memory_storage.ensure_indexes()
         
         # Start scheduler
         memory_scheduler.start()
@@ -42,6 +51,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down ElderWise AI application...")
     memory_scheduler.stop()
+    await ai_client.shutdown()
+    await shutdown_image_store()
+    await semantic_memory.shutdown()
     redis_manager.disconnect()
     await mongodb_manager.disconnect()
     logger.info("All database connections closed")
@@ -52,7 +64,8 @@ app = FastAPI(
     title="ElderWise AI",
     description="Memory-driven AI companion for elderly care",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -93,29 +106,29 @@ async def health_check() -> Dict[str, Any]:
         }
     }
     
-    # Check Redis
-    try:
-        redis_manager.get_client().ping()
-        health_status["services"]["redis"] = "connected"
-    except:
-        health_status["services"]["redis"] = "disconnected"
-        health_status["status"] = "degraded"
+    # get_client()/get_index() may reconnect, so they run in the worker thread too
+    async def check_redis() -> None:
+        await asyncio.to_thread(lambda: redis_manager.get_client().ping())
     
-    # Check MongoDB
-    try:
+    async def check_mongodb() -> None:
         await mongodb_manager.client.admin.command('ping')
-        health_status["services"]["mongodb"] = "connected"
-    except:
-        health_status["services"]["mongodb"] = "disconnected"
-        health_status["status"] = "degraded"
     
-    # Check Pinecone
-    try:
-        pinecone_manager.get_index().describe_index_stats()
-        health_status["services"]["pinecone"] = "connected"
-    except:
-        health_status["services"]["pinecone"] = "disconnected"
-        health_status["status"] = "degraded"
+    async def check_pinecone() -> None:
+        await asyncio.to_thread(lambda: pinecone_manager.get_index().describe_index_stats())
+    
+    # Probe all services concurrently so the check takes as long as the slowest one
+    services = ("redis", "mongodb", "pinecone")
+    results = await asyncio.gather(
+        check_redis(), check_mongodb(), check_pinecone(),
+        return_exceptions=True
+    )
+    
+    for service, result in zip(services, results):
+        if isinstance(result, BaseException):
+            health_status["services"][service] = "disconnected"
+            health_status["status"] = "degraded"
+        else:
+            health_status["services"][service] = "connected"
     
     return health_status
 
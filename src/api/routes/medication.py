@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
+import re
 from datetime import datetime, timedelta
 import base64
 
@@ -12,15 +14,119 @@ from src.models.medication import (
     InteractionCheckResult, MedicationAdherence
 )
 from src.services.vision import vision_service
-from src.services.medication_db import medication_db_service
+from src.services.medication_db import medication_db_service, score_candidates
 from src.services.drug_interactions import drug_interaction_service
-from src.memory.storage import MemoryStorage
+from src.memory.instances import memory_storage
+from src.utils.cache import redis_cache, hash_key
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize storage
-storage = MemoryStorage()
+# Shared storage instance
+storage = memory_storage
+
+# Cache lifetimes (seconds) for per-user adherence stats and medication lists;
+# adherence is served stale for up to ADHERENCE_STALE_TTL while it refreshes
+ADHERENCE_TTL = 300
+ADHERENCE_STALE_TTL = 3600
+USER_MEDS_TTL = 300
+
+# Adherence cache keys with a background refresh already scheduled
+_adherence_refreshing: set = set()
+
+# Image analyses are stored by a fixed pool of workers draining a bounded
+# queue, so at most (workers + queue size) images are held in memory
+IMAGE_STORE_WORKERS = 8
+IMAGE_STORE_QUEUE_SIZE = 64
+_image_queue: Optional[asyncio.Queue] = None
+_image_workers: List[asyncio.Task] = []
+
+
+# Medication name keywords that warrant an elder-care warning, by warning tag
+ELDER_WARNING_KEYWORDS = {
+    "opioid": "controlled",
+    "narcotic": "controlled",
+    "benzodiazepine": "controlled",
+    "anticoagulant": "bleeding",
+    "warfarin": "bleeding",
+}
+ELDER_WARNING_MESSAGES = {
+    "controlled": "⚠️ This medication requires special care. Keep in a secure location.",
+    "bleeding": "⚠️ Blood thinner detected. Regular monitoring required.",
+}
+
+# All keywords are matched in a single pass over each name; a compiled
+# regex alternation is the fallback when pyahocorasick isn't installed
+try:
+    import ahocorasick
+    
+    _warning_automaton = ahocorasick.Automaton()
+    for _keyword, _tag in ELDER_WARNING_KEYWORDS.items():
+        _warning_automaton.add_word(_keyword, (_keyword, _tag))
+    _warning_automaton.make_automaton()
+    
+    def _warning_tags(name: str) -> set:
+        return {tag for _, (_, tag) in _warning_automaton.iter(name.lower())}
+except ImportError:
+    _warning_pattern = re.compile("|".join(map(re.escape, ELDER_WARNING_KEYWORDS)))
+    
+    def _warning_tags(name: str) -> set:
+        return {ELDER_WARNING_KEYWORDS[m] for m in _warning_pattern.findall(name.lower())}
+
+
+def _adherence_cache_key(user_id: str, days: int) -> str:
+    # User ids are hashed so per-user entries are isolated without putting PII in key names
+    return f"adherence:{hash_key(user_id)}:{days}"
+
+
+async def _invalidate_adherence(user_id: str) -> None:
+    await redis_cache.delete_pattern(f"adherence:{hash_key(user_id)}:*")
+
+
+def _user_meds_cache_key(user_id: str) -> str:
+    return f"user_meds:{hash_key(user_id)}"
+
+
+async def _invalidate_user_meds(user_id: str) -> None:
+    await redis_cache.delete(_user_meds_cache_key(user_id))
+
+
+async def _fetch_user_medications(user_id: str) -> List[UserMedication]:
+    """Load a user's medications from the database"""
+    # Mock implementation - in production, query from database
+    return [
+        UserMedication(
+            user_id=user_id,
+            medication=Medication(
+                medication_id="med_001",
+                name="Acetaminophen",
+                generic_name="acetaminophen",
+                brand_names=["Tylenol"],
+                strength="500 mg"
+            ),
+            dosage="500mg",
+            frequency="Every 6 hours as needed",
+            times=["08:00", "14:00", "20:00"],
+            start_date=datetime.utcnow() - timedelta(days=30),
+            is_active=True
+        )
+    ]
+
+
+async def _load_user_meds(user_id: str) -> List[UserMedication]:
+    """Return a user's medications, cached in Redis until they change"""
+    cache_key = _user_meds_cache_key(user_id)
+    cached = await redis_cache.get(cache_key)
+    if cached is not None:
+        return [UserMedication.model_validate(med) for med in cached]
+    
+    medications = await _fetch_user_medications(user_id)
+    await redis_cache.set(
+        cache_key,
+        [med.model_dump(mode="json") for med in medications],
+        USER_MEDS_TTL
+    )
+    return medications
 
 
 class MedicationIdentifyRequest(BaseModel):
@@ -54,14 +160,112 @@ class MedicationReminderRequest(BaseModel):
     reminder_times: List[str]
 
 
-@router.post("/identify", response_model=MedicationIdentifyResponse)
-async def identify_medication(
-    request: MedicationIdentifyRequest,
-    background_tasks: BackgroundTasks
+async def _identify_from_bytes(user_id: str, image_bytes: bytes) -> MedicationIdentifyResponse:
+    """Run the vision pipeline on raw image bytes and match medications"""
+    # Validate image
+    is_valid, error_msg = vision_service.validate_image(image_bytes)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Enhance image for better recognition
+    enhanced_image = await vision_service.enhance_image(image_bytes)
+    
+    # Extract pill features
+    logger.info(f"Analyzing medication image for user {user_id}")
+    pill_features = await vision_service.analyze_medication_image(enhanced_image)
+    
+    # Search for medications based on features
+    medications = []
+    confidence_scores = {}
+    
+    if pill_features.imprint:
+        # Search by imprint first (most reliable)
+        found_meds = await medication_db_service.identify_by_imprint(
+            imprint=pill_features.imprint,
+            shape=pill_features.shape,
+            color=pill_features.color
+        )
+        
+        if found_meds:
+            medications.extend(found_meds)
+            # Calculate confidence based on feature matches
+            scores = score_candidates(
+                found_meds,
+                shape=pill_features.shape,
+                color=pill_features.color,
+                confidence=pill_features.confidence
+            )
+            confidence_scores = {
+                med.medication_id: float(score) for med, score in zip(found_meds, scores)
+            }
+    
+    # Store the image analysis in background
+    await enqueue_medication_image(
+        user_id=user_id,
+        image_data=image_bytes,
+        pill_features=pill_features,
+        identified_medications=medications
+    )
+    
+    # Generate warnings for elder users
+    warnings = []
+    if medications:
+        # Check if any identified medications require special care
+        for med in medications:
+            tags = _warning_tags(med.name)
+            warnings.extend(msg for tag, msg in ELDER_WARNING_MESSAGES.items() if tag in tags)
+    else:
+        warnings.append("Could not identify medication. Please consult your pharmacist.")
+    
+    # Add general advice
+    warnings.append("Always verify medication identity with your pharmacist before taking.")
+    
+    return MedicationIdentifyResponse(
+        success=len(medications) > 0,
+        medications=medications,
+        confidence_scores=confidence_scores,
+        pill_features={
+            "shape": pill_features.shape,
+            "color": pill_features.color,
+            "imprint": pill_features.imprint,
+            "size_estimate": pill_features.size_estimate
+        },
+        warnings=warnings
+    )
+
+
+@router.post("/identify/upload", response_model=MedicationIdentifyResponse)
+async def identify_medication_upload(
+    image: UploadFile = File(..., description="Medication photo"),
+    user_id: str = Form(..., description="User ID"),
+    save_to_profile: bool = Form(False, description="Save medication to user profile")
 ):
+    """
+    Identify medication from an uploaded image file
+    
+    Accepts multipart/form-data so the photo is sent as raw bytes rather than
+    base64 text, and large uploads are spooled to disk by Starlette.
+    """
+    try:
+        image_bytes = await image.read()
+        return await _identify_from_bytes(user_id, image_bytes)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error identifying medication: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await image.close()
+
+
+@router.post("/identify", response_model=MedicationIdentifyResponse, deprecated=True)
+async def identify_medication(request: MedicationIdentifyRequest):
     """
     Identify medication from an image
     
+    Deprecated: use /identify/upload, which avoids the base64 overhead.
+    
     This endpoint:
     1. Validates the image
     2. Extracts pill features (shape, color, imprint)
@@ -69,77 +273,17 @@ async def identify_medication(
     4. Returns possible matches with confidence scores
     """
     try:
-        # Validate image
-        is_valid, error_msg = vision_service.validate_image(request.image_data)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Enhance image for better recognition
-        enhanced_image = await vision_service.enhance_image(request.image_data)
-        
-        # Extract pill features
-        logger.info(f"Analyzing medication image for user {request.user_id}")
-        pill_features = await vision_service.analyze_medication_image(enhanced_image)
-        
-        # Search for medications based on features
-        medications = []
-        confidence_scores = {}
-        
-        if pill_features.imprint:
-            # Search by imprint first (most reliable)
-            found_meds = await medication_db_service.identify_by_imprint(
-                imprint=pill_features.imprint,
-                shape=pill_features.shape,
-                color=pill_features.color
-            )
-            
-            for med in found_meds:
-                medications.append(med)
-                # Calculate confidence based on feature matches
-                confidence = pill_features.confidence
-                if med.shape == pill_features.shape:
-                    confidence += 0.1
-                if med.color == pill_features.color:
-                    confidence += 0.1
-                confidence_scores[med.medication_id] = min(confidence, 1.0)
-        
-        # Store the image analysis in background
-        background_tasks.add_task(
-            store_medication_image,
-            user_id=request.user_id,
-            image_data=request.image_data,
-            pill_features=pill_features,
-            identified_medications=medications
-        )
-        
-        # Generate warnings for elder users
-        warnings = []
-        if medications:
-            # Check if any identified medications require special care
-            for med in medications:
-                if any(term in med.name.lower() for term in ["opioid", "narcotic", "benzodiazepine"]):
-                    warnings.append("⚠️ This medication requires special care. Keep in a secure location.")
-                if "anticoagulant" in med.name.lower() or "warfarin" in med.name.lower():
-                    warnings.append("⚠️ Blood thinner detected. Regular monitoring required.")
-        else:
-            warnings.append("Could not identify medication. Please consult your pharmacist.")
-        
-        # Add general advice
-        warnings.append("Always verify medication identity with your pharmacist before taking.")
+        # Decoded here rather than during validation so malformed data keeps
+        # the 400 response clients check for, not a 422 validation envelope
+        try:
+            image_bytes = base64.b64decode(request.image_data, validate=True)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid image data. Please try again.")
         
-        return MedicationIdentifyResponse(
-            success=len(medications) > 0,
-            medications=medications,
-            confidence_scores=confidence_scores,
-            pill_features={
-                "shape": pill_features.shape,
-                "color": pill_features.color,
-                "imprint": pill_features.imprint,
-                "size_estimate": pill_features.size_estimate
-            },
-            warnings=warnings
-        )
+        return await _identify_from_bytes(request.user_id, image_bytes)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error identifying medication: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -149,6 +293,7 @@ async def identify_medication(
 async def get_medication_details(medication_id: str):
     """Get detailed information about a medication"""
     try:
+        # Cached in-process and in Redis by the medication service
         details = await medication_db_service.get_medication_details(medication_id)
         
         if not details:
@@ -197,9 +342,13 @@ async def add_user_medication(request: AddMedicationRequest):
         # Store in database (mock for now)
         # In production, save to MongoDB
         logger.info(f"Added medication {medication.name} for user {request.user_id}")
+        await asyncio.gather(
+            _invalidate_adherence(request.user_id),
+            _invalidate_user_meds(request.user_id)
+        )
         
         # Check for interactions with existing medications
-        interaction_result = await check_medication_interactions(
+        interaction_result = await _check_interactions(
             InteractionCheck(
                 user_id=request.user_id,
                 medications=[medication.name]
@@ -213,69 +362,76 @@ async def add_user_medication(request: AddMedicationRequest):
             "interaction_warnings": interaction_result.recommendations
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error adding user medication: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/user/{user_id}/medications")
+@router.get("/user/{user_id}/medications", response_model=List[UserMedication])
 async def get_user_medications(user_id: str, include_inactive: bool = False):
     """Get all medications for a user"""
     try:
-        # Mock implementation - in production, query from database
-        mock_medications = [
-            UserMedication(
-                user_id=user_id,
-                medication=Medication(
-                    medication_id="med_001",
-                    name="Acetaminophen",
-                    generic_name="acetaminophen",
-                    brand_names=["Tylenol"],
-                    strength="500 mg"
-                ),
-                dosage="500mg",
-                frequency="Every 6 hours as needed",
-                times=["08:00", "14:00", "20:00"],
-                start_date=datetime.utcnow() - timedelta(days=30),
-                is_active=True
-            )
-        ]
+        medications = await _load_user_meds(user_id)
         
         if include_inactive:
-            return mock_medications
+            return medications
         else:
-            return [med for med in mock_medications if med.is_active]
+            return [med for med in medications if med.is_active]
             
     except Exception as e:
         logger.error(f"Error getting user medications: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/interactions/check", response_model=InteractionCheckResult)
-async def check_medication_interactions(request: InteractionCheck):
-    """Check for drug-drug and drug-food interactions"""
+async def _check_interactions(request: InteractionCheck) -> InteractionCheckResult:
+    """Check a request's medications against the user's current medications"""
+    elder_task = None
     try:
+        # Elder-specific concerns only depend on the request, so start them
+        # right away and let them overlap with the interaction check
+        if request.user_id:
+            # Get user age from profile (mock for now)
+            user_age = 75  # Mock age
+            elder_task = asyncio.create_task(
+                drug_interaction_service.check_elder_specific_concerns(
+                    medications=request.medications,
+                    user_age=user_age
+                )
+            )
+        
         # Get user's current medications
-        user_medications = await get_user_medications(request.user_id)
+        user_medications = [
+            med for med in await _load_user_meds(request.user_id) if med.is_active
+        ]
         
         # Check interactions
-        result = await drug_interaction_service.check_all_interactions(
+        interactions = drug_interaction_service.check_all_interactions(
             user_medications=user_medications,
             new_medication=request.medications[0] if request.medications else None
         )
         
+        if elder_task is None:
+            return await interactions
+        
         # Add elder-specific concerns
-        if request.user_id:
-            # Get user age from profile (mock for now)
-            user_age = 75  # Mock age
-            elder_concerns = await drug_interaction_service.check_elder_specific_concerns(
-                medications=request.medications,
-                user_age=user_age
-            )
-            result.recommendations.extend(elder_concerns)
+        result, elder_concerns = await asyncio.gather(interactions, elder_task)
+        result.recommendations.extend(elder_concerns)
         
         return result
         
+    finally:
+        if elder_task is not None and not elder_task.done():
+            elder_task.cancel()
+
+
+@router.post("/interactions/check", response_model=InteractionCheckResult)
+async def check_medication_interactions(request: InteractionCheck):
+    """Check for drug-drug and drug-food interactions"""
+    try:
+        return await _check_interactions(request)
+        
     except Exception as e:
         logger.error(f"Error checking interactions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -285,25 +441,30 @@ async def check_medication_interactions(request: InteractionCheck):
 async def create_medication_reminder(request: MedicationReminderRequest):
     """Create medication reminders for a user"""
     try:
-        # Create reminders for each time
-        reminders = []
+        # Parse every time up front against a single "now"
+        now = datetime.utcnow()
+        scheduled_times = []
         for time_str in request.reminder_times:
-            # Parse time and create reminder
-            hour, minute = map(int, time_str.split(':'))
-            reminder_time = datetime.utcnow().replace(hour=hour, minute=minute, second=0)
+            hour, _, minute = time_str.partition(':')
+            reminder_time = now.replace(hour=int(hour), minute=int(minute), second=0)
             
             # If time has passed today, schedule for tomorrow
-            if reminder_time < datetime.utcnow():
+            if reminder_time < now:
                 reminder_time += timedelta(days=1)
-            
-            reminder = MedicationReminder(
+            scheduled_times.append(reminder_time)
+        
+        # Every field was just computed or comes from the validated request,
+        # so build the models without re-running validation
+        reminders = [
+            MedicationReminder.model_construct(
                 user_id=request.user_id,
                 user_medication_id=request.user_medication_id,
                 medication_name="Mock Medication",  # Get from database in production
                 dosage="Mock Dosage",
                 scheduled_time=reminder_time
             )
-            reminders.append(reminder)
+            for reminder_time in scheduled_times
+        ]
         
         # In production, save to database and schedule notifications
         logger.info(f"Created {len(reminders)} reminders for user {request.user_id}")
@@ -311,7 +472,7 @@ async def create_medication_reminder(request: MedicationReminderRequest):
         return {
             "success": True,
             "reminders_created": len(reminders),
-            "next_reminder": min(r.scheduled_time for r in reminders).isoformat()
+            "next_reminder": min(scheduled_times).isoformat()
         }
         
     except Exception as e:
@@ -319,37 +480,69 @@ async def create_medication_reminder(request: MedicationReminderRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _compute_adherence(user_id: str, days: int) -> Dict[str, Any]:
+    """Compute adherence statistics and store them in the SWR cache"""
+    # Mock implementation
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+    
+    adherence = MedicationAdherence(
+        user_id=user_id,
+        medication_name="All Medications",
+        period_start=start_date,
+        period_end=end_date,
+        total_doses=90,  # 3 times daily for 30 days
+        taken_doses=85,
+        missed_doses=5,
+        skipped_doses=0,
+        adherence_percentage=94.4
+    )
+    
+    result = {
+        "adherence": adherence.model_dump(mode="json"),
+        "trend": "improving",
+        "recommendations": [
+            "Great job maintaining your medication schedule!",
+            "Consider setting reminders for evening doses"
+        ]
+    }
+    
+    await redis_cache.set_swr(
+        _adherence_cache_key(user_id, days), result, ADHERENCE_TTL, ADHERENCE_STALE_TTL
+    )
+    return result
+
+
+async def _refresh_adherence(user_id: str, days: int) -> None:
+    """Recompute stale adherence statistics in the background"""
+    cache_key = _adherence_cache_key(user_id, days)
+    try:
+        await _compute_adherence(user_id, days)
+    except Exception as e:
+        logger.error(f"Error refreshing adherence data: {e}")
+    finally:
+        _adherence_refreshing.discard(cache_key)
+
+
 @router.get("/adherence/{user_id}")
 async def get_medication_adherence(
     user_id: str,
+    background_tasks: BackgroundTasks,
     days: int = 30
 ):
     """Get medication adherence statistics for a user"""
     try:
-        # Mock implementation
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        adherence = MedicationAdherence(
-            user_id=user_id,
-            medication_name="All Medications",
-            period_start=start_date,
-            period_end=end_date,
-            total_doses=90,  # 3 times daily for 30 days
-            taken_doses=85,
-            missed_doses=5,
-            skipped_doses=0,
-            adherence_percentage=94.4
-        )
-        
-        return {
-            "adherence": adherence,
-            "trend": "improving",
-            "recommendations": [
-                "Great job maintaining your medication schedule!",
-                "Consider setting reminders for evening doses"
-            ]
-        }
+        # Stale-while-revalidate: stale stats are returned immediately and
+        # recomputed after the response instead of blocking this request
+        cache_key = _adherence_cache_key(user_id, days)
+        cached, stale = await redis_cache.get_swr(cache_key)
+        if cached is not None:
+            if stale and cache_key not in _adherence_refreshing:
+                _adherence_refreshing.add(cache_key)
+                background_tasks.add_task(_refresh_adherence, user_id, days)
+            return cached
+        
+        return await _compute_adherence(user_id, days)
         
     except Exception as e:
         logger.error(f"Error getting adherence data: {e}")
@@ -357,12 +550,24 @@ async def get_medication_adherence(
 
 
 @router.post("/reminder/{reminder_id}/taken")
-async def mark_medication_taken(reminder_id: str, notes: Optional[str] = None):
+async def mark_medication_taken(
+    reminder_id: str,
+    notes: Optional[str] = None,
+    user_id: Optional[str] = None
+):
     """Mark a medication reminder as taken"""
     try:
         # In production, update the reminder in database
         logger.info(f"Marked reminder {reminder_id} as taken")
         
+        # Reminders aren't persisted yet, so the owner can't be looked up;
+        # callers pass user_id so cached adherence stats are refreshed
+        if user_id:
+            await asyncio.gather(
+                _invalidate_adherence(user_id),
+                _invalidate_user_meds(user_id)
+            )
+        
         return {
             "success": True,
             "reminder_id": reminder_id,
@@ -378,7 +583,7 @@ async def mark_medication_taken(reminder_id: str, notes: Optional[str] = None):
 # Background task functions
 async def store_medication_image(
     user_id: str,
-    image_data: str,
+    image_data: bytes,
     pill_features: Any,
     identified_medications: List[Medication]
 ):
@@ -403,4 +608,44 @@ async def store_medication_image(
         logger.info(f"Stored medication image analysis for user {user_id}")
         
     except Exception as e:
-        logger.error(f"Error storing medication image: {e}")
\ No newline at end of file
+        logger.error(f"Error storing medication image: {e}")
+
+
+async def _image_store_worker():
+    """Store queued medication images one at a time"""
+    while True:
+        kwargs = await _image_queue.get()
+        try:
+            await store_medication_image(**kwargs)
+        finally:
+            _image_queue.task_done()
+
+
+async def enqueue_medication_image(**kwargs):
+    """
+    Queue an image analysis for storage by the worker pool
+    
+    Workers start on first use. When the queue is full this waits for a
+    free slot, applying backpressure instead of piling up images in memory.
+    """
+    global _image_queue
+    if not _image_workers or all(worker.done() for worker in _image_workers):
+        _image_queue = asyncio.Queue(maxsize=IMAGE_STORE_QUEUE_SIZE)
+        _image_workers[:] = [
+            asyncio.create_task(_image_store_worker()) for _ in range(IMAGE_STORE_WORKERS)
+        ]
+    await _image_queue.put(kwargs)
+
+
+async def shutdown_image_store(timeout: float = 10.0):
+    """Let queued images finish storing, then stop the workers"""
+    if _image_queue is not None and _image_workers:
+        try:
+            await asyncio.wait_for(_image_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {_image_queue.qsize()} queued medication images on shutdown")
+    
+    for worker in _image_workers:
+        worker.cancel()
+    await asyncio.gather(*_image_workers, return_exceptions=True)
+    _image_workers.clear()
\ No newline at end of file
@@ -1,17 +1,27 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
+import uuid
+from bson import ObjectId
 
-from src.memory.storage import MemoryStorage
-from src.memory.semantic import SemanticMemory
-from src.memory.session import SessionManager
+from src.memory.instances import memory_storage, semantic_memory, session_manager
 from src.models.memory import MemoryFragment
+from src.utils.cache import redis_cache, hash_key
 
 router = APIRouter()
-storage = MemoryStorage()
-semantic = SemanticMemory()
-session = SessionManager()
+storage = memory_storage
+semantic = semantic_memory
+session = session_manager
+
+# Tag lists change whenever a memory is stored, so they are only cached briefly
+TAGS_TTL = 60
+
+
+def _tags_cache_key(user_id: str) -> str:
+    return f"memory_tags:{hash_key(user_id)}"
 
 
 class CreateMemoryRequest(BaseModel):
@@ -29,37 +39,58 @@ class SearchMemoryRequest(BaseModel):
     retention: Optional[str] = Field(None, pattern="^(active|archive)$")
 
 
+class RecentMemoriesResponse(BaseModel):
+    user_id: str
+    memories: List[MemoryFragment]
+    count: int
+
+
 @router.post("/create")
 async def create_memory(request: CreateMemoryRequest):
     """Manually create a memory fragment"""
     try:
+        # One timestamp shared by the Mongo fragment and the Pinecone metadata
+        now = datetime.utcnow()
+        
         # Create memory fragment
         fragment = MemoryFragment(
             user_id=request.user_id,
-            timestamp=datetime.utcnow(),
+            timestamp=now,
             type=request.type,
             content=request.content,
             tags=request.tags,
             retention="active",
-            metadata=request.metadata
+            metadata=request.metadata,
+            embedding_id=str(uuid.uuid4())
         )
         
-        # Store in MongoDB
-        fragment_id = await storage.store_memory_fragment(fragment)
+        # Pre-generate the Mongo id so the Pinecone write doesn't wait for the insert
+        new_id = str(ObjectId())
         
-        # Store in Pinecone
-        vector_id = await semantic.store_memory_vector(
-            user_id=request.user_id,
-            content=request.content,
-            metadata={
-                "type": request.type,
-                "tags": request.tags,
-                "retention": "active",
-                "fragment_id": fragment_id,
-                **request.metadata
-            }
+        # Start the MongoDB insert first so it is in flight while the
+        # embedding and Pinecone upsert run
+        mongo_task = asyncio.create_task(
+            storage.store_memory_fragment(fragment, fragment_id=new_id)
+        )
+        fragment_id, vector_id = await asyncio.gather(
+            mongo_task,
+            semantic.store_memory_vector(
+                user_id=request.user_id,
+                content=request.content,
+                metadata={
+                    "type": request.type,
+                    "tags": request.tags,
+                    "retention": "active",
+                    "fragment_id": new_id,
+                    "timestamp": now.isoformat(),
+                    **request.metadata
+                },
+                vector_id=fragment.embedding_id
+            )
         )
         
+        await redis_cache.delete(_tags_cache_key(request.user_id))
+        
         return {
             "message": "Memory created successfully",
             "fragment_id": fragment_id,
@@ -70,7 +101,7 @@ async def create_memory(request: CreateMemoryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/search")
+@router.post("/search", response_class=ORJSONResponse)
 async def search_memories(request: SearchMemoryRequest):
     """Search for memories using semantic similarity"""
     try:
@@ -81,17 +112,18 @@ async def search_memories(request: SearchMemoryRequest):
             retention=request.retention
         )
         
-        return {
+        # Results are plain JSON-ready dicts, so skip FastAPI's jsonable_encoder pass
+        return ORJSONResponse({
             "query": request.query,
             "results": memories,
             "count": len(memories)
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{user_id}/recent")
+@router.get("/{user_id}/recent", response_model=RecentMemoriesResponse)
 async def get_recent_memories(
     user_id: str,
     limit: int = Query(10, ge=1, le=50)
@@ -102,7 +134,7 @@ async def get_recent_memories(
         
         return {
             "user_id": user_id,
-            "memories": [m.model_dump() for m in memories],
+            "memories": memories,
             "count": len(memories)
         }
         
@@ -110,20 +142,21 @@ async def get_recent_memories(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{user_id}/session")
+@router.get("/{user_id}/session", response_class=ORJSONResponse)
 async def get_session_history(
     user_id: str,
     limit: Optional[int] = Query(None, ge=1, le=20)
 ):
     """Get recent session interactions from Redis"""
     try:
-        interactions = session.get_recent_interactions(user_id, limit=limit)
+        # The session store uses a blocking Redis client; keep it off the event loop
+        interactions = await asyncio.to_thread(session.get_recent_interactions, user_id, limit=limit)
         
-        return {
+        return ORJSONResponse({
             "user_id": user_id,
             "interactions": interactions,
             "count": len(interactions)
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -133,7 +166,7 @@ async def get_session_history(
 async def clear_session(user_id: str):
     """Clear session history for a user"""
     try:
-        session.clear_session(user_id)
+        await asyncio.to_thread(session.clear_session, user_id)
         
         return {
             "message": "Session cleared successfully",
@@ -159,23 +192,22 @@ async def trigger_archive():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{user_id}/tags")
+@router.get("/{user_id}/tags", response_class=ORJSONResponse)
 async def get_memory_tags(user_id: str):
     """Get all unique tags used in a user's memories"""
     try:
-        # Get all memories
-        memories = await storage.get_active_memories(user_id, limit=1000)
-        
-        # Extract unique tags
-        all_tags = set()
-        for memory in memories:
-            all_tags.update(memory.tags)
-        
-        return {
+        cache_key = _tags_cache_key(user_id)
+        tags = await redis_cache.get(cache_key)
+        if tags is None:
+            # Distinct runs server-side, so only the tag values cross the wire
+            tags = await storage.get_distinct_tags(user_id)
+            await redis_cache.set(cache_key, tags, TAGS_TTL)
+        
+        return ORJSONResponse({
             "user_id": user_id,
-            "tags": sorted(list(all_tags)),
-            "count": len(all_tags)
-        }
+            "tags": tags,
+            "count": len(tags)
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
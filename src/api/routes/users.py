@@ -4,10 +4,10 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from src.models.memory import UserProfile
-from src.memory.storage import MemoryStorage
+from src.memory.instances import memory_storage, memory_controller
 
 router = APIRouter()
-storage = MemoryStorage()
+storage = memory_storage
 
 
 class CreateUserRequest(BaseModel):
@@ -25,6 +25,11 @@ class UpdateUserRequest(BaseModel):
     interests: Optional[List[str]] = None
 
 
+class UpdateUserResponse(BaseModel):
+    message: str
+    profile: UserProfile
+
+
 @router.post("/create")
 async def create_user(request: CreateUserRequest):
     """Create a new user profile"""
@@ -57,7 +62,7 @@ async def create_user(request: CreateUserRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{user_id}")
+@router.get("/{user_id}", response_model=UserProfile)
 async def get_user(user_id: str):
     """Get user profile by ID"""
     try:
@@ -65,7 +70,7 @@ async def get_user(user_id: str):
         if not user_profile:
             raise HTTPException(status_code=404, detail="User not found")
         
-        return user_profile.model_dump()
+        return user_profile
         
     except HTTPException:
         raise
@@ -73,7 +78,7 @@ async def get_user(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/{user_id}")
+@router.put("/{user_id}", response_model=UpdateUserResponse)
 async def update_user(user_id: str, request: UpdateUserRequest):
     """Update user profile"""
     try:
@@ -91,13 +96,14 @@ async def update_user(user_id: str, request: UpdateUserRequest):
         success = await storage.update_user_profile(user_id, updates)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update user profile")
+        memory_controller.invalidate_profile(user_id)
         
         # Return updated profile
         updated_profile = await storage.get_user_profile(user_id)
         
         return {
             "message": "User profile updated successfully",
-            "profile": updated_profile.model_dump()
+            "profile": updated_profile
         }
         
     except HTTPException:
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional, List
 
@@ -11,34 +12,50 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     redis_password: Optional[str] = None
+    redis_max_connections: int = 50
     
     # MongoDB
     mongodb_uri: str = "mongodb://localhost:27017/"
     mongodb_database: str = "elderwise_ai"
+    mongodb_max_pool_size: int = 50
     
     # Pinecone
     pinecone_api_key: str
     pinecone_environment: str = "us-west1-gcp"
     pinecone_index_name: str = "elderwise-memory"
+    pinecone_pod_type: Optional[str] = None  # e.g. "s1.x1" for a pod index; serverless when unset
+    pinecone_upsert_batch_size: int = 32
+    pinecone_upsert_max_wait_ms: int = 500
     
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_workers: int = 4
+    api_loop: str = "uvloop"  # uvicorn event loop: auto, asyncio, uvloop
+    api_http: str = "httptools"  # uvicorn HTTP parser: auto, h11, httptools
+    api_backlog: int = 2048
+    api_limit_concurrency: int = 1000
+    api_timeout_keep_alive: int = 15  # seconds
     
     # Memory Settings
     memory_active_days: int = 90
     memory_archive_days: int = 365
     memory_context_limit: int = 10
+    memory_context_relevant: int = 3  # semantic matches included in the prompt
+    memory_context_fragments: int = 5  # recent fragments included in the prompt
     
     # AI Provider Settings
     ai_provider: str = "mistral"  # Options: mistral, cleoai, mock
     ai_fallback_providers: List[str] = []  # e.g., ["mock"] or ["cleoai", "mock"]
     ai_timeout: int = 60  # seconds
     ai_max_retries: int = 3
+    ai_response_cache_enabled: bool = True
+    ai_response_cache_ttl: int = 3600  # seconds
+    ai_semantic_cache_threshold: float = 0.92  # cosine similarity
     
     # Mistral Specific Settings
     mistral_model_id: str = "mistralai/Mistral-7B-Instruct-v0.3"
+    mistral_max_concurrency: int = 8
     
     # CleoAI Specific Settings
     cleoai_endpoint: Optional[str] = "http://localhost:8000"
@@ -61,4 +78,15 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings, parsing the environment and .env once
+    
+    Usable as a FastAPI dependency (Depends(get_settings)) so tests can
+    override it; call get_settings.cache_clear() to force a re-read.
+    """
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
@@ -1,19 +1,130 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
+import asyncio
+import re
+import time
+import uuid
+from bson import ObjectId
 from src.memory.session import SessionManager
 from src.memory.storage import MemoryStorage
 from src.memory.semantic import SemanticMemory
 from src.models.memory import MemoryFragment, UserProfile
+from src.config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Only the fields the prompt uses are fetched for recent fragments
+CONTEXT_FRAGMENT_FIELDS = ["user_id", "timestamp", "type", "content", "tags"]
+
+# Keyword sets for the interaction heuristics. A text is scanned once for
+# every keyword and each heuristic intersects the matches with its own set;
+# matching is substring based, so "pills" still matches "pill".
+SIGNIFICANT_KEYWORDS = frozenset([
+    "medication", "pain", "feel", "doctor", "appointment", "family",
+    "remember", "forgot", "worried", "happy", "sad", "lonely"
+])
+TYPE_KEYWORDS = (
+    ("health", frozenset(["medication", "pill", "doctor", "pain", "hurt"])),
+    ("emotion", frozenset(["feel", "sad", "happy", "lonely", "worried"])),
+    ("event", frozenset(["remember", "forgot", "yesterday", "last week"])),
+    ("preference", frozenset(["like", "enjoy", "prefer", "favorite"])),
+)
+HEALTH_TAG_TERMS = frozenset(["medication", "doctor", "pain", "appointment", "symptom"])
+EMOTION_TAG_TERMS = frozenset(["happy", "sad", "worried", "anxious", "lonely"])
+TAG_TERMS = HEALTH_TAG_TERMS | EMOTION_TAG_TERMS
+DAILY_KEYWORDS = frozenset(["today", "morning", "evening"])
+MEMORY_KEYWORDS = frozenset(["yesterday", "last week", "remember"])
+
+ALL_KEYWORDS = (
+    SIGNIFICANT_KEYWORDS | TAG_TERMS | DAILY_KEYWORDS | MEMORY_KEYWORDS
+    | frozenset().union(*(words for _, words in TYPE_KEYWORDS))
+)
+
+# Aho-Corasick finds every keyword in one linear pass however large the
+# vocabulary grows; a lookahead regex alternation is the fallback when
+# pyahocorasick isn't installed
+try:
+    import ahocorasick
+    
+    _keyword_automaton = ahocorasick.Automaton()
+    for _keyword in ALL_KEYWORDS:
+        _keyword_automaton.add_word(_keyword, _keyword)
+    _keyword_automaton.make_automaton()
+    
+    def _match_keywords(text: str) -> Set[str]:
+        return {keyword for _, keyword in _keyword_automaton.iter(text)}
+except ImportError:
+    # The lookahead reports a match at every position, so keywords that
+    # overlap in the text are all found
+    _keyword_pattern = re.compile(
+        "(?=(" + "|".join(map(re.escape, sorted(ALL_KEYWORDS, key=len, reverse=True))) + "))"
+    )
+    
+    def _match_keywords(text: str) -> Set[str]:
+        return set(_keyword_pattern.findall(text))
+
+# Static prompt scaffolding; _format_context only fills in the sections
+PROFILE_TEMPLATE = """User Profile:
+Name: {name}
+Age: {age}
+Health Conditions: {conditions}
+Interests: {interests}"""
+
+PROMPT_TEMPLATE = """You are a caring AI companion supporting an elderly user. You have persistent memory and should respond as if you genuinely remember past conversations and care about their wellbeing.
+
+{profile}
+
+{interactions}
+
+{memories}
+
+{events}
+
+Current Message: "{user_message}"
+
+Instructions:
+- Respond naturally and empathetically
+- Reference relevant past information when appropriate
+- Show that you remember and care about their situation
+- Be supportive and encouraging
+- If health concerns are mentioned, gently suggest consulting healthcare providers
+- Keep responses conversational and warm"""
+
+# Profiles change rarely, so each worker reuses a fetched profile briefly
+PROFILE_CACHE_TTL = 60  # seconds
+PROFILE_CACHE_SIZE = 1024
+
 
 class MemoryController:
-    def __init__(self):
-        self.session = SessionManager()
-        self.storage = MemoryStorage()
-        self.semantic = SemanticMemory()
+    def __init__(self, session: Optional[SessionManager] = None,
+                 storage: Optional[MemoryStorage] = None,
+                 semantic: Optional[SemanticMemory] = None):
+        self.session = session or SessionManager()
+        self.storage = storage or MemoryStorage()
+        self.semantic = semantic or SemanticMemory()
+        self._profile_cache: Dict[str, Tuple[float, UserProfile]] = {}
+    
+    async def _get_user_profile(self, user_id: str) -> Optional[UserProfile]:
+        """Get a user profile, served from the TTL cache when still fresh"""
+        cached = self._profile_cache.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < PROFILE_CACHE_TTL:
+            return cached[1]
+        
+        profile = await self.storage.get_user_profile(user_id)
+        if profile is None:
+            # Not cached, so a newly created profile is picked up right away
+            return None
+        
+        if len(self._profile_cache) >= PROFILE_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._profile_cache.pop(next(iter(self._profile_cache)))
+        self._profile_cache[user_id] = (time.monotonic(), profile)
+        return profile
+    
+    def invalidate_profile(self, user_id: str):
+        """Drop a cached profile after it has been updated"""
+        self._profile_cache.pop(user_id, None)
     
     async def assemble_context(self, user_id: str, user_message: str) -> Dict[str, Any]:
         """
@@ -21,37 +132,44 @@ class MemoryController:
         
         Returns:
             Dictionary containing:
-            - user_profile: User profile information
+            - user_profile: UserProfile model
             - recent_interactions: Recent conversation history
             - relevant_memories: Semantically relevant long-term memories
+            - recent_fragments: MemoryFragment models
             - context_string: Pre-formatted context for LLM
+            
+            Models are returned as-is; callers that persist or return the
+            context serialize it once at that boundary.
         """
         try:
-            # 1. Get user profile
-            user_profile = await self.storage.get_user_profile(user_id)
-            if not user_profile:
-                logger.warning(f"No profile found for user {user_id}")
-                user_profile = UserProfile(
+            # The four sources are independent, so fetch them concurrently.
+            # Session history uses the sync Redis client and runs in a thread.
+            profile_result, recent_result, relevant_result, fragments_result = await asyncio.gather(
+                self._get_user_profile(user_id),
+                asyncio.to_thread(self.session.format_recent_context, user_id),
+                self.semantic.search_memories(
                     user_id=user_id,
-                    name="Friend",
-                    age=0,
-                    conditions=[],
-                    interests=[]
-                )
-            
-            # 2. Get recent interactions from Redis
-            recent_interactions = self.session.format_recent_context(user_id)
-            
-            # 3. Search for relevant memories using semantic search
-            relevant_memories = await self.semantic.search_memories(
-                user_id=user_id,
-                query=user_message,
-                top_k=5,
-                retention="active"  # Only search active memories for context
+                    query=user_message,
+                    top_k=settings.memory_context_relevant,
+                    retention="active"  # Only search active memories for context
+                ),
+                self.storage.get_active_memories(
+                    user_id,
+                    limit=settings.memory_context_fragments,
+                    fields=CONTEXT_FRAGMENT_FIELDS
+                ),
+                return_exceptions=True
             )
             
-            # 4. Get recent memory fragments from MongoDB
-            recent_fragments = await self.storage.get_active_memories(user_id, limit=10)
+            # A failed source only drops its own section of the context
+            user_profile = self._source_result(profile_result, "user profile", None)
+            recent_interactions = self._source_result(recent_result, "recent interactions", "")
+            relevant_memories = self._source_result(relevant_result, "relevant memories", [])
+            recent_fragments = self._source_result(fragments_result, "recent fragments", [])
+            
+            if not user_profile:
+                logger.warning(f"No profile found for user {user_id}")
+                user_profile = self._default_profile(user_id)
             
             # 5. Build formatted context string
             context_string = self._format_context(
@@ -63,10 +181,10 @@ class MemoryController:
             )
             
             return {
-                "user_profile": user_profile.model_dump(),
+                "user_profile": user_profile,
                 "recent_interactions": recent_interactions,
                 "relevant_memories": relevant_memories,
-                "recent_fragments": [f.model_dump() for f in recent_fragments],
+                "recent_fragments": recent_fragments,
                 "context_string": context_string
             }
             
@@ -74,68 +192,81 @@ class MemoryController:
             logger.error(f"Failed to assemble context: {e}")
             # Return minimal context on error
             return {
-                "user_profile": {"user_id": user_id, "name": "Friend"},
+                "user_profile": self._default_profile(user_id),
                 "recent_interactions": "",
                 "relevant_memories": [],
                 "recent_fragments": [],
                 "context_string": f"User says: {user_message}"
             }
     
+    @staticmethod
+    def _default_profile(user_id: str) -> UserProfile:
+        """Placeholder profile for users without one"""
+        return UserProfile(
+            user_id=user_id,
+            name="Friend",
+            age=0,
+            conditions=[],
+            interests=[]
+        )
+    
+    @staticmethod
+    def _source_result(result: Any, source: str, default: Any) -> Any:
+        """Return a gathered result, or the default if that source failed"""
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to load {source} for context: {result}")
+            return default
+        return result
+    
     def _format_context(self, user_profile: UserProfile, recent_interactions: str,
                        relevant_memories: List[Dict], recent_fragments: List[MemoryFragment],
                        user_message: str) -> str:
         """Format all context into a string for the LLM"""
         
         # User profile section
-        profile_text = f"""User Profile:
-Name: {user_profile.name}
-Age: {user_profile.age}
-Health Conditions: {', '.join(user_profile.conditions) if user_profile.conditions else 'None recorded'}
-Interests: {', '.join(user_profile.interests) if user_profile.interests else 'None recorded'}"""
+        profile_text = PROFILE_TEMPLATE.format(
+            name=user_profile.name,
+            age=user_profile.age,
+            conditions=', '.join(user_profile.conditions) if user_profile.conditions else 'None recorded',
+            interests=', '.join(user_profile.interests) if user_profile.interests else 'None recorded'
+        )
         
         # Recent interactions section
-        interactions_text = f"""Recent Conversation History:
-{recent_interactions if recent_interactions else 'This is our first conversation today.'}"""
+        interactions_text = "Recent Conversation History:\n" + (
+            recent_interactions if recent_interactions else 'This is our first conversation today.'
+        )
         
         # Relevant memories section
-        memories_text = "Relevant Long-term Memories:"
+        memory_lines = ["Relevant Long-term Memories:"]
         if relevant_memories:
-            for memory in relevant_memories[:3]:  # Top 3 most relevant
-                memories_text += f"\n- {memory['content']} (Relevance: {memory['score']:.2f})"
+            memory_lines.extend(  # Most relevant first
+                f"- {memory['content']} (Relevance: {memory['score']:.2f})"
+                for memory in relevant_memories[:settings.memory_context_relevant]
+            )
         else:
-            memories_text += "\nNo specific relevant memories found."
+            memory_lines.append("No specific relevant memories found.")
+        memories_text = "\n".join(memory_lines)
         
         # Recent events section (from MongoDB fragments)
-        events_text = "Recent Events and Context:"
+        event_lines = ["Recent Events and Context:"]
         if recent_fragments:
-            for fragment in recent_fragments[:5]:
-                timestamp = fragment.timestamp.strftime("%Y-%m-%d %H:%M")
-                events_text += f"\n- [{timestamp}] {fragment.content}"
+            # "YYYY-MM-DD HH:MM" straight from isoformat, without strftime parsing
+            event_lines.extend(
+                f"- [{fragment.timestamp.isoformat(' ', 'minutes')[:16]}] {fragment.content}"
+                for fragment in recent_fragments[:settings.memory_context_fragments]
+            )
         else:
-            events_text += "\nNo recent events recorded."
+            event_lines.append("No recent events recorded.")
+        events_text = "\n".join(event_lines)
         
         # Combine all sections
-        full_context = f"""You are a caring AI companion supporting an elderly user. You have persistent memory and should respond as if you genuinely remember past conversations and care about their wellbeing.
-
-{profile_text}
-
-{interactions_text}
-
-{memories_text}
-
-{events_text}
-
-Current Message: "{user_message}"
-
-Instructions:
-- Respond naturally and empathetically
-- Reference relevant past information when appropriate
-- Show that you remember and care about their situation
-- Be supportive and encouraging
-- If health concerns are mentioned, gently suggest consulting healthcare providers
-- Keep responses conversational and warm"""
-        
-        return full_context
+        return PROMPT_TEMPLATE.format_map({
+            "profile": profile_text,
+            "interactions": interactions_text,
+            "memories": memories_text,
+            "events": events_text,
+            "user_message": user_message
+        })
     
     async def store_interaction(self, user_id: str, user_message: str, ai_response: str,
                               context_used: Dict[str, Any], response_time_ms: int):
@@ -145,87 +276,85 @@ Instructions:
             self.session.add_interaction(user_id, user_message, ai_response)
             
             # 2. Create memory fragment for significant interactions
-            if self._is_significant_interaction(user_message, ai_response):
-                fragment = MemoryFragment(
+            keywords = _match_keywords(self._combined_text(user_message, ai_response))
+            if self._is_significant_interaction(user_message, ai_response, keywords):
+                # Built from typed internal values on the hot write path, so
+                # Pydantic validation is skipped
+                fragment = MemoryFragment.model_construct(
                     user_id=user_id,
                     timestamp=datetime.utcnow(),
                     type=self._classify_interaction_type(user_message),
                     content=f"User: {user_message}\nAI: {ai_response}",
-                    tags=self._extract_tags(user_message, ai_response),
-                    retention="active"
+                    tags=self._extract_tags(user_message, ai_response, keywords),
+                    retention="active",
+                    # Pre-generated so the Mongo document links to its vector
+                    embedding_id=str(uuid.uuid4())
                 )
                 
-                # Store in MongoDB
-                fragment_id = await self.storage.store_memory_fragment(fragment)
-                
-                # Store in Pinecone with metadata
-                vector_id = await self.semantic.store_memory_vector(
-                    user_id=user_id,
-                    content=fragment.content,
-                    metadata={
-                        "type": fragment.type,
-                        "tags": fragment.tags,
-                        "retention": fragment.retention,
-                        "fragment_id": fragment_id
-                    }
+                # With both IDs generated up front, the MongoDB insert and the
+                # Pinecone write are independent and run concurrently
+                fragment_id = str(ObjectId())
+                await asyncio.gather(
+                    self.storage.store_memory_fragment(fragment, fragment_id=fragment_id),
+                    self.semantic.store_memory_vector(
+                        user_id=user_id,
+                        content=fragment.content,
+                        metadata={
+                            "type": fragment.type,
+                            "tags": fragment.tags,
+                            "retention": fragment.retention,
+                            "fragment_id": fragment_id
+                        },
+                        vector_id=fragment.embedding_id
+                    )
                 )
-                
-                # Update fragment with vector ID
-                fragment.embedding_id = vector_id
             
             logger.info(f"Stored interaction for user {user_id}")
             
         except Exception as e:
             logger.error(f"Failed to store interaction: {e}")
     
-    def _is_significant_interaction(self, user_message: str, ai_response: str) -> bool:
+    @staticmethod
+    def _combined_text(user_message: str, ai_response: str) -> str:
+        """Lowercased text of both turns, shared by the interaction heuristics"""
+        return (user_message + " " + ai_response).lower()
+    
+    def _is_significant_interaction(self, user_message: str, ai_response: str,
+                                    keywords: Optional[Set[str]] = None) -> bool:
         """Determine if an interaction is significant enough to store long-term"""
         # Simple heuristics - can be made more sophisticated
-        keywords = ["medication", "pain", "feel", "doctor", "appointment", "family",
-                   "remember", "forgot", "worried", "happy", "sad", "lonely"]
-        
-        combined_text = (user_message + " " + ai_response).lower()
+        if keywords is None:
+            keywords = _match_keywords(self._combined_text(user_message, ai_response))
         
         # Check for keywords
-        has_keywords = any(keyword in combined_text for keyword in keywords)
+        if keywords & SIGNIFICANT_KEYWORDS:
+            return True
         
         # Check for length (significant conversations tend to be longer)
-        is_substantial = len(user_message.split()) > 10 or len(ai_response.split()) > 20
-        
-        return has_keywords or is_substantial
+        return len(user_message.split()) > 10 or len(ai_response.split()) > 20
     
     def _classify_interaction_type(self, user_message: str) -> str:
         """Classify the type of interaction"""
-        message_lower = user_message.lower()
+        keywords = _match_keywords(user_message.lower())
         
-        if any(word in message_lower for word in ["medication", "pill", "doctor", "pain", "hurt"]):
-            return "health"
-        elif any(word in message_lower for word in ["feel", "sad", "happy", "lonely", "worried"]):
-            return "emotion"
-        elif any(word in message_lower for word in ["remember", "forgot", "yesterday", "last week"]):
-            return "event"
-        elif any(word in message_lower for word in ["like", "enjoy", "prefer", "favorite"]):
-            return "preference"
-        else:
-            return "interaction"
+        for interaction_type, words in TYPE_KEYWORDS:
+            if keywords & words:
+                return interaction_type
+        return "interaction"
     
-    def _extract_tags(self, user_message: str, ai_response: str) -> List[str]:
+    def _extract_tags(self, user_message: str, ai_response: str,
+                      keywords: Optional[Set[str]] = None) -> List[str]:
         """Extract relevant tags from the interaction"""
-        tags = []
-        combined_text = (user_message + " " + ai_response).lower()
-        
-        # Health tags
-        health_terms = ["medication", "doctor", "pain", "appointment", "symptom"]
-        tags.extend([term for term in health_terms if term in combined_text])
+        if keywords is None:
+            keywords = _match_keywords(self._combined_text(user_message, ai_response))
         
-        # Emotion tags
-        emotion_terms = ["happy", "sad", "worried", "anxious", "lonely"]
-        tags.extend([term for term in emotion_terms if term in combined_text])
+        # Health and emotion terms are tags themselves
+        tags = set(keywords & TAG_TERMS)
         
         # Time tags
-        if any(word in combined_text for word in ["today", "morning", "evening"]):
-            tags.append("daily")
-        if any(word in combined_text for word in ["yesterday", "last week", "remember"]):
-            tags.append("memory")
+        if keywords & DAILY_KEYWORDS:
+            tags.add("daily")
+        if keywords & MEMORY_KEYWORDS:
+            tags.add("memory")
         
-        return list(set(tags))  # Remove duplicates
\ No newline at end of file
+        return list(tags)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from src.memory.session import SessionManager
+from src.memory.storage import MemoryStorage
+from src.memory.semantic import SemanticMemory
+from src.memory.controller import MemoryController
+
+# Process-wide memory components shared by the API routes, the controller and
+# the scheduler, so each worker builds one of each over the shared Redis,
+# MongoDB and Pinecone clients. The clients are closed by the app lifespan.
+session_manager = SessionManager()
+memory_storage = MemoryStorage()
+semantic_memory = SemanticMemory()
+memory_controller = MemoryController(
+    session=session_manager,
+    storage=memory_storage,
+    semantic=semantic_memory
+)
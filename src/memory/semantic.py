@@ -1,5 +1,6 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+import asyncio
 import uuid
 from src.utils.database import pinecone_manager
 from src.utils.embeddings import embedding_service
@@ -14,18 +15,31 @@ class SemanticMemory:
         self.index = pinecone_manager.get_index()
         self.embeddings = embedding_service
         
+        # New memories are queued, then embedded and upserted in batches by a
+        # background task
+        self.upsert_batch_size = settings.pinecone_upsert_batch_size
+        self.upsert_max_wait = settings.pinecone_upsert_max_wait_ms / 1000
+        self._pending: List[Tuple[str, str, Dict[str, Any]]] = []
+        self._batch_full = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        
     def _generate_id(self) -> str:
         """Generate unique ID for vector"""
         return str(uuid.uuid4())
     
-    async def store_memory_vector(self, user_id: str, content: str, metadata: Dict[str, Any]) -> str:
-        """Store a memory fragment as a vector"""
+    async def store_memory_vector(self, user_id: str, content: str, metadata: Dict[str, Any],
+                                  vector_id: Optional[str] = None) -> str:
+        """
+        Store a memory fragment as a vector
+        
+        The memory is queued and embedded and upserted with the next batch,
+        at most ``upsert_max_wait`` later, so its ID is returned before it is
+        searchable. Embedding and upsert failures are logged by the flusher.
+        Callers that record the ID elsewhere can pass their own vector_id.
+        """
         try:
-            # Generate embedding
-            embedding = self.embeddings.embed(content)
-            
             # Generate unique ID
-            vector_id = self._generate_id()
+            vector_id = vector_id or self._generate_id()
             
             # Prepare metadata
             vector_metadata = {
@@ -35,36 +49,86 @@ class SemanticMemory:
                 **metadata
             }
             
-            # Upsert to Pinecone
-            self.index.upsert(
-                vectors=[(vector_id, embedding, vector_metadata)]
-            )
+            # Queue for the next batched upsert to Pinecone
+            self._pending.append((vector_id, content, vector_metadata))
+            if len(self._pending) >= self.upsert_batch_size:
+                self._batch_full.set()
+            if self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.create_task(self._run_flusher())
             
-            logger.info(f"Stored semantic memory for user {user_id}")
+            logger.info(f"Queued semantic memory for user {user_id}")
             return vector_id
         except Exception as e:
             logger.error(f"Failed to store memory vector: {e}")
             raise
     
+    async def _run_flusher(self) -> None:
+        """Flush queued vectors once a batch fills or the oldest has waited long enough"""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.upsert_max_wait)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+    
+    def _embed_and_upsert(self, batch: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Embed a batch of memories in one model call and upsert them together"""
+        embeddings = self.embeddings.embed_batch(
+            [content for _, content, _ in batch],
+            batch_size=self.upsert_batch_size
+        )
+        self.index.upsert(vectors=[
+            (vector_id, embedding, metadata)
+            for (vector_id, _, metadata), embedding in zip(batch, embeddings)
+        ])
+    
+    async def flush(self) -> None:
+        """Embed and upsert every queued memory, one model and Pinecone call per batch"""
+        self._batch_full.clear()
+        while self._pending:
+            batch = self._pending[:self.upsert_batch_size]
+            del self._pending[:self.upsert_batch_size]
+            try:
+                await asyncio.to_thread(self._embed_and_upsert, batch)
+                logger.info(f"Upserted {len(batch)} semantic memories")
+            except Exception as e:
+                logger.error(f"Failed to upsert {len(batch)} memory vectors: {e}")
+    
+    async def shutdown(self) -> None:
+        """Stop the background flusher and upsert anything still queued"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+    
     async def search_memories(self, user_id: str, query: str, top_k: int = 5, 
                             retention: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for relevant memories based on semantic similarity"""
-        try:
+        # Build filter
+        filter_dict = {"user_id": {"$eq": user_id}}
+        if retention:
+            filter_dict["retention"] = {"$eq": retention}
+        
+        def _query():
             # Generate query embedding
             query_embedding = self.embeddings.embed(query)
             
-            # Build filter
-            filter_dict = {"user_id": {"$eq": user_id}}
-            if retention:
-                filter_dict["retention"] = {"$eq": retention}
-            
             # Query Pinecone
-            results = self.index.query(
+            return self.index.query(
                 vector=query_embedding,
                 top_k=top_k,
                 include_metadata=True,
                 filter=filter_dict
             )
+        
+        try:
+            # The model forward pass and the Pinecone call both block, so they
+            # run in a worker thread instead of stalling the event loop
+            results = await asyncio.to_thread(_query)
             
             # Format results
             memories = []
@@ -88,23 +152,14 @@ class SemanticMemory:
     async def update_memory_retention(self, vector_ids: List[str], retention: str):
         """Update retention status for memory vectors"""
         try:
-            # Fetch existing vectors
-            fetch_result = self.index.fetch(ids=vector_ids)
-            
-            # Update metadata
-            vectors_to_update = []
-            for vector_id, vector_data in fetch_result.vectors.items():
-                if vector_data:
-                    metadata = vector_data.metadata
-                    metadata["retention"] = retention
-                    vectors_to_update.append(
-                        (vector_id, vector_data.values, metadata)
-                    )
-            
-            # Upsert updated vectors
-            if vectors_to_update:
-                self.index.upsert(vectors=vectors_to_update)
-                logger.info(f"Updated retention for {len(vectors_to_update)} vectors")
+            # Metadata-only updates, so the vector values never leave Pinecone
+            await asyncio.gather(*(
+                asyncio.to_thread(
+                    self.index.update, id=vector_id, set_metadata={"retention": retention}
+                )
+                for vector_id in vector_ids
+            ))
+            logger.info(f"Updated retention for {len(vector_ids)} vectors")
                 
         except Exception as e:
             logger.error(f"Failed to update memory retention: {e}")
@@ -119,31 +174,25 @@ class SemanticMemory:
     
     async def get_memory_stats(self, user_id: str) -> Dict[str, Any]:
         """Get statistics about user's semantic memories"""
-        try:
-            # Query with dummy vector to get count
-            dummy_vector = [0.0] * 384
-            
-            active_results = self.index.query(
-                vector=dummy_vector,
-                top_k=1,
+        def _count(retention: str) -> int:
+            # Index stats report the matching vector count without an ANN query
+            stats = self.index.describe_index_stats(
                 filter={
                     "user_id": {"$eq": user_id},
-                    "retention": {"$eq": "active"}
+                    "retention": {"$eq": retention}
                 }
             )
-            
-            archive_results = self.index.query(
-                vector=dummy_vector,
-                top_k=1,
-                filter={
-                    "user_id": {"$eq": user_id},
-                    "retention": {"$eq": "archive"}
-                }
+            return stats.total_vector_count
+        
+        try:
+            active_count, archive_count = await asyncio.gather(
+                asyncio.to_thread(_count, "active"),
+                asyncio.to_thread(_count, "archive")
             )
             
             return {
-                "active_vectors": len(active_results.matches),
-                "archive_vectors": len(archive_results.matches)
+                "active_vectors": active_count,
+                "archive_vectors": archive_count
             }
         except Exception as e:
             logger.error(f"Failed to get memory stats: {e}")
@@ -1,17 +1,43 @@
 from typing import List, Optional
-import json
 from datetime import datetime
+import orjson
 from src.utils.database import redis_manager
 from src.config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Session timestamps are naive UTC; orjson writes them as ISO 8601 with a Z
+SESSION_JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+# Formats the last ARGV[1] interactions server-side so only the finished
+# context string crosses the wire. Rows that fail to decode are skipped and
+# missing fields render empty, matching get_recent_interactions.
+FORMAT_RECENT_CONTEXT_LUA = """
+local rows = redis.call('LRANGE', KEYS[1], -tonumber(ARGV[1]), -1)
+local out = {}
+for _, row in ipairs(rows) do
+    local ok, t = pcall(cjson.decode, row)
+    if ok and type(t) == 'table' then
+        local function field(name)
+            local value = t[name]
+            if value == nil or value == cjson.null then
+                return ''
+            end
+            return tostring(value)
+        end
+        table.insert(out, '[' .. field('timestamp') .. ']\nUser: ' .. field('user') .. '\nAI: ' .. field('ai') .. '\n')
+    end
+end
+return table.concat(out, '\n')
+"""
+
 
 class SessionManager:
     def __init__(self):
         self.redis = redis_manager.get_client()
         self.session_ttl = 86400  # 24 hours in seconds
+        self._format_script = self.redis.register_script(FORMAT_RECENT_CONTEXT_LUA)
         
     def _get_session_key(self, user_id: str) -> str:
         return f"session:{user_id}:history"
@@ -21,19 +47,18 @@ class SessionManager:
         try:
             key = self._get_session_key(user_id)
             interaction = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.utcnow(),
                 "user": user_message,
                 "ai": ai_response
             }
             
-            # Add to list
-            self.redis.rpush(key, json.dumps(interaction))
-            
-            # Trim to keep only last N interactions
-            self.redis.ltrim(key, -settings.memory_context_limit, -1)
-            
-            # Reset TTL
-            self.redis.expire(key, self.session_ttl)
+            # Append, trim to the last N interactions and reset the TTL in a
+            # single round trip
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, orjson.dumps(interaction, option=SESSION_JSON_OPTIONS))
+                pipe.ltrim(key, -settings.memory_context_limit, -1)
+                pipe.expire(key, self.session_ttl)
+                pipe.execute()
             
             logger.info(f"Added interaction for user {user_id}")
         except Exception as e:
@@ -52,8 +77,8 @@ class SessionManager:
             interactions = []
             for raw in raw_interactions:
                 try:
-                    interactions.append(json.loads(raw))
-                except json.JSONDecodeError:
+                    interactions.append(orjson.loads(raw))
+                except orjson.JSONDecodeError:
                     logger.warning(f"Failed to decode interaction: {raw}")
                     
             return interactions
@@ -73,20 +98,13 @@ class SessionManager:
     
     def format_recent_context(self, user_id: str) -> str:
         """Format recent interactions as context string"""
-        interactions = self.get_recent_interactions(user_id)
-        
-        if not interactions:
-            return "No recent interactions."
-        
-        context_lines = []
-        for interaction in interactions:
-            timestamp = interaction.get("timestamp", "")
-            user_msg = interaction.get("user", "")
-            ai_msg = interaction.get("ai", "")
-            
-            context_lines.append(f"[{timestamp}]")
-            context_lines.append(f"User: {user_msg}")
-            context_lines.append(f"AI: {ai_msg}")
-            context_lines.append("")
+        try:
+            context = self._format_script(
+                keys=[self._get_session_key(user_id)],
+                args=[settings.memory_context_limit]
+            )
+        except Exception as e:
+            logger.error(f"Failed to format recent context: {e}")
+            context = None
         
-        return "\n".join(context_lines)
\ No newline at end of file
+        return context or "No recent interactions."
\ No newline at end of file
@@ -1,5 +1,7 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from bson import ObjectId
+import asyncio
 from src.utils.database import mongodb_manager
 from src.models.memory import UserProfile, MemoryFragment, InteractionLog
 from src.config.settings import settings
@@ -7,10 +9,34 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Compound indexes matching the query shapes below, as
+# (collection, keys, options)
+INDEXES = [
+    # get_active_memories: filter user + retention, newest first
+    ("memory_fragments", [("user_id", 1), ("retention", 1), ("timestamp", -1)], {}),
+    # search_memories_by_tags / get_distinct_tags
+    ("memory_fragments", [("user_id", 1), ("tags", 1)], {}),
+    # archive_old_memories: retention + timestamp cutoff across users
+    ("memory_fragments", [("retention", 1), ("timestamp", 1)], {}),
+    ("user_profiles", [("user_id", 1)], {"unique": True}),
+    ("interaction_logs", [("user_id", 1), ("timestamp", -1)], {}),
+]
+
 
 class MemoryStorage:
     def __init__(self):
         self.db = mongodb_manager
+    
+    async def ensure_indexes(self):
+        """Create the query indexes if missing; failures are logged, not raised"""
+        async def _create(name: str, keys: List, options: Dict[str, Any]):
+            try:
+                await self.db.get_collection(name).create_index(keys, **options)
+            except Exception as e:
+                logger.error(f"Failed to create index {keys} on {name}: {e}")
+        
+        await asyncio.gather(*(_create(name, keys, options) for name, keys, options in INDEXES))
+        logger.info("MongoDB indexes ensured")
         
     async def create_user_profile(self, user_profile: UserProfile) -> str:
         """Create a new user profile"""
@@ -50,30 +76,48 @@ class MemoryStorage:
             logger.error(f"Failed to update user profile: {e}")
             return False
     
-    async def store_memory_fragment(self, fragment: MemoryFragment) -> str:
-        """Store a new memory fragment"""
+    async def store_memory_fragment(self, fragment: MemoryFragment,
+                                    fragment_id: Optional[str] = None) -> str:
+        """Store a new memory fragment, optionally under a pre-generated id"""
         try:
             collection = self.db.get_collection("memory_fragments")
-            result = await collection.insert_one(fragment.model_dump())
+            doc = fragment.model_dump()
+            if fragment_id:
+                doc["_id"] = ObjectId(fragment_id)
+            result = await collection.insert_one(doc)
             logger.info(f"Stored memory fragment for user {fragment.user_id}")
             return str(result.inserted_id)
         except Exception as e:
             logger.error(f"Failed to store memory fragment: {e}")
             raise
     
-    async def get_active_memories(self, user_id: str, limit: int = 50) -> List[MemoryFragment]:
-        """Get active memory fragments for a user"""
+    @staticmethod
+    def _fragment(doc: Dict[str, Any]) -> MemoryFragment:
+        """Build a fragment from a document, dropping the Mongo _id"""
+        doc.pop("_id", None)
+        # Documents were validated when the fragment was stored, so skip
+        # re-validation; missing (unprojected) fields still get defaults
+        return MemoryFragment.model_construct(**doc)
+    
+    async def get_active_memories(self, user_id: str, limit: int = 50,
+                                  fields: Optional[List[str]] = None) -> List[MemoryFragment]:
+        """
+        Get active memory fragments for a user
+        
+        fields limits which document fields are fetched; omitted fields take
+        their model defaults.
+        """
         try:
             collection = self.db.get_collection("memory_fragments")
-            cursor = collection.find(
-                {"user_id": user_id, "retention": "active"}
-            ).sort("timestamp", -1).limit(limit)
-            
-            memories = []
-            async for doc in cursor:
-                doc.pop("_id", None)
-                memories.append(MemoryFragment(**doc))
-            return memories
+            query = {"user_id": user_id, "retention": "active"}
+            if fields:
+                cursor = collection.find(query, {"_id": 0, **{field: 1 for field in fields}})
+            else:
+                cursor = collection.find(query)
+            # to_list drains the cursor in as few batches as possible instead of
+            # yielding documents one by one
+            docs = await cursor.sort("timestamp", -1).limit(limit).to_list(length=limit)
+            return [self._fragment(doc) for doc in docs]
         except Exception as e:
             logger.error(f"Failed to get active memories: {e}")
             return []
@@ -86,13 +130,8 @@ class MemoryStorage:
             if retention:
                 query["retention"] = retention
                 
-            cursor = collection.find(query).sort("timestamp", -1)
-            
-            memories = []
-            async for doc in cursor:
-                doc.pop("_id", None)
-                memories.append(MemoryFragment(**doc))
-            return memories
+            docs = await collection.find(query).sort("timestamp", -1).to_list(length=None)
+            return [self._fragment(doc) for doc in docs]
         except Exception as e:
             logger.error(f"Failed to search memories by tags: {e}")
             return []
@@ -127,35 +166,48 @@ class MemoryStorage:
             logger.error(f"Failed to log interaction: {e}")
             raise
     
+    async def get_distinct_tags(self, user_id: str) -> List[str]:
+        """Get the unique tags across a user's active memories"""
+        try:
+            collection = self.db.get_collection("memory_fragments")
+            tags = await collection.distinct("tags", {"user_id": user_id, "retention": "active"})
+            return sorted(tags)
+        except Exception as e:
+            logger.error(f"Failed to get memory tags: {e}")
+            return []
+    
     async def get_user_statistics(self, user_id: str) -> Dict[str, Any]:
         """Get usage statistics for a user"""
         try:
-            # Count memories
             memories_collection = self.db.get_collection("memory_fragments")
-            active_count = await memories_collection.count_documents(
-                {"user_id": user_id, "retention": "active"}
-            )
-            archive_count = await memories_collection.count_documents(
-                {"user_id": user_id, "retention": "archive"}
-            )
-            
-            # Count interactions
             logs_collection = self.db.get_collection("interaction_logs")
-            interaction_count = await logs_collection.count_documents(
-                {"user_id": user_id}
-            )
             
-            # Get last interaction
-            last_interaction = await logs_collection.find_one(
-                {"user_id": user_id},
-                sort=[("timestamp", -1)]
+            # One aggregate per collection, issued concurrently: memory counts
+            # grouped by retention, and the interaction count with the latest
+            # timestamp
+            memory_groups, interaction_groups = await asyncio.gather(
+                memories_collection.aggregate([
+                    {"$match": {"user_id": user_id}},
+                    {"$group": {"_id": "$retention", "count": {"$sum": 1}}}
+                ]).to_list(length=None),
+                logs_collection.aggregate([
+                    {"$match": {"user_id": user_id}},
+                    {"$group": {
+                        "_id": None,
+                        "count": {"$sum": 1},
+                        "last_interaction": {"$max": "$timestamp"}
+                    }}
+                ]).to_list(length=None)
             )
             
+            memory_counts = {group["_id"]: group["count"] for group in memory_groups}
+            interactions = interaction_groups[0] if interaction_groups else {}
+            
             return {
-                "active_memories": active_count,
-                "archived_memories": archive_count,
-                "total_interactions": interaction_count,
-                "last_interaction": last_interaction["timestamp"] if last_interaction else None
+                "active_memories": memory_counts.get("active", 0),
+                "archived_memories": memory_counts.get("archive", 0),
+                "total_interactions": interactions.get("count", 0),
+                "last_interaction": interactions.get("last_interaction")
             }
         except Exception as e:
             logger.error(f"Failed to get user statistics: {e}")
@@ -1,7 +1,29 @@
 from datetime import datetime
 from typing import List, Optional, Dict, Literal
+import itertools
+import os
+import time
 from pydantic import BaseModel, Field
-from bson import ObjectId
+
+
+# Default ids use the ObjectId layout (timestamp, per-process random value,
+# counter) as hex, built directly instead of through bson.ObjectId
+_oid_process = os.urandom(5).hex()
+_oid_counter = itertools.count(int.from_bytes(os.urandom(3), "big"))
+
+
+def _reset_oid_process() -> None:
+    global _oid_process
+    _oid_process = os.urandom(5).hex()
+
+
+# Forked workers must not share the parent's process value
+os.register_at_fork(after_in_child=_reset_oid_process)
+
+
+def new_object_id() -> str:
+    """Return a fresh id string in bson ObjectId format"""
+    return f"{int(time.time()):08x}{_oid_process}{next(_oid_counter) & 0xFFFFFF:06x}"
 
 
 class DrugInteraction(BaseModel):
@@ -19,7 +41,7 @@ class FoodInteraction(BaseModel):
 
 
 class Medication(BaseModel):
-    medication_id: str = Field(default_factory=lambda: str(ObjectId()))
+    medication_id: str = Field(default_factory=new_object_id)
     name: str
     generic_name: str
     brand_names: List[str] = Field(default_factory=list)
@@ -31,12 +53,6 @@ class Medication(BaseModel):
     manufacturer: Optional[str] = None
     ndc_code: Optional[str] = None  # National Drug Code
     rxcui: Optional[str] = None  # RxNorm Concept Unique Identifier
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class MedicationDetails(Medication):
@@ -59,24 +75,18 @@ class MedicationDetails(Medication):
 
 class MedicationImage(BaseModel):
     user_id: str
-    image_id: str = Field(default_factory=lambda: str(ObjectId()))
-    image_data: str  # base64 encoded
+    image_id: str = Field(default_factory=new_object_id)
+    image_data: bytes  # raw image; stored by Mongo as BSON Binary
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    image_metadata: Dict[str, any] = Field(default_factory=dict)
+    image_metadata: dict = Field(default_factory=dict)
     identified_medications: List[Medication] = Field(default_factory=list)
     confidence_scores: Dict[str, float] = Field(default_factory=dict)
     processing_status: Literal["pending", "processing", "completed", "failed"] = "pending"
     error_message: Optional[str] = None
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class UserMedication(BaseModel):
-    user_medication_id: str = Field(default_factory=lambda: str(ObjectId()))
+    user_medication_id: str = Field(default_factory=new_object_id)
     user_id: str
     medication: Medication
     dosage: str
@@ -91,16 +101,10 @@ class UserMedication(BaseModel):
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class MedicationReminder(BaseModel):
-    reminder_id: str = Field(default_factory=lambda: str(ObjectId()))
+    reminder_id: str = Field(default_factory=new_object_id)
     user_id: str
     user_medication_id: str
     medication_name: str
@@ -110,12 +114,6 @@ class MedicationReminder(BaseModel):
     status: Literal["pending", "taken", "missed", "skipped"] = "pending"
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class MedicationAdherence(BaseModel):
@@ -128,11 +126,6 @@ class MedicationAdherence(BaseModel):
     missed_doses: int
     skipped_doses: int
     adherence_percentage: float
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class InteractionCheck(BaseModel):
@@ -148,9 +141,4 @@ class InteractionCheckResult(BaseModel):
     drug_interactions: List[DrugInteraction] = Field(default_factory=list)
     food_interactions: List[FoodInteraction] = Field(default_factory=list)
     has_critical_interactions: bool = False
-    recommendations: List[str] = Field(default_factory=list)
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+    recommendations: List[str] = Field(default_factory=list)
\ No newline at end of file
@@ -1,7 +1,6 @@
 from datetime import datetime
 from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
-from bson import ObjectId
 
 
 class UserProfile(BaseModel):
@@ -12,12 +11,6 @@ class UserProfile(BaseModel):
     interests: List[str] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class MemoryFragment(BaseModel):
@@ -29,12 +22,6 @@ class MemoryFragment(BaseModel):
     embedding_id: Optional[str] = None
     retention: Literal["active", "archive"] = "active"
     metadata: dict = Field(default_factory=dict)
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class InteractionLog(BaseModel):
@@ -44,10 +31,4 @@ class InteractionLog(BaseModel):
     user_message: str
     ai_response: str
     context_used: Optional[dict] = None
-    response_time_ms: Optional[int] = None
-    
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+    response_time_ms: Optional[int] = None
\ No newline at end of file
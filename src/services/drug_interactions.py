@@ -1,5 +1,8 @@
 import logging
-from typing import List, Dict, Set, Optional
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, List, Dict, Set, Optional, Tuple, Type, TypeVar
 from datetime import datetime
 
 from src.models.medication import (
@@ -10,6 +13,79 @@ from src.services.medication_db import medication_db_service
 
 logger = logging.getLogger(__name__)
 
+ModelT = TypeVar("ModelT")
+
+
+def _has_validators(model: type) -> bool:
+    decorators = model.__pydantic_decorators__
+    return bool(
+        decorators.validators or decorators.field_validators
+        or decorators.root_validators or decorators.model_validators
+    )
+
+
+# Interaction results are assembled from the service's own tables, so they
+# skip validation, unless a model gains validators that must run
+_TRUSTED_RESULT_MODELS = {
+    model: not _has_validators(model)
+    for model in (DrugInteraction, FoodInteraction, InteractionCheckResult)
+}
+
+
+def _build(model: Type[ModelT], **fields: Any) -> ModelT:
+    """Construct a result model, validating only when the model requires it"""
+    if _TRUSTED_RESULT_MODELS[model]:
+        return model.model_construct(**fields)
+    return model.model_validate(fields)
+
+
+# Drug class keywords are found with one Aho-Corasick pass per medication
+# name; a lookahead regex alternation is the fallback when pyahocorasick
+# isn't installed
+try:
+    import ahocorasick
+    
+    def _keyword_matcher(keywords: Iterable[str]) -> Callable[[str], Set[str]]:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda text: {keyword for _, keyword in automaton.iter(text)}
+except ImportError:
+    def _keyword_matcher(keywords: Iterable[str]) -> Callable[[str], Set[str]]:
+        # The lookahead reports a match at every position, so keywords that
+        # overlap in the text are all found
+        pattern = re.compile(
+            "(?=(" + "|".join(map(re.escape, sorted(keywords, key=len, reverse=True))) + "))"
+        )
+        return lambda text: set(pattern.findall(text))
+
+
+# Recommendation messages, in the order they are reported
+SEVERITY_RECOMMENDATIONS = (
+    ("contraindicated",
+     "⚠️ CRITICAL: Contraindicated drug combination detected. "
+     "Contact your healthcare provider immediately."),
+    ("major",
+     "⚠️ Major drug interactions detected. "
+     "Discuss with your healthcare provider before taking these medications together."),
+    ("moderate",
+     "⚡ Moderate interactions detected. "
+     "Your healthcare provider should monitor you closely."),
+)
+GENERAL_RECOMMENDATIONS = (
+    "📋 Keep a list of all your medications to show healthcare providers",
+    "💊 Take medications exactly as prescribed",
+    "📞 Report any unusual symptoms to your healthcare provider"
+)
+NO_INTERACTIONS_RECOMMENDATION = "✅ No significant interactions detected with current medications"
+
+
+# Interaction data is near-static, so database lookups are kept in a bounded
+# per-worker LRU whose entries expire after a TTL
+LOOKUP_CACHE_SIZE = 1024
+LOOKUP_CACHE_TTL = 600
+
 
 class DrugInteractionService:
     """
@@ -18,6 +94,8 @@ class DrugInteractionService:
     """
     
     def __init__(self):
+        self._lookup_cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        
         # Critical food interactions that apply to multiple medications
         self.critical_food_interactions = {
             "grapefruit": {
@@ -55,6 +133,31 @@ class DrugInteractionService:
             {"drugs": ["warfarin", "NSAIDs"], "reason": "Increased bleeding risk"},
             {"drugs": ["ACE inhibitors", "potassium supplements"], "reason": "Hyperkalemia risk"}
         ]
+        
+        # Medications requiring special caution in elderly
+        self.elder_caution_meds = {
+            "benzodiazepines": "Increased fall risk and confusion",
+            "anticholinergics": "Risk of confusion, constipation, and urinary retention",
+            "NSAIDs": "Increased risk of GI bleeding and kidney problems",
+            "muscle relaxants": "Increased sedation and fall risk",
+            "antipsychotics": "Increased risk of stroke in dementia patients"
+        }
+        
+        # Every drug class goes into one matcher run over lowercased
+        # medication names; the checks below compare the classes it finds
+        self._combo_classes = [
+            (combo, {drug.lower() for drug in combo["drugs"]})
+            for combo in self.contraindicated_combinations
+        ]
+        self._food_classes = {
+            food: {drug.lower() for drug in info["affected_drugs"]}
+            for food, info in self.critical_food_interactions.items()
+        }
+        self._match_classes = _keyword_matcher(
+            {drug for _, drugs in self._combo_classes for drug in drugs}
+            | {drug for drugs in self._food_classes.values() for drug in drugs}
+            | {med_class.lower() for med_class in self.elder_caution_meds}
+        )
     
     async def check_all_interactions(
         self, 
@@ -71,56 +174,60 @@ class DrugInteractionService:
         Returns:
             Complete interaction check results
         """
-        result = InteractionCheckResult(
-            user_id=user_medications[0].user_id if user_medications else "unknown"
-        )
-        
         # Get all medication names
         medication_names = [med.medication.name for med in user_medications]
         if new_medication:
             medication_names.append(new_medication)
+        # Drug classes found in each distinct lowercased name
+        med_classes = {
+            med_lower: self._match_classes(med_lower)
+            for med_lower in (name.lower() for name in medication_names)
+        }
         
         # Check drug-drug interactions
-        drug_interactions = await self._check_drug_interactions(medication_names)
-        result.drug_interactions = drug_interactions
+        drug_interactions = await self._check_drug_interactions(med_classes)
         
         # Check food interactions
-        food_interactions = await self._check_food_interactions(medication_names)
-        result.food_interactions = food_interactions
-        
-        # Check for critical interactions
-        result.has_critical_interactions = any(
-            interaction.severity in ["major", "contraindicated"]
-            for interaction in drug_interactions
-        )
+        food_interactions = await self._check_food_interactions(med_classes)
         
-        # Generate recommendations
-        result.recommendations = self._generate_recommendations(
-            drug_interactions, food_interactions
+        return _build(
+            InteractionCheckResult,
+            user_id=user_medications[0].user_id if user_medications else "unknown",
+            drug_interactions=drug_interactions,
+            food_interactions=food_interactions,
+            # Check for critical interactions
+            has_critical_interactions=any(
+                interaction.severity in ["major", "contraindicated"]
+                for interaction in drug_interactions
+            ),
+            # Generate recommendations
+            recommendations=self._generate_recommendations(
+                drug_interactions, food_interactions
+            )
         )
-        
-        return result
     
-    async def _check_drug_interactions(
-        self, 
-        medication_names: List[str]
-    ) -> List[DrugInteraction]:
+    async def _check_drug_interactions(self, med_classes: Dict[str, Set[str]]) -> List[DrugInteraction]:
         """Check for drug-drug interactions"""
         interactions = []
         
-        # Use medication database service
-        db_interactions = await medication_db_service.check_interactions(medication_names)
+        # Use medication database service; the lookup is case-insensitive, so
+        # one cached result serves every ordering and casing of the same set
+        unique_names = sorted(med_classes)
+        db_interactions = await self._cached_lookup(
+            ("drug", *unique_names),
+            lambda: medication_db_service.check_interactions(unique_names)
+        )
         
         for interaction_list in db_interactions.values():
             interactions.extend(interaction_list)
         
         # Check contraindicated combinations
-        med_names_lower = [name.lower() for name in medication_names]
-        
-        for combo in self.contraindicated_combinations:
+        found = set().union(*med_classes.values())
+        for combo, combo_classes in self._combo_classes:
             combo_drugs = combo["drugs"]
-            if self._check_drug_class_match(med_names_lower, combo_drugs):
-                interactions.append(DrugInteraction(
+            if combo_classes <= found:
+                interactions.append(_build(
+                    DrugInteraction,
                     drug_name=" + ".join(combo_drugs),
                     severity="contraindicated",
                     description=combo["reason"],
@@ -129,52 +236,53 @@ class DrugInteractionService:
         
         return interactions
     
-    async def _check_food_interactions(
-        self, 
-        medication_names: List[str]
-    ) -> List[FoodInteraction]:
+    async def _check_food_interactions(self, med_classes: Dict[str, Set[str]]) -> List[FoodInteraction]:
         """Check for drug-food interactions"""
         interactions = []
         checked_foods = set()
         
-        for medication in medication_names:
+        # Names are already de-duplicated case-insensitively, so "Aspirin"
+        # and "aspirin" are looked up once
+        for med_lower, classes in med_classes.items():
             # Get specific food interactions from database
-            med_food_interactions = await medication_db_service.get_food_interactions(medication)
+            med_food_interactions = await self._cached_lookup(
+                ("food", med_lower),
+                lambda: medication_db_service.get_food_interactions(med_lower)
+            )
             interactions.extend(med_food_interactions)
             
             # Check critical food interactions
-            med_lower = medication.lower()
-            for food, info in self.critical_food_interactions.items():
+            for food, food_classes in self._food_classes.items():
                 if food in checked_foods:
                     continue
-                    
-                for affected_drug in info["affected_drugs"]:
-                    if affected_drug.lower() in med_lower:
-                        interactions.append(FoodInteraction(
-                            food_item=food.title(),
-                            severity=info["severity"],
-                            description=info["description"],
-                            timing_instructions=self._get_food_timing_instructions(food)
-                        ))
-                        checked_foods.add(food)
-                        break
+                
+                if not classes.isdisjoint(food_classes):
+                    info = self.critical_food_interactions[food]
+                    interactions.append(_build(
+                        FoodInteraction,
+                        food_item=food.title(),
+                        severity=info["severity"],
+                        description=info["description"],
+                        timing_instructions=self._get_food_timing_instructions(food)
+                    ))
+                    checked_foods.add(food)
         
         return interactions
     
-    def _check_drug_class_match(
-        self, 
-        medication_names: List[str], 
-        drug_classes: List[str]
-    ) -> bool:
-        """Check if medications match specified drug classes"""
-        matches = 0
-        for drug_class in drug_classes:
-            for med_name in medication_names:
-                if drug_class.lower() in med_name:
-                    matches += 1
-                    break
+    async def _cached_lookup(self, key: Tuple, fetch: Callable[[], Awaitable[ModelT]]) -> ModelT:
+        """Return a fresh cached lookup result, or fetch and cache it"""
+        now = time.monotonic()
+        entry = self._lookup_cache.get(key)
+        if entry is not None and now - entry[0] < LOOKUP_CACHE_TTL:
+            self._lookup_cache.move_to_end(key)
+            return entry[1]
         
-        return matches >= len(drug_classes)
+        result = await fetch()
+        self._lookup_cache[key] = (now, result)
+        self._lookup_cache.move_to_end(key)
+        if len(self._lookup_cache) > LOOKUP_CACHE_SIZE:
+            self._lookup_cache.popitem(last=False)
+        return result
     
     def _get_food_timing_instructions(self, food: str) -> str:
         """Get timing instructions for food interactions"""
@@ -194,48 +302,23 @@ class DrugInteractionService:
         food_interactions: List[FoodInteraction]
     ) -> List[str]:
         """Generate safety recommendations based on interactions"""
-        recommendations = []
-        
-        # Check severity levels
-        severities = [i.severity for i in drug_interactions]
-        
-        if "contraindicated" in severities:
-            recommendations.append(
-                "⚠️ CRITICAL: Contraindicated drug combination detected. "
-                "Contact your healthcare provider immediately."
-            )
-        
-        if "major" in severities:
-            recommendations.append(
-                "⚠️ Major drug interactions detected. "
-                "Discuss with your healthcare provider before taking these medications together."
-            )
-        
-        if "moderate" in severities:
-            recommendations.append(
-                "⚡ Moderate interactions detected. "
-                "Your healthcare provider should monitor you closely."
-            )
+        # Check severity levels, most severe first
+        severities = {i.severity for i in drug_interactions}
+        recommendations = [
+            message for severity, message in SEVERITY_RECOMMENDATIONS
+            if severity in severities
+        ]
         
         # Food interaction recommendations
-        major_food = [f for f in food_interactions if f.severity == "major"]
-        if major_food:
-            foods = ", ".join([f.food_item for f in major_food])
-            recommendations.append(
-                f"🍊 Avoid these foods: {foods}"
-            )
+        major_foods = [f.food_item for f in food_interactions if f.severity == "major"]
+        if major_foods:
+            recommendations.append(f"🍊 Avoid these foods: {', '.join(major_foods)}")
         
         # General recommendations
         if drug_interactions or food_interactions:
-            recommendations.extend([
-                "📋 Keep a list of all your medications to show healthcare providers",
-                "💊 Take medications exactly as prescribed",
-                "📞 Report any unusual symptoms to your healthcare provider"
-            ])
+            recommendations.extend(GENERAL_RECOMMENDATIONS)
         else:
-            recommendations.append(
-                "✅ No significant interactions detected with current medications"
-            )
+            recommendations.append(NO_INTERACTIONS_RECOMMENDATION)
         
         return recommendations
     
@@ -256,22 +339,12 @@ class DrugInteractionService:
         """
         concerns = []
         
-        # Medications requiring special caution in elderly
-        elder_caution_meds = {
-            "benzodiazepines": "Increased fall risk and confusion",
-            "anticholinergics": "Risk of confusion, constipation, and urinary retention",
-            "NSAIDs": "Increased risk of GI bleeding and kidney problems",
-            "muscle relaxants": "Increased sedation and fall risk",
-            "antipsychotics": "Increased risk of stroke in dementia patients"
-        }
-        
-        meds_lower = [med.lower() for med in medications]
+        found = set().union(*(self._match_classes(med.lower()) for med in medications))
         
-        for med_class, warning in elder_caution_meds.items():
-            for med in meds_lower:
-                if med_class.lower() in med:
-                    concerns.append(f"⚠️ {med_class.title()}: {warning}")
-                    break
+        for med_class in self.elder_caution_meds:
+            if med_class.lower() in found:
+                warning = self.elder_caution_meds[med_class]
+                concerns.append(f"⚠️ {med_class.title()}: {warning}")
         
         # Polypharmacy warning
         if len(medications) >= 5:
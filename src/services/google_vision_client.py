@@ -1,7 +1,8 @@
+import asyncio
 import logging
-import base64
 import io
-from typing import Dict, List, Optional, Tuple
+import re
+from typing import Any, Dict, List, Optional, Tuple
 from PIL import Image
 import numpy as np
 
@@ -14,10 +15,46 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("Google Cloud Vision not available. Install with: pip install google-cloud-vision")
 
+# OCR enhancement runs as a single OpenCV pipeline when it is installed;
+# PIL's ImageEnhance is the fallback
+try:
+    import cv2
+    
+    # PIL's Sharpness(2.0) is 2 * image - SMOOTH, folded into one kernel
+    _SHARPEN_KERNEL = (
+        2 * np.array([[0, 0, 0], [0, 1, 0], [0, 0, 0]], dtype=np.float32)
+        - np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13
+    )
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 from src.config.settings import settings
+from src.utils.images import ImageData, as_image_bytes, like_input
 
 logger = logging.getLogger(__name__)
 
+# Imprint candidates contain a digit; cleaning keeps letters, digits,
+# spaces and hyphens (the same characters str.isalnum admits, minus "_")
+_IMPRINT_DIGIT = re.compile(r'\d')
+_IMPRINT_CLEAN = re.compile(r'[^\w \-]|_')
+
+# Color classification as inclusive (r_lo, r_hi, g_lo, g_hi, b_lo, b_hi)
+# ranges; the first matching row wins, so the order is the priority
+_COLOR_TABLE = (
+    ("white", (201, 255, 201, 255, 201, 255)),
+    ("black", (0, 49, 0, 49, 0, 49)),
+    ("red", (151, 255, 0, 99, 0, 99)),
+    ("blue", (0, 99, 0, 99, 151, 255)),
+    ("green", (0, 99, 151, 255, 0, 99)),
+    ("yellow", (201, 255, 151, 255, 0, 99)),
+    ("orange", (201, 255, 101, 255, 0, 99)),
+    ("purple", (151, 255, 0, 99, 151, 255)),
+    ("pink", (151, 255, 101, 255, 101, 255)),
+    ("brown", (101, 255, 51, 255, 0, 49)),
+    ("gray", (151, 255, 151, 255, 151, 255)),
+)
+
 
 class GoogleVisionClient:
     """Client for Google Vision API integration"""
@@ -42,12 +79,21 @@ class GoogleVisionClient:
             if not self.api_key:
                 logger.warning("Google Vision API key not configured")
     
-    async def extract_text(self, image_data: str) -> List[str]:
+    async def _annotate(self, image_bytes: bytes, *feature_types: int) -> Any:
+        """Run one annotate request for the given features off the event loop"""
+        request = {
+            "image": {"content": image_bytes},
+            "features": [{"type_": feature_type} for feature_type in feature_types]
+        }
+        # The Vision client is synchronous, so the round trip runs in a thread
+        return await asyncio.to_thread(self.client.annotate_image, request)
+    
+    async def extract_text(self, image_data: ImageData) -> List[str]:
         """
         Extract text from image using OCR
         
         Args:
-            image_data: Base64 encoded image
+            image_data: Raw image bytes or base64 encoded image
             
         Returns:
             List of detected text strings
@@ -56,39 +102,21 @@ class GoogleVisionClient:
             return []
         
         try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
-            image = vision.Image(content=image_bytes)
-            
-            # Perform text detection
-            response = self.client.text_detection(image=image)
-            texts = response.text_annotations
-            
-            if texts:
-                # First annotation contains all text
-                full_text = texts[0].description if texts else ""
-                
-                # Extract individual words (skip first as it's full text)
-                words = [text.description for text in texts[1:]]
-                
-                # Filter for potential imprints (alphanumeric, common patterns)
-                imprints = self._filter_pill_imprints(words)
-                
-                logger.info(f"Detected text: {imprints}")
-                return imprints
-            
-            return []
+            response = await self._annotate(
+                as_image_bytes(image_data), vision.Feature.Type.TEXT_DETECTION
+            )
+            return self._imprints_from(response)
             
         except Exception as e:
             logger.error(f"Error extracting text: {e}")
             return []
     
-    async def detect_colors(self, image_data: str) -> List[Dict[str, any]]:
+    async def detect_colors(self, image_data: ImageData) -> List[Dict[str, Any]]:
         """
         Detect dominant colors in image
         
         Args:
-            image_data: Base64 encoded image
+            image_data: Raw image bytes or base64 encoded image
             
         Returns:
             List of color information
@@ -97,38 +125,86 @@ class GoogleVisionClient:
             return []
         
         try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
-            image = vision.Image(content=image_bytes)
-            
-            # Perform image properties detection
-            response = self.client.image_properties(image=image)
-            props = response.image_properties_annotation
-            
-            colors = []
-            for color in props.dominant_colors.colors:
-                color_info = {
-                    'rgb': {
-                        'red': int(color.color.red),
-                        'green': int(color.color.green),
-                        'blue': int(color.color.blue)
-                    },
-                    'score': color.score,
-                    'pixel_fraction': color.pixel_fraction,
-                    'name': self._rgb_to_color_name(
-                        int(color.color.red),
-                        int(color.color.green),
-                        int(color.color.blue)
-                    )
-                }
-                colors.append(color_info)
-            
-            return colors
+            response = await self._annotate(
+                as_image_bytes(image_data), vision.Feature.Type.IMAGE_PROPERTIES
+            )
+            return self._colors_from(response)
             
         except Exception as e:
             logger.error(f"Error detecting colors: {e}")
             return []
     
+    async def extract_text_and_colors(
+        self, image_data: ImageData
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Extract text and dominant colors with a single Vision request
+        
+        Args:
+            image_data: Raw image bytes or base64 encoded image
+            
+        Returns:
+            (detected text strings, color information)
+        """
+        if not self.client:
+            return [], []
+        
+        try:
+            response = await self._annotate(
+                as_image_bytes(image_data),
+                vision.Feature.Type.TEXT_DETECTION,
+                vision.Feature.Type.IMAGE_PROPERTIES
+            )
+            return self._imprints_from(response), self._colors_from(response)
+            
+        except Exception as e:
+            logger.error(f"Error extracting text and colors: {e}")
+            return [], []
+    
+    def _imprints_from(self, response: Any) -> List[str]:
+        """Pull potential imprints out of a text detection response"""
+        texts = response.text_annotations
+        if not texts:
+            return []
+        
+        # Extract individual words (skip first as it's full text)
+        words = [text.description for text in texts[1:]]
+        
+        # Filter for potential imprints (alphanumeric, common patterns)
+        imprints = self._filter_pill_imprints(words)
+        
+        logger.info(f"Detected text: {imprints}")
+        return imprints
+    
+    def _colors_from(self, response: Any) -> List[Dict[str, Any]]:
+        """Pull named dominant colors out of an image properties response"""
+        dominant = response.image_properties_annotation.dominant_colors.colors
+        if not dominant:
+            return []
+        
+        # Classify every dominant color in one vectorized pass
+        rgb = np.array(
+            [(color.color.red, color.color.green, color.color.blue) for color in dominant],
+            dtype=float
+        ).astype(np.int16)
+        names = self._rgb_to_color_names(rgb)
+        
+        colors = []
+        for color, (red, green, blue), name in zip(dominant, rgb.tolist(), names):
+            color_info = {
+                'rgb': {
+                    'red': red,
+                    'green': green,
+                    'blue': blue
+                },
+                'score': color.score,
+                'pixel_fraction': color.pixel_fraction,
+                'name': name
+            }
+            colors.append(color_info)
+        
+        return colors
+    
     def _filter_pill_imprints(self, texts: List[str]) -> List[str]:
         """
         Filter detected text to likely pill imprints
@@ -153,21 +229,14 @@ class GoogleVisionClient:
             # - Contains numbers and letters
             # - All numbers
             # - Common drug prefixes
-            if any(c.isdigit() for c in text) or len(text) <= 5:
+            if len(text) <= 5 or _IMPRINT_DIGIT.search(text):
                 # Remove special characters except spaces and hyphens
-                cleaned = ''.join(c for c in text if c.isalnum() or c in ' -')
+                cleaned = _IMPRINT_CLEAN.sub('', text)
                 if cleaned:
                     imprints.append(cleaned)
         
         # Remove duplicates while preserving order
-        seen = set()
-        unique_imprints = []
-        for imprint in imprints:
-            if imprint not in seen:
-                seen.add(imprint)
-                unique_imprints.append(imprint)
-        
-        return unique_imprints
+        return list(dict.fromkeys(imprints))
     
     def _rgb_to_color_name(self, r: int, g: int, b: int) -> str:
         """
@@ -179,45 +248,47 @@ class GoogleVisionClient:
         Returns:
             Color name
         """
-        # Simple color classification
-        if r > 200 and g > 200 and b > 200:
-            return "white"
-        elif r < 50 and g < 50 and b < 50:
-            return "black"
-        elif r > 150 and g < 100 and b < 100:
-            return "red"
-        elif r < 100 and g < 100 and b > 150:
-            return "blue"
-        elif r < 100 and g > 150 and b < 100:
-            return "green"
-        elif r > 200 and g > 150 and b < 100:
-            return "yellow"
-        elif r > 200 and g > 100 and b < 100:
-            return "orange"
-        elif r > 150 and g < 100 and b > 150:
-            return "purple"
-        elif r > 150 and g > 100 and b > 100:
-            return "pink"
-        elif r > 100 and g > 50 and b < 50:
-            return "brown"
-        elif r > 150 and g > 150 and b > 150:
-            return "gray"
-        else:
-            return "unknown"
+        for name, (r0, r1, g0, g1, b0, b1) in _COLOR_TABLE:
+            if r0 <= r <= r1 and g0 <= g <= g1 and b0 <= b <= b1:
+                return name
+        return "unknown"
+    
+    def _rgb_to_color_names(self, rgb: np.ndarray) -> List[str]:
+        """
+        Convert an (N, 3) array of RGB values to common color names
+        
+        Args:
+            rgb: RGB rows (0-255)
+            
+        Returns:
+            Color name per row
+        """
+        r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+        
+        # np.select takes the first matching condition, like the table scan
+        conditions = [
+            (r >= r0) & (r <= r1) & (g >= g0) & (g <= g1) & (b >= b0) & (b <= b1)
+            for _, (r0, r1, g0, g1, b0, b1) in _COLOR_TABLE
+        ]
+        names = [name for name, _ in _COLOR_TABLE]
+        return np.select(conditions, names, default="unknown").tolist()
     
-    async def enhance_for_ocr(self, image_data: str) -> str:
+    async def enhance_for_ocr(self, image_data: ImageData) -> ImageData:
         """
         Enhance image for better OCR results
         
         Args:
-            image_data: Base64 encoded image
+            image_data: Raw image bytes or base64 encoded image
             
         Returns:
-            Enhanced base64 encoded image
+            Enhanced image, as bytes or base64 to match the input
         """
         try:
             # Decode image
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = as_image_bytes(image_data)
+            if CV2_AVAILABLE:
+                return like_input(self._enhance_cv2(image_bytes), image_data)
+            
             img = Image.open(io.BytesIO(image_bytes))
             
             # Convert to grayscale for better OCR
@@ -233,16 +304,32 @@ class GoogleVisionClient:
             enhancer = ImageEnhance.Sharpness(img)
             img = enhancer.enhance(2.0)
             
-            # Convert back to base64
+            # Convert back to the caller's representation
             buffer = io.BytesIO()
             img.save(buffer, format='PNG')
-            enhanced_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-            return enhanced_data
+            return like_input(buffer.getvalue(), image_data)
             
         except Exception as e:
             logger.error(f"Error enhancing image: {e}")
             return image_data
+    
+    @staticmethod
+    def _enhance_cv2(image_bytes: bytes) -> bytes:
+        """Grayscale, contrast and sharpen an encoded image in one OpenCV pass"""
+        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise ValueError("Could not decode image")
+        
+        # Contrast 2.0 around the mean gray level, as ImageEnhance.Contrast does
+        mean = int(img.mean() + 0.5)
+        img = cv2.convertScaleAbs(img, alpha=2.0, beta=-mean)
+        img = cv2.filter2D(img, -1, _SHARPEN_KERNEL)
+        
+        # The enhanced image is short-lived, so favor speed over size
+        ok, buffer = cv2.imencode('.png', img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not ok:
+            raise ValueError("Could not encode image")
+        return buffer.tobytes()
 
 
 # Singleton instance
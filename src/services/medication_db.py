@@ -1,9 +1,11 @@
 import logging
 import asyncio
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import aiohttp
 import json
+import numpy as np
 
 from src.models.medication import (
     Medication, MedicationDetails, DrugInteraction, 
@@ -11,9 +13,50 @@ from src.models.medication import (
 )
 from src.services.rxnorm_client import rxnorm_client
 from src.config.settings import settings
+from src.utils.cache import redis_cache
 
 logger = logging.getLogger(__name__)
 
+# Candidate scoring is JIT-compiled when numba is installed; the numpy
+# expression below is already vectorized, so it runs as-is without it
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+# Shape/color values interned to small ints so candidates compare as arrays
+_FEATURE_CODES: Dict[Optional[str], int] = {}
+
+
+def feature_code(value: Optional[str]) -> int:
+    """Return the stable integer code for a shape or color value"""
+    return _FEATURE_CODES.setdefault(value, len(_FEATURE_CODES))
+
+
+@njit(cache=True)
+def _fuse_scores(shapes, colors, base, target_shape, target_color):
+    return np.minimum(base + 0.1 * (shapes == target_shape) + 0.1 * (colors == target_color), 1.0)
+
+
+def score_candidates(candidates: List[Medication], shape: Optional[str],
+                     color: Optional[str], confidence: float) -> np.ndarray:
+    """
+    Fuse the vision confidence with shape and color matches for each candidate
+    
+    Each matching feature adds 0.1 to the base confidence, capped at 1.0.
+    """
+    shapes = np.fromiter((feature_code(m.shape) for m in candidates), dtype=np.int16, count=len(candidates))
+    colors = np.fromiter((feature_code(m.color) for m in candidates), dtype=np.int16, count=len(candidates))
+    base = np.full(len(candidates), confidence, dtype=np.float64)
+    return _fuse_scores(shapes, colors, base, feature_code(shape), feature_code(color))
+
+
+# Drug monographs are effectively immutable per medication_id, so details are
+# kept in a bounded per-worker LRU in front of a shared Redis tier
+DETAILS_LRU_SIZE = 4096
+DETAILS_REDIS_TTL = 86400
+
 
 class MedicationDatabaseService:
     """
@@ -25,6 +68,7 @@ class MedicationDatabaseService:
         self.use_real_apis = bool(settings.rximage_base_url and settings.rxnorm_base_url)
         self.cache = {}  # Simple in-memory cache
         self.cache_ttl = timedelta(hours=24)
+        self.details_cache: "OrderedDict[str, MedicationDetails]" = OrderedDict()
         
         # Initialize mock database for fallback
         self._init_mock_database()
@@ -258,12 +302,18 @@ class MedicationDatabaseService:
         Returns:
             Detailed medication information
         """
-        # Check cache
-        cache_key = f"details_{medication_id}"
-        if cache_key in self.cache:
-            cache_time, cached_result = self.cache[cache_key]
-            if datetime.utcnow() - cache_time < self.cache_ttl:
-                return cached_result
+        # In-process LRU first, then the Redis tier shared by all workers
+        cached = self.details_cache.get(medication_id)
+        if cached is not None:
+            self.details_cache.move_to_end(medication_id)
+            return cached
+        
+        redis_key = f"med:{medication_id}"
+        cached_data = await redis_cache.get(redis_key)
+        if cached_data is not None:
+            result = MedicationDetails.model_validate(cached_data)
+            self._remember_details(medication_id, result)
+            return result
         
         result = None
         
@@ -298,12 +348,20 @@ class MedicationDatabaseService:
             # Use mock data
             result = self._get_mock_medication_details(medication_id)
         
-        # Cache result
+        # Cache result in both tiers
         if result:
-            self.cache[cache_key] = (datetime.utcnow(), result)
+            self._remember_details(medication_id, result)
+            await redis_cache.set(redis_key, result.model_dump(mode="json"), DETAILS_REDIS_TTL)
         
         return result
     
+    def _remember_details(self, medication_id: str, details: MedicationDetails):
+        """Store details in the in-process LRU, evicting the least recently used"""
+        self.details_cache[medication_id] = details
+        self.details_cache.move_to_end(medication_id)
+        if len(self.details_cache) > DETAILS_LRU_SIZE:
+            self.details_cache.popitem(last=False)
+    
     def _get_mock_medication_details(self, medication_id: str) -> Optional[MedicationDetails]:
         """Get medication details from mock database"""
         for med in self.mock_medications.values():
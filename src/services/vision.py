@@ -1,4 +1,3 @@
-import base64
 import io
 import logging
 from typing import Dict, List, Optional, Tuple
@@ -8,6 +7,7 @@ from dataclasses import dataclass
 
 from src.services.google_vision_client import google_vision_client
 from src.config.settings import settings
+from src.utils.images import ImageData, as_image_bytes, like_input
 
 logger = logging.getLogger(__name__)
 
@@ -53,19 +53,19 @@ class VisionService:
             "gray": [(0, 0, 50), (180, 30, 200)]
         }
     
-    async def analyze_medication_image(self, image_data: str) -> PillFeatures:
+    async def analyze_medication_image(self, image_data: ImageData) -> PillFeatures:
         """
         Analyze a medication image and extract features
         
         Args:
-            image_data: Base64 encoded image data
+            image_data: Raw image bytes or base64 encoded image data
             
         Returns:
             PillFeatures object with extracted information
         """
         try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
+            # Decode once; the Vision API calls below reuse the same bytes
+            image_bytes = as_image_bytes(image_data)
             image = Image.open(io.BytesIO(image_bytes))
             
             # Convert to RGB if necessary
@@ -76,15 +76,13 @@ class VisionService:
             features = PillFeatures()
             
             if self.use_google_vision:
-                # Use Google Vision API for text extraction
-                imprints = await google_vision_client.extract_text(image_data)
+                # Text and color detection share one Google Vision request
+                imprints, colors = await google_vision_client.extract_text_and_colors(image_bytes)
                 if imprints:
                     # Take the most likely imprint (first one)
                     features.imprint = imprints[0] if imprints else None
                     features.confidence = 0.9  # High confidence with Google Vision
                 
-                # Use Google Vision for color detection
-                colors = await google_vision_client.detect_colors(image_data)
                 if colors:
                     # Use the dominant color
                     features.color = colors[0]['name'] if colors else None
@@ -257,15 +255,15 @@ class VisionService:
         else:
             return "large"  # > 15mm
     
-    async def enhance_image(self, image_data: str) -> str:
+    async def enhance_image(self, image_data: ImageData) -> ImageData:
         """
         Enhance image quality for better recognition
         
         Args:
-            image_data: Base64 encoded image
+            image_data: Raw image bytes or base64 encoded image
             
         Returns:
-            Base64 encoded enhanced image
+            Enhanced image, as bytes or base64 to match the input
         """
         # If using Google Vision, delegate to its enhancement
         if self.use_google_vision:
@@ -274,7 +272,7 @@ class VisionService:
         # Otherwise use local enhancement
         try:
             # Decode image
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = as_image_bytes(image_data)
             image = Image.open(io.BytesIO(image_bytes))
             
             # Apply enhancements
@@ -291,18 +289,16 @@ class VisionService:
             enhancer = ImageEnhance.Sharpness(image)
             image = enhancer.enhance(2.0)
             
-            # Convert back to base64
+            # Convert back to the caller's representation
             buffer = io.BytesIO()
             image.save(buffer, format='PNG')
-            enhanced_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-            return enhanced_data
+            return like_input(buffer.getvalue(), image_data)
             
         except Exception as e:
             logger.error(f"Error enhancing image: {e}")
             return image_data  # Return original if enhancement fails
     
-    def validate_image(self, image_data: str) -> Tuple[bool, Optional[str]]:
+    def validate_image(self, image_data: ImageData) -> Tuple[bool, Optional[str]]:
         """
         Validate that the image is suitable for medication identification
         
@@ -311,7 +307,7 @@ class VisionService:
         """
         try:
             # Decode and open image
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = as_image_bytes(image_data)
             image = Image.open(io.BytesIO(image_bytes))
             
             # Check image size
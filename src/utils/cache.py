@@ -0,0 +1,90 @@
+from typing import Any, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import time
+import orjson
+from src.utils.database import redis_manager
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(value: str) -> str:
+    """Stable digest for values (e.g. user ids) that shouldn't appear in key names"""
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+class RedisCache:
+    """
+    JSON response cache over the shared Redis client
+    
+    The Redis client is synchronous, so every call runs in a worker thread.
+    Cache failures are logged and treated as misses so they never fail the
+    request that is being cached.
+    """
+    
+    def __init__(self, prefix: str = "elderwise"):
+        self.prefix = prefix
+    
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        try:
+            raw = await asyncio.to_thread(redis_manager.get_client().get, self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+        return orjson.loads(raw) if raw is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        """Cache a JSON-serializable value for ttl seconds"""
+        try:
+            await asyncio.to_thread(
+                redis_manager.get_client().setex, self._key(key), ttl, orjson.dumps(value)
+            )
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+    
+    async def get_swr(self, key: str) -> Tuple[Optional[Any], bool]:
+        """
+        Read a stale-while-revalidate entry
+        
+        Returns:
+            (value, stale) - value is None on a miss; stale is True once the
+            entry is past its fresh window and should be refreshed
+        """
+        entry = await self.get(key)
+        if entry is None:
+            return None, False
+        return entry["value"], time.time() >= entry["fresh_until"]
+    
+    async def set_swr(self, key: str, value: Any, fresh_ttl: int, stale_ttl: int) -> None:
+        """Cache a value that is fresh for fresh_ttl, then servable stale for stale_ttl"""
+        entry = {"value": value, "fresh_until": time.time() + fresh_ttl}
+        await self.set(key, entry, fresh_ttl + stale_ttl)
+    
+    async def delete(self, key: str) -> None:
+        """Drop a single cached key"""
+        try:
+            await asyncio.to_thread(redis_manager.get_client().delete, self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {key}: {e}")
+    
+    async def delete_pattern(self, pattern: str) -> None:
+        """Drop every cached key matching a glob pattern"""
+        def _delete() -> None:
+            client = redis_manager.get_client()
+            keys = list(client.scan_iter(match=self._key(pattern)))
+            if keys:
+                client.delete(*keys)
+        
+        try:
+            await asyncio.to_thread(_delete)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {pattern}: {e}")
+
+
+# Global instance
+redis_cache = RedisCache()
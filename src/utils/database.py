@@ -1,6 +1,6 @@
 import redis
 from motor.motor_asyncio import AsyncIOMotorClient
-from pinecone import Pinecone, ServerlessSpec
+from pinecone import Pinecone, PodSpec, ServerlessSpec
 from typing import Optional
 import logging
 from src.config.settings import settings
@@ -11,16 +11,22 @@ logger = logging.getLogger(__name__)
 class RedisManager:
     def __init__(self):
         self.client: Optional[redis.Redis] = None
+        self.pool: Optional[redis.BlockingConnectionPool] = None
     
     def connect(self):
         try:
-            self.client = redis.Redis(
+            # One bounded pool shared by sessions and caches; callers wait for a
+            # free connection instead of opening a new one per call
+            self.pool = redis.BlockingConnectionPool(
                 host=settings.redis_host,
                 port=settings.redis_port,
                 db=settings.redis_db,
                 password=settings.redis_password,
-                decode_responses=True
+                decode_responses=True,
+                max_connections=settings.redis_max_connections,
+                socket_keepalive=True
             )
+            self.client = redis.Redis(connection_pool=self.pool)
             self.client.ping()
             logger.info("Redis connection established")
         except Exception as e:
@@ -30,6 +36,7 @@ class RedisManager:
     def disconnect(self):
         if self.client:
             self.client.close()
+            self.pool.disconnect()
             logger.info("Redis connection closed")
     
     def get_client(self) -> redis.Redis:
@@ -45,7 +52,10 @@ class MongoDBManager:
     
     async def connect(self):
         try:
-            self.client = AsyncIOMotorClient(settings.mongodb_uri)
+            self.client = AsyncIOMotorClient(
+                settings.mongodb_uri,
+                maxPoolSize=settings.mongodb_max_pool_size
+            )
             self.db = self.client[settings.mongodb_database]
             await self.client.admin.command('ping')
             logger.info("MongoDB connection established")
@@ -82,10 +92,7 @@ class PineconeManager:
                     name=settings.pinecone_index_name,
                     dimension=384,  # For sentence-transformers/all-MiniLM-L6-v2
                     metric='cosine',
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region=settings.pinecone_environment
-                    )
+                    spec=self._index_spec()
                 )
                 logger.info(f"Created Pinecone index: {settings.pinecone_index_name}")
             
@@ -95,6 +102,21 @@ class PineconeManager:
             logger.error(f"Failed to connect to Pinecone: {e}")
             raise
     
+    @staticmethod
+    def _index_spec():
+        """Pod spec when a pod type is configured, otherwise serverless"""
+        # Storage-optimized s1 pods hold about five times as many vectors per
+        # pod as p1 and also support metadata-filtered index stats
+        if settings.pinecone_pod_type:
+            return PodSpec(
+                environment=settings.pinecone_environment,
+                pod_type=settings.pinecone_pod_type
+            )
+        return ServerlessSpec(
+            cloud='aws',
+            region=settings.pinecone_environment
+        )
+    
     def get_index(self):
         if not self.index:
             self.connect()
@@ -0,0 +1,19 @@
+import base64
+from typing import Union
+
+# Images travel either as raw bytes or as base64 text (legacy JSON payloads)
+ImageData = Union[str, bytes]
+
+
+def as_image_bytes(image_data: ImageData) -> bytes:
+    """Return raw image bytes, decoding base64 text only when needed"""
+    if isinstance(image_data, (bytes, bytearray, memoryview)):
+        return bytes(image_data)
+    return base64.b64decode(image_data)
+
+
+def like_input(image_bytes: bytes, original: ImageData) -> ImageData:
+    """Return image bytes in the same representation the caller passed in"""
+    if isinstance(original, str):
+        return base64.b64encode(image_bytes).decode('utf-8')
+    return image_bytes
@@ -2,18 +2,21 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timedelta
 import logging
+from typing import Optional
 from src.memory.storage import MemoryStorage
 from src.memory.semantic import SemanticMemory
+from src.memory.instances import memory_storage, semantic_memory
 from src.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
 class MemoryScheduler:
-    def __init__(self):
+    def __init__(self, storage: Optional[MemoryStorage] = None,
+                 semantic: Optional[SemanticMemory] = None):
         self.scheduler = AsyncIOScheduler()
-        self.storage = MemoryStorage()
-        self.semantic = SemanticMemory()
+        self.storage = storage or MemoryStorage()
+        self.semantic = semantic or SemanticMemory()
         self._setup_jobs()
     
     def _setup_jobs(self):
@@ -129,4 +132,4 @@ class MemoryScheduler:
 
 
 # Global scheduler instance
-memory_scheduler = MemoryScheduler()
\ No newline at end of file
+memory_scheduler = MemoryScheduler(storage=memory_storage, semantic=semantic_memory)
\ No newline at end of file
@@ -298,6 +298,9 @@ class TestAPIIntegration:
         assert recent_response.json()["count"] == 3
         
         # Get all tags
+        storage.get_distinct_tags = AsyncMock(return_value=sorted({
+            tag for _, tags in memory_types for tag in tags
+        }))
         tags_response = client.get("/memory/test_user/tags")
         
         assert tags_response.status_code == 200
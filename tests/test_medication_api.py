@@ -142,6 +142,38 @@ class TestMedicationAPI:
             data = response.json()
             assert data["detail"] == "No medications found matching the image"
     
+    def test_identify_medication_upload(self, client, sample_image_data, mock_medication_response):
+        """Test POST /medication/identify/upload with a multipart image"""
+        with patch('src.api.routes.medication.vision_service') as mock_vision, \
+             patch('src.api.routes.medication.medication_db_service') as mock_db, \
+             patch('src.api.routes.medication.store_medication_image', new=AsyncMock()):
+            
+            mock_features = PillFeatures(
+                shape="oval",
+                color="white",
+                imprint="L484",
+                confidence=0.9
+            )
+            mock_vision.validate_image = Mock(return_value=(True, None))
+            mock_vision.enhance_image = AsyncMock(side_effect=lambda data: data)
+            mock_vision.analyze_medication_image = AsyncMock(return_value=mock_features)
+            mock_db.identify_by_imprint = AsyncMock(return_value=[mock_medication_response])
+            
+            image_bytes = base64.b64decode(sample_image_data)
+            response = client.post(
+                "/medication/identify/upload",
+                files={"image": ("pill.png", image_bytes, "image/png")},
+                data={"user_id": "test_user"}
+            )
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["success"] is True
+            assert data["pill_features"]["imprint"] == "L484"
+            
+            # The vision pipeline receives the raw upload, not base64 text
+            mock_vision.validate_image.assert_called_once_with(image_bytes)
+    
     def test_get_medication_details(self, client, mock_medication_details):
         """Test GET /medications/{medication_id} endpoint"""
         with patch('src.services.medication_db.medication_db_service') as mock_db:
@@ -397,13 +429,13 @@ class TestMedicationErrorHandling:
     def test_identify_medication_invalid_image(self, client):
         """Test medication identification with invalid image"""
         response = client.post(
-            "/medications/identify",
-            json={"image": "invalid_base64_data"}
+            "/medication/identify",
+            json={"user_id": "test_user", "image_data": "not*valid*base64"}
         )
         
         assert response.status_code == 400
         data = response.json()
-        assert "Invalid image" in data["detail"]
+        assert data["detail"] == "Invalid image data. Please try again."
     
     def test_identify_medication_missing_image(self, client):
         """Test medication identification without image"""
@@ -6,7 +6,7 @@ import json
 from datetime import datetime, timedelta
 
 from src.services.vision import VisionService, PillFeatures
-from src.services.medication_db import MedicationDatabaseService
+from src.services.medication_db import MedicationDatabaseService, score_candidates
 from src.services.google_vision_client import GoogleVisionClient
 from src.services.rxnorm_client import RxNormClient
 from src.models.medication import (
@@ -51,10 +51,10 @@ class TestVisionService:
         with patch('src.services.vision.google_vision_client') as mock_client:
             # Mock Google Vision responses
             mock_client.client = Mock()
-            mock_client.extract_text = AsyncMock(return_value=["L484", "500MG"])
-            mock_client.detect_colors = AsyncMock(return_value=[
-                {"name": "white", "score": 0.9}
-            ])
+            mock_client.extract_text_and_colors = AsyncMock(return_value=(
+                ["L484", "500MG"],
+                [{"name": "white", "score": 0.9}]
+            ))
             
             vision_service = VisionService(api_key="test_key")
             vision_service.use_google_vision = True
@@ -65,8 +65,7 @@ class TestVisionService:
             assert features.color == "white"
             assert features.confidence == 0.9  # Google Vision confidence
             
-            mock_client.extract_text.assert_called_once()
-            mock_client.detect_colors.assert_called_once()
+            mock_client.extract_text_and_colors.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_detect_shape(self, vision_service):
@@ -109,6 +108,18 @@ class TestVisionService:
         is_valid, error = vision_service.validate_image("invalid_base64")
         assert is_valid is False
         assert "Invalid image data" in error
+    
+    @pytest.mark.asyncio
+    async def test_enhance_image_keeps_representation(self, vision_service, sample_image_data):
+        """Test raw bytes flow through validation and enhancement undecoded"""
+        image_bytes = base64.b64decode(sample_image_data)
+        
+        is_valid, error = vision_service.validate_image(image_bytes)
+        assert is_valid is True
+        assert error is None
+        
+        assert isinstance(await vision_service.enhance_image(image_bytes), bytes)
+        assert isinstance(await vision_service.enhance_image(sample_image_data), str)
 
 
 class TestMedicationDatabaseService:
@@ -171,6 +182,33 @@ class TestMedicationDatabaseService:
         assert len(details.warnings) > 0
         assert len(details.side_effects["common"]) > 0
     
+    @pytest.mark.asyncio
+    async def test_get_medication_details_cache_tiers(self, medication_db):
+        """Test details are served from Redis, then from the in-process LRU"""
+        cached = medication_db.mock_medications["L484"].model_dump(mode="json")
+        
+        with patch('src.services.medication_db.redis_cache') as mock_cache:
+            mock_cache.get = AsyncMock(return_value=cached)
+            mock_cache.set = AsyncMock()
+            
+            first = await medication_db.get_medication_details("med_001")
+            second = await medication_db.get_medication_details("med_001")
+            
+            assert first.name == second.name == "Acetaminophen 500 mg"
+            mock_cache.get.assert_awaited_once_with("med:med_001")
+            mock_cache.set.assert_not_awaited()
+    
+    def test_score_candidates(self, medication_db):
+        """Test shape and color matches raise confidence, capped at 1.0"""
+        candidates = [
+            medication_db.mock_medications["L484"],       # oval, white
+            medication_db.mock_medications["TEVA 3109"],  # capsule, pink
+        ]
+        
+        scores = score_candidates(candidates, shape="oval", color="white", confidence=0.85)
+        
+        assert list(scores) == pytest.approx([1.0, 0.85])
+    
     @pytest.mark.asyncio
     async def test_search_by_name(self, medication_db):
         """Test searching medications by name"""
@@ -346,7 +384,7 @@ class TestGoogleVisionClient:
                 Mock(description="L484"),
                 Mock(description="500MG")
             ]
-            mock_client.text_detection.return_value = mock_response
+            mock_client.annotate_image.return_value = mock_response
             
             client = GoogleVisionClient()
             client.client = mock_client
@@ -357,7 +395,7 @@ class TestGoogleVisionClient:
             texts = await client.extract_text(image_data)
             
             assert "L484" in texts
-            mock_client.text_detection.assert_called_once()
+            mock_client.annotate_image.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_detect_colors(self):
@@ -377,7 +415,7 @@ class TestGoogleVisionClient:
             mock_props.dominant_colors.colors = [mock_color]
             mock_response.image_properties_annotation = mock_props
             
-            mock_client.image_properties.return_value = mock_response
+            mock_client.annotate_image.return_value = mock_response
             
             client = GoogleVisionClient()
             client.client = mock_client
@@ -391,6 +429,35 @@ class TestGoogleVisionClient:
             assert colors[0]["name"] == "white"
             assert colors[0]["score"] == 0.9
     
+    @pytest.mark.asyncio
+    async def test_extract_text_and_colors(self):
+        """Test text and colors come from a single annotate request"""
+        with patch('src.services.google_vision_client.vision', create=True):
+            mock_client = Mock()
+            mock_response = Mock()
+            mock_response.text_annotations = [
+                Mock(description="L484 500MG"),  # Full text
+                Mock(description="L484")
+            ]
+            mock_color = Mock(score=0.9, pixel_fraction=0.8)
+            mock_color.color.red = 255
+            mock_color.color.green = 255
+            mock_color.color.blue = 255
+            mock_response.image_properties_annotation.dominant_colors.colors = [mock_color]
+            mock_client.annotate_image.return_value = mock_response
+            
+            client = GoogleVisionClient()
+            client.client = mock_client
+            
+            texts, colors = await client.extract_text_and_colors(b"test_image")
+            
+            assert texts == ["L484"]
+            assert colors[0]["name"] == "white"
+            mock_client.annotate_image.assert_called_once()
+            request = mock_client.annotate_image.call_args.args[0]
+            assert request["image"]["content"] == b"test_image"
+            assert len(request["features"]) == 2
+    
     def test_filter_pill_imprints(self):
         """Test pill imprint filtering"""
         client = GoogleVisionClient()
@@ -412,6 +479,15 @@ class TestGoogleVisionClient:
         assert client._rgb_to_color_name(255, 0, 0) == "red"
         assert client._rgb_to_color_name(0, 0, 255) == "blue"
         assert client._rgb_to_color_name(0, 255, 0) == "green"
+    
+    def test_rgb_to_color_names(self):
+        """Test vectorized RGB classification matches the per-color names"""
+        import numpy as np
+        
+        client = GoogleVisionClient()
+        rgb = np.array([[255, 255, 255], [0, 0, 0], [255, 0, 0], [220, 160, 50], [120, 120, 120]])
+        
+        assert client._rgb_to_color_names(rgb) == ["white", "black", "red", "yellow", "unknown"]
 
 
 # Integration test
@@ -427,10 +503,10 @@ class TestMedicationIdentificationFlow:
             
             # Setup vision mocks
             mock_vision_client.client = Mock()
-            mock_vision_client.extract_text = AsyncMock(return_value=["L484"])
-            mock_vision_client.detect_colors = AsyncMock(return_value=[
-                {"name": "white", "score": 0.9}
-            ])
+            mock_vision_client.extract_text_and_colors = AsyncMock(return_value=(
+                ["L484"],
+                [{"name": "white", "score": 0.9}]
+            ))
             
             # Setup RxNorm mocks
             mock_rxnorm.search_by_imprint = AsyncMock(return_value=[{
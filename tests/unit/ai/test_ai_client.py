@@ -1,7 +1,10 @@
 import pytest
+import pytest_asyncio
 import asyncio
+import json
+import time
 from unittest.mock import Mock, AsyncMock, patch
-from src.ai.base import AIProvider, AIRequest, AIResponse, ProviderConfig
+from src.ai.base import AIProvider, AIRequest, AIResponse, ProviderConfig, AIProviderRateLimitError
 from src.ai.client import AIClient
 from src.ai.providers.mock import MockProvider
 
@@ -9,7 +12,7 @@ from src.ai.providers.mock import MockProvider
 class TestAIClient:
     """Test suite for AI Client abstraction layer"""
     
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def ai_client(self):
         """Create a fresh AI client for testing"""
         client = AIClient()
@@ -39,6 +42,15 @@ class TestAIClient:
         assert ai_client.primary_provider is not None
         assert isinstance(ai_client.primary_provider, MockProvider)
     
+    @pytest.mark.asyncio
+    async def test_concurrent_initialize_creates_providers_once(self, ai_client, mock_settings):
+        """Test concurrent first calls share one provider instance"""
+        with patch.object(MockProvider, 'initialize', AsyncMock()) as provider_init:
+            await asyncio.gather(*(ai_client.initialize() for _ in range(5)))
+        
+        assert provider_init.await_count == 1
+        assert ai_client.provider_cache[AIProvider.MOCK] is ai_client.primary_provider
+    
     @pytest.mark.asyncio
     async def test_generate_response(self, ai_client, mock_settings):
         """Test basic response generation"""
@@ -191,7 +203,7 @@ class TestAIClient:
 @pytest.mark.asyncio
 async def test_mistral_provider_integration():
     """Test Mistral provider with mocked HuggingFace client"""
-    from src.ai.providers.mistral import MistralProvider
+    from src.ai.providers.mistral import MistralProvider, SYSTEM_PROMPT_MSG
     
     config = ProviderConfig(
         provider=AIProvider.MISTRAL,
@@ -201,23 +213,32 @@ async def test_mistral_provider_integration():
     
     provider = MistralProvider(config)
     
-    # Mock the HuggingFace client
-    with patch('src.ai.providers.mistral.InferenceClient') as mock_client:
-        mock_instance = Mock()
+    # Mock the pooled HTTP client
+    with patch('src.ai.providers.mistral.httpx.AsyncClient') as mock_client:
+        mock_instance = AsyncMock()
         mock_client.return_value = mock_instance
         
         # Mock chat completion response
         mock_response = Mock()
-        mock_response.choices = [Mock(message=Mock(content="Test response"))]
-        mock_response.usage = Mock(
-            prompt_tokens=10,
-            completion_tokens=5,
-            total_tokens=15
-        )
-        mock_instance.chat_completion.return_value = mock_response
+        mock_response.content = json.dumps({
+            "choices": [{"message": {"content": "Test response"}}],
+            "usage": {
+                "prompt_tokens": 10,
+                "completion_tokens": 5,
+                "total_tokens": 15,
+                "prompt_tokens_details": {"cached_tokens": 8}
+            }
+        }).encode()
+        mock_response.raise_for_status = Mock()
+        mock_instance.post.return_value = mock_response
+        mock_instance.get.return_value = Mock(status_code=200)
         
         await provider.initialize()
         
+        # Initialization checks the token with whoami rather than an inference call
+        mock_instance.get.assert_awaited_once()
+        mock_instance.post.assert_not_awaited()
+        
         request = AIRequest(
             context="Test context",
             temperature=0.7,
@@ -230,6 +251,12 @@ async def test_mistral_provider_integration():
         assert response.response == "Test response"
         assert response.provider == AIProvider.MISTRAL
         assert response.usage["total_tokens"] == 15
+        assert response.usage["cache_read_input_tokens"] == 8
+        
+        # The static system prompt leads every request so its prefix can be cached
+        payload = json.loads(mock_instance.post.call_args.kwargs["content"])
+        assert payload["messages"][0] == SYSTEM_PROMPT_MSG
+        assert payload["cache_prompt"] is True
 
 
 @pytest.mark.asyncio
@@ -257,7 +284,7 @@ async def test_cleoai_provider_integration():
         # Mock GraphQL response
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "data": {
                 "inferText": {
                     "text": "CleoAI response",
@@ -270,7 +297,7 @@ async def test_cleoai_provider_integration():
                     "error": None
                 }
             }
-        }
+        }).encode()
         mock_response.raise_for_status = Mock()
         mock_client.post.return_value = mock_response
         
@@ -288,4 +315,403 @@ async def test_cleoai_provider_integration():
         assert response.success is True
         assert response.response == "CleoAI response"
         assert response.provider == AIProvider.CLEOAI
-        assert response.model == "cleoai-v1"
\ No newline at end of file
+        assert response.model == "cleoai-v1"
+        assert response.provider_timing_ms == 150
+
+@pytest.mark.asyncio
+async def test_cleoai_providers_share_http_client():
+    """Test CleoAI providers for the same endpoint reuse one HTTP client"""
+    from src.ai.providers.cleoai import CleoAIProvider
+    
+    config = ProviderConfig(
+        provider=AIProvider.CLEOAI,
+        endpoint="http://shared.cleoai.com",
+        api_key="test_key"
+    )
+    
+    first = CleoAIProvider(config)
+    second = CleoAIProvider(config)
+    
+    with patch.object(CleoAIProvider, 'validate_connection', AsyncMock(return_value=True)):
+        await first.initialize()
+        await second.initialize()
+    
+    assert first.client is second.client
+    
+    # Shutting down one provider must not close the client for the other
+    await first.shutdown()
+    assert second.client.is_closed is False
+    
+    shared_client = second.client
+    await second.shutdown()
+    assert shared_client.is_closed is True
+
+
+@pytest.mark.asyncio
+async def test_cleoai_http_client_keyed_by_timeout():
+    """Test CleoAI providers with different timeouts get separate HTTP clients"""
+    from src.ai.providers.cleoai import CleoAIProvider
+    
+    fast = CleoAIProvider(ProviderConfig(
+        provider=AIProvider.CLEOAI,
+        endpoint="http://timeout.cleoai.com",
+        timeout=5
+    ))
+    slow = CleoAIProvider(ProviderConfig(
+        provider=AIProvider.CLEOAI,
+        endpoint="http://timeout.cleoai.com",
+        timeout=60
+    ))
+    
+    with patch.object(CleoAIProvider, 'validate_connection', AsyncMock(return_value=True)):
+        await fast.initialize()
+        await slow.initialize()
+    
+    assert fast.client is not slow.client
+    assert fast.client.timeout.read == 5
+    assert slow.client.timeout.read == 60
+    
+    await fast.shutdown()
+    await slow.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_generate_responses_batch():
+    """Test batched generation returns one response per request in order"""
+    config = ProviderConfig(
+        provider=AIProvider.MOCK,
+        additional_config={"concurrency": 2}
+    )
+    provider = MockProvider(config)
+    await provider.initialize()
+    
+    requests = [
+        AIRequest(context=f"Message {i}", max_tokens=50, user_id=f"user_{i}")
+        for i in range(5)
+    ]
+    
+    responses = await provider.generate_responses(requests)
+    
+    assert len(responses) == 5
+    for i, response in enumerate(responses):
+        assert response.success is True
+        assert response.response.startswith(f"[User user_{i}]")
+
+
+@pytest.mark.asyncio
+async def test_provider_health_check_is_cached():
+    """Test repeated health checks within the TTL reuse the cached result"""
+    provider = MockProvider(ProviderConfig(provider=AIProvider.MOCK))
+    await provider.initialize()
+    
+    with patch.object(provider, 'validate_connection', AsyncMock(return_value=True)) as validate:
+        first = await provider.health_check()
+        second = await provider.health_check()
+        
+        assert first == second
+        assert validate.await_count == 1
+        
+        # Initialization state is reported live even from the cache
+        provider._initialized = False
+        assert (await provider.health_check())["initialized"] is False
+        assert validate.await_count == 1
+        provider._initialized = True
+        
+        # Shutdown drops the cache so the next probe hits the provider again
+        await provider.shutdown()
+        await provider.health_check()
+        assert validate.await_count == 2
+    
+    # Error results are not cached
+    provider._clear_caches()
+    with patch.object(provider, 'validate_connection', AsyncMock(side_effect=Exception("blip"))) as validate:
+        assert (await provider.health_check())["status"] == "error"
+        assert (await provider.health_check())["status"] == "error"
+        assert validate.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cleoai_streaming_response_parsing():
+    """Test CleoAI SSE events are parsed across arbitrary byte boundaries"""
+    from src.ai.providers.cleoai import CleoAIProvider
+    import httpx
+    
+    async def sse_body():
+        # Split events mid-payload to exercise the byte buffer
+        yield b'data: {"text": "Hel'
+        yield b'lo"}\n\ndata: {"text": " there"}\n'
+        yield b'\nevent: ping\n\ndata: [DONE]\n\ndata: {"text": "ignored"}\n\n'
+    
+    def handler(request):
+        return httpx.Response(200, content=sse_body())
+    
+    provider = CleoAIProvider(ProviderConfig(
+        provider=AIProvider.CLEOAI,
+        endpoint="http://stream.cleoai.com"
+    ))
+    provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider._initialized = True
+    
+    chunks = [
+        chunk async for chunk in provider.generate_streaming_response(
+            AIRequest(context="Stream please")
+        )
+    ]
+    
+    assert chunks == ["Hello", " there"]
+    await provider.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cleoai_streaming_response_crlf_and_trailing_event():
+    """Test CRLF-delimited SSE events and a final event without a blank line"""
+    from src.ai.providers.cleoai import CleoAIProvider
+    import httpx
+    
+    async def sse_body():
+        # CRLF pair split across chunks, and no blank line after the last event
+        yield b'data: {"text": "One"}\r'
+        yield b'\n\r\ndata: {"text": " two"}\r\n\r\n'
+        yield b'data: {"text": " three"}\r\n'
+    
+    def handler(request):
+        return httpx.Response(200, content=sse_body())
+    
+    provider = CleoAIProvider(ProviderConfig(
+        provider=AIProvider.CLEOAI,
+        endpoint="http://stream-crlf.cleoai.com"
+    ))
+    provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider._initialized = True
+    
+    chunks = [
+        chunk async for chunk in provider.generate_streaming_response(
+            AIRequest(context="Stream please")
+        )
+    ]
+    
+    assert chunks == ["One", " two", " three"]
+    await provider.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_skips_failing_provider():
+    """Test a provider that keeps failing is skipped until the cooldown ends"""
+    client = AIClient()
+    failing = MockProvider(ProviderConfig(provider=AIProvider.MISTRAL))
+    fallback = MockProvider(ProviderConfig(provider=AIProvider.MOCK))
+    await fallback.initialize()
+    
+    failing.generate_response = AsyncMock(side_effect=Exception("Provider down"))
+    client.primary_provider = failing
+    client.fallback_providers = [fallback]
+    client._initialized = True
+    
+    for _ in range(AIClient.BREAKER_FAILURE_THRESHOLD):
+        response = await client.generate_response(context="Hello", max_tokens=50)
+        assert response.success is True
+    
+    assert failing.generate_response.await_count == AIClient.BREAKER_FAILURE_THRESHOLD
+    
+    # Circuit is now open, so the primary is not called again
+    response = await client.generate_response(context="Hello", max_tokens=50)
+    assert response.success is True
+    assert failing.generate_response.await_count == AIClient.BREAKER_FAILURE_THRESHOLD
+    
+    # Once the cooldown has passed the primary gets another chance
+    # Expire the cooldown without touching the event loop clock
+    failures, _ = client._breaker[AIProvider.MISTRAL]
+    client._breaker[AIProvider.MISTRAL] = (failures, time.monotonic() - 1)
+    await client.generate_response(context="Hello", max_tokens=50)
+    assert failing.generate_response.await_count == AIClient.BREAKER_FAILURE_THRESHOLD + 1
+    
+    # Half-open: a single further failure reopens the circuit immediately
+    await client.generate_response(context="Hello", max_tokens=50)
+    assert failing.generate_response.await_count == AIClient.BREAKER_FAILURE_THRESHOLD + 1
+
+
+@pytest.mark.asyncio
+async def test_provider_health_check_deep_fetches_model_info():
+    """Test only deep health checks include model info"""
+    provider = MockProvider(ProviderConfig(provider=AIProvider.MOCK))
+    await provider.initialize()
+    
+    shallow = await provider.health_check()
+    deep = await provider.health_check(deep=True)
+    
+    assert shallow["status"] == "healthy"
+    assert shallow["model_info"] == {}
+    assert deep["model_info"]["model_id"] == "mock-model-v1"
+
+
+def test_cleoai_infer_payload_matches_generic_encoding():
+    """Test the specialized CleoAI payload encoder produces the expected JSON"""
+    from src.ai.providers.cleoai import _InferInput, _encode_infer_payload, _INFER_MUTATION
+    
+    inference_input = _InferInput(
+        text='Say "hi"\n',
+        temperature=0.7,
+        maxTokens=100,
+        userId="test_user",
+        metadata={"source": "test", "ids": [1, 2]}
+    )
+    
+    assert json.loads(_encode_infer_payload(inference_input)) == {
+        "query": _INFER_MUTATION,
+        "variables": {
+            "input": {
+                "text": 'Say "hi"\n',
+                "temperature": 0.7,
+                "maxTokens": 100,
+                "userId": "test_user",
+                "sessionId": None,
+                "stream": False,
+                "metadata": {"source": "test", "ids": [1, 2]}
+            }
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_cleoai_rate_limit_retries_once_after_retry_after():
+    """Test a 429 from CleoAI is retried once after the Retry-After delay"""
+    from src.ai.providers.cleoai import CleoAIProvider, _InferInput
+    
+    provider = CleoAIProvider(ProviderConfig(provider=AIProvider.CLEOAI))
+    provider.client = AsyncMock()
+    
+    rate_limited = Mock(status_code=429, headers={"Retry-After": "2"})
+    ok = Mock(status_code=200, raise_for_status=Mock())
+    ok.content = json.dumps({
+        "data": {"inferText": {"text": "ok", "metadata": {}, "success": True}}
+    }).encode()
+    provider.client.post.side_effect = [rate_limited, ok]
+    
+    with patch('src.ai.providers.cleoai.asyncio.sleep', AsyncMock()) as sleep:
+        result = await provider._post_inference(_InferInput(text="hi", temperature=0.7, maxTokens=10))
+    
+    assert result["text"] == "ok"
+    sleep.assert_awaited_once_with(2.0)
+    assert provider.client.post.await_count == 2
+    
+    # A second 429 gives up instead of looping
+    provider.client.post.side_effect = [rate_limited, rate_limited]
+    with patch('src.ai.providers.cleoai.asyncio.sleep', AsyncMock()):
+        with pytest.raises(AIProviderRateLimitError):
+            await provider._post_inference(_InferInput(text="hi", temperature=0.7, maxTokens=10))
+
+
+@pytest.mark.asyncio
+async def test_cleoai_model_info_cached_until_shutdown():
+    """Test CleoAI model info is queried once and dropped on shutdown"""
+    from src.ai.providers.cleoai import CleoAIProvider
+    
+    provider = CleoAIProvider(ProviderConfig(provider=AIProvider.CLEOAI))
+    provider.client = AsyncMock()
+    
+    model_info = {"name": "cleoai-v1", "version": "1.0"}
+    provider.client.post.return_value = Mock(
+        status_code=200,
+        content=json.dumps({"data": {"modelInfo": model_info}}).encode()
+    )
+    
+    assert await provider.get_model_info() == model_info
+    assert await provider.get_model_info() == model_info
+    assert provider.client.post.await_count == 1
+    
+    provider._clear_caches()
+    await provider.get_model_info()
+    assert provider.client.post.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache_exact_and_semantic_hits():
+    """Test the response cache serves exact and near-duplicate prompts"""
+    from src.ai.cache import ResponseCache
+    
+    store = {}
+    redis_client = Mock()
+    redis_client.get.side_effect = store.get
+    redis_client.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+    index = Mock()
+    index.query.return_value = Mock(matches=[])
+    
+    cache = ResponseCache(ttl=60, threshold=0.9)
+    provider_call = AsyncMock(return_value=AIResponse(
+        response="Cached answer",
+        provider=AIProvider.MISTRAL,
+        model="mistral",
+        temperature=0.7,
+        max_tokens=100,
+        response_time_ms=1200,
+        success=True
+    ))
+    
+    with patch.object(ResponseCache, '_redis', return_value=redis_client), \
+         patch.object(ResponseCache, '_index', return_value=index):
+        embed = Mock(return_value=[0.1, 0.2])
+        
+        first = await cache.get_or_call("How are you?", embed, provider_call, user_id="u1")
+        assert first.response == "Cached answer"
+        index.upsert.assert_called_once()
+        
+        exact = await cache.get_or_call("How are you?", embed, provider_call, user_id="u1")
+        assert exact.metadata["cache"] == "exact_hit"
+        assert exact.provider == AIProvider.MISTRAL
+        
+        digest = cache._hash("How are you?", "u1", cache._generation("", None, None))
+        index.query.return_value = Mock(matches=[Mock(id=digest, score=0.95)])
+        semantic = await cache.get_or_call("How are you doing?", embed, provider_call, user_id="u1")
+        assert semantic.metadata["cache"] == "semantic_hit"
+        
+        assert provider_call.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_response_cache_scoped_to_user_and_settings():
+    """Test cached responses are not shared across users or generation settings"""
+    from src.ai.cache import ResponseCache
+    
+    store = {}
+    redis_client = Mock()
+    redis_client.get.side_effect = store.get
+    redis_client.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+    index = Mock()
+    index.query.return_value = Mock(matches=[])
+    
+    cache = ResponseCache(ttl=60, threshold=0.9)
+    provider_call = AsyncMock(return_value=AIResponse(
+        response="Private answer",
+        provider=AIProvider.MISTRAL,
+        model="mistral",
+        temperature=0.7,
+        max_tokens=100,
+        response_time_ms=1200,
+        success=True
+    ))
+    
+    with patch.object(ResponseCache, '_redis', return_value=redis_client), \
+         patch.object(ResponseCache, '_index', return_value=index):
+        embed = Mock(return_value=[0.1, 0.2])
+        settings = {"model": "mistral", "temperature": 0.7, "max_tokens": 100}
+        
+        await cache.get_or_call("How are you?", embed, provider_call, user_id="u1", **settings)
+        
+        other_user = await cache.get_or_call("How are you?", embed, provider_call, user_id="u2", **settings)
+        assert "cache" not in (other_user.metadata or {})
+        assert provider_call.await_count == 2
+        
+        await cache.get_or_call(
+            "How are you?", embed, provider_call, user_id="u1",
+            model="mistral", temperature=0.2, max_tokens=100
+        )
+        assert provider_call.await_count == 3
+        
+        # The semantic lookup is filtered on both user and settings
+        query_filter = index.query.call_args.kwargs["filter"]
+        assert query_filter["user_id"] == {"$eq": "u1"}
+        assert query_filter["generation"] == {"$eq": cache._generation("mistral", 0.2, 100)}
+        
+        same = await cache.get_or_call("How are you?", embed, provider_call, user_id="u1", **settings)
+        assert same.metadata["cache"] == "exact_hit"
+        assert provider_call.await_count == 3
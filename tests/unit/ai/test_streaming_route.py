@@ -0,0 +1,79 @@
+"""
+Tests for SSE frame coalescing on the streaming AI route
+"""
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from unittest.mock import Mock, AsyncMock, patch
+from src.api.routes import ai as ai_routes
+
+
+class TestStreamingRoute:
+    """Test cases for /ai/respond/stream"""
+    
+    @pytest_asyncio.fixture
+    async def client(self):
+        """Client for the AI router alone, without the app lifespan"""
+        app = FastAPI()
+        app.include_router(ai_routes.router, prefix="/ai")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+    
+    @pytest.fixture
+    def mock_memory_controller(self):
+        """Mock memory controller"""
+        with patch.object(ai_routes, 'memory_controller') as mock:
+            mock.assemble_context = AsyncMock(return_value={"context_string": "Test context"})
+            yield mock
+    
+    @pytest.fixture
+    def provider_stream(self):
+        """Route the AI client's stream to a mocked provider stream"""
+        calls = []
+        chunks = ["Hello ", "there", "!"]
+        
+        async def stream(**kwargs):
+            calls.append(kwargs)
+            for chunk in chunks:
+                yield chunk
+        
+        with patch.object(ai_routes, 'ai_client', Mock(generate_streaming_response=stream)):
+            yield calls
+    
+    async def _stream(self, client):
+        response = await client.post(
+            "/ai/respond/stream",
+            json={"user_id": "test_user", "message": "Hello", "stream": True}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
+        return response.text
+    
+    @pytest.mark.asyncio
+    async def test_tokens_within_window_share_one_frame(self, client, mock_memory_controller, provider_stream):
+        """Test tokens arriving within one flush window are sent as a single frame"""
+        with patch.object(ai_routes, 'STREAM_FLUSH_INTERVAL', 60):
+            content = await self._stream(client)
+        
+        assert content == "data: Hello there!\n\ndata: [DONE]\n\n"
+        assert provider_stream[0]["context"] == "Test context"
+        assert provider_stream[0]["user_id"] == "test_user"
+    
+    @pytest.mark.asyncio
+    async def test_flushes_when_buffer_is_full(self, client, mock_memory_controller, provider_stream):
+        """Test the buffer is flushed once it reaches the character limit"""
+        with patch.object(ai_routes, 'STREAM_FLUSH_INTERVAL', 60), \
+             patch.object(ai_routes, 'STREAM_FLUSH_CHARS', 6):
+            content = await self._stream(client)
+        
+        assert content == "data: Hello \n\ndata: there!\n\ndata: [DONE]\n\n"
+    
+    @pytest.mark.asyncio
+    async def test_flushes_when_window_elapses(self, client, mock_memory_controller, provider_stream):
+        """Test every token is flushed on its own once the window has elapsed"""
+        with patch.object(ai_routes, 'STREAM_FLUSH_INTERVAL', 0):
+            content = await self._stream(client)
+        
+        assert content == "data: Hello \n\ndata: there\n\ndata: !\n\ndata: [DONE]\n\n"
@@ -83,7 +83,9 @@ class TestMemoryRoutes:
         sem_args = mock_semantic.store_memory_vector.call_args[1]
         assert sem_args["user_id"] == "test_user"
         assert sem_args["content"] == "Important memory about medication"
-        assert sem_args["metadata"]["fragment_id"] == "fragment_123"
+        # Both stores share the pre-generated fragment id
+        assert sem_args["metadata"]["fragment_id"] == mock_storage.store_memory_fragment.call_args[1]["fragment_id"]
+        assert sem_args["vector_id"] == fragment.embedding_id
     
     @pytest.mark.asyncio
     async def test_create_memory_invalid_type(self, client):
@@ -281,36 +283,15 @@ class TestMemoryRoutes:
     @pytest.mark.asyncio
     async def test_get_memory_tags_success(self, client, mock_storage):
         """Test retrieving unique memory tags"""
-        memories = [
-            MemoryFragment(
-                user_id="test_user",
-                timestamp=datetime.utcnow(),
-                type="health",
-                content="Content 1",
-                tags=["health", "medication"],
-                retention="active"
-            ),
-            MemoryFragment(
-                user_id="test_user",
-                timestamp=datetime.utcnow(),
-                type="event",
-                content="Content 2",
-                tags=["appointment", "health"],
-                retention="active"
-            ),
-            MemoryFragment(
-                user_id="test_user",
-                timestamp=datetime.utcnow(),
-                type="preference",
-                content="Content 3",
-                tags=["food", "italian"],
-                retention="active"
-            )
-        ]
-        
-        mock_storage.get_active_memories = AsyncMock(return_value=memories)
+        mock_storage.get_distinct_tags = AsyncMock(
+            return_value=["appointment", "food", "health", "italian", "medication"]
+        )
         
-        response = client.get("/memory/test_user/tags")
+        with patch('src.api.routes.memory.redis_cache') as mock_cache:
+            mock_cache.get = AsyncMock(return_value=None)
+            mock_cache.set = AsyncMock()
+            
+            response = client.get("/memory/test_user/tags")
         
         assert response.status_code == 200
         data = response.json()
@@ -322,13 +303,34 @@ class TestMemoryRoutes:
         assert "italian" in data["tags"]
         assert "medication" in data["tags"]
         assert data["tags"] == sorted(data["tags"])  # Should be sorted
+        
+        mock_storage.get_distinct_tags.assert_called_once_with("test_user")
+        mock_cache.set.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_memory_tags_cached(self, client, mock_storage):
+        """Test cached tags are served without querying MongoDB"""
+        mock_storage.get_distinct_tags = AsyncMock()
+        
+        with patch('src.api.routes.memory.redis_cache') as mock_cache:
+            mock_cache.get = AsyncMock(return_value=["health"])
+            
+            response = client.get("/memory/test_user/tags")
+        
+        assert response.status_code == 200
+        assert response.json()["tags"] == ["health"]
+        mock_storage.get_distinct_tags.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_get_memory_tags_no_memories(self, client, mock_storage):
         """Test retrieving tags when user has no memories"""
-        mock_storage.get_active_memories = AsyncMock(return_value=[])
+        mock_storage.get_distinct_tags = AsyncMock(return_value=[])
         
-        response = client.get("/memory/test_user/tags")
+        with patch('src.api.routes.memory.redis_cache') as mock_cache:
+            mock_cache.get = AsyncMock(return_value=None)
+            mock_cache.set = AsyncMock()
+            
+            response = client.get("/memory/test_user/tags")
         
         assert response.status_code == 200
         data = response.json()
@@ -62,9 +62,9 @@ class TestMemoryController:
         context = await memory_controller.assemble_context("test_user", "Tell me about gardening")
         
         # Assert
-        assert context["user_profile"]["name"] == "John Doe"
-        assert context["user_profile"]["age"] == 75
-        assert len(context["user_profile"]["conditions"]) == 2
+        assert context["user_profile"].name == "John Doe"
+        assert context["user_profile"].age == 75
+        assert len(context["user_profile"].conditions) == 2
         assert "How are you?" in context["recent_interactions"]
         assert len(context["relevant_memories"]) == 2
         assert context["relevant_memories"][0]["score"] == 0.95
@@ -86,29 +86,51 @@ class TestMemoryController:
         context = await memory_controller.assemble_context("new_user", "Hello")
         
         # Assert
-        assert context["user_profile"]["user_id"] == "new_user"
-        assert context["user_profile"]["name"] == "Friend"
-        assert context["user_profile"]["age"] == 0
+        assert context["user_profile"].user_id == "new_user"
+        assert context["user_profile"].name == "Friend"
+        assert context["user_profile"].age == 0
         assert context["recent_interactions"] == ""
         assert len(context["relevant_memories"]) == 0
         assert "This is our first conversation" in context["context_string"]
     
+    @pytest.mark.asyncio
+    async def test_user_profile_cached_until_invalidated(self, memory_controller):
+        """Test the profile is fetched once per TTL window and refetched after invalidation"""
+        user_profile = UserProfile(user_id="test_user", name="John Doe", age=75)
+        memory_controller.storage.get_user_profile = AsyncMock(return_value=user_profile)
+        
+        assert await memory_controller._get_user_profile("test_user") is user_profile
+        assert await memory_controller._get_user_profile("test_user") is user_profile
+        assert memory_controller.storage.get_user_profile.await_count == 1
+        
+        memory_controller.invalidate_profile("test_user")
+        await memory_controller._get_user_profile("test_user")
+        assert memory_controller.storage.get_user_profile.await_count == 2
+    
     @pytest.mark.asyncio
     async def test_assemble_context_error_handling(self, memory_controller):
-        """Test error handling in context assembly"""
+        """Test a failing source only drops its own part of the context"""
         # Setup mock to raise exception
         memory_controller.storage.get_user_profile = AsyncMock(
             side_effect=Exception("Database error")
         )
+        memory_controller.session.format_recent_context = Mock(return_value="")
+        memory_controller.semantic.search_memories = AsyncMock(return_value=[
+            {"content": "Enjoys gardening", "score": 0.9}
+        ])
+        memory_controller.storage.get_active_memories = AsyncMock(
+            side_effect=Exception("Database error")
+        )
         
         # Execute
         context = await memory_controller.assemble_context("test_user", "Hello")
         
-        # Assert - should return minimal context
-        assert context["user_profile"]["user_id"] == "test_user"
-        assert context["user_profile"]["name"] == "Friend"
-        assert context["context_string"] == "User says: Hello"
-        assert len(context["relevant_memories"]) == 0
+        # Assert - default profile, but the other sources are still used
+        assert context["user_profile"].user_id == "test_user"
+        assert context["user_profile"].name == "Friend"
+        assert len(context["relevant_memories"]) == 1
+        assert context["recent_fragments"] == []
+        assert "Enjoys gardening" in context["context_string"]
     
     @pytest.mark.asyncio
     async def test_store_interaction_significant(self, memory_controller):
@@ -137,6 +159,14 @@ class TestMemoryController:
         assert fragment_call.type == "health"
         assert "medication" in fragment_call.tags
         assert fragment_call.retention == "active"
+        
+        # The stored fragment carries the ID its vector is upserted under
+        assert fragment_call.embedding_id is not None
+        sem_args = memory_controller.semantic.store_memory_vector.call_args[1]
+        assert sem_args["vector_id"] == fragment_call.embedding_id
+        assert sem_args["metadata"]["fragment_id"] == (
+            memory_controller.storage.store_memory_fragment.call_args[1]["fragment_id"]
+        )
     
     @pytest.mark.asyncio
     async def test_store_interaction_not_significant(self, memory_controller):
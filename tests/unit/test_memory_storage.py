@@ -23,7 +23,7 @@ class TestMemoryStorage:
         cursor = MagicMock()
         cursor.sort.return_value = cursor
         cursor.limit.return_value = cursor
-        cursor.__aiter__ = AsyncMock(return_value=[])
+        cursor.to_list = AsyncMock(return_value=[])
         collection.find.return_value = cursor
         
         return collection
@@ -37,6 +37,22 @@ class TestMemoryStorage:
             storage.db = mock_db
             return storage
     
+    @pytest.mark.asyncio
+    async def test_ensure_indexes(self, memory_storage, mock_collection):
+        """Test the query indexes are created, failures included"""
+        mock_collection.create_index = AsyncMock(
+            side_effect=[None, Exception("Index build failed"), None, None, None]
+        )
+        
+        # Should not raise exception
+        await memory_storage.ensure_indexes()
+        
+        assert mock_collection.create_index.call_count == 5
+        calls = mock_collection.create_index.call_args_list
+        assert calls[0][0][0] == [("user_id", 1), ("retention", 1), ("timestamp", -1)]
+        assert calls[3][0][0] == [("user_id", 1)]
+        assert calls[3][1] == {"unique": True}
+    
     @pytest.mark.asyncio
     async def test_create_user_profile_success(self, memory_storage, mock_collection):
         """Test creating a user profile successfully"""
@@ -166,6 +182,35 @@ class TestMemoryStorage:
         assert call_args["type"] == "health"
         assert "medication" in call_args["tags"]
     
+    @pytest.mark.asyncio
+    async def test_store_memory_fragment_with_id(self, memory_storage, mock_collection):
+        """Test storing a memory fragment under a pre-generated id"""
+        fragment = MemoryFragment(
+            user_id="test_user",
+            timestamp=datetime.utcnow(),
+            type="event",
+            content="User visited the park",
+            retention="active"
+        )
+        mock_collection.insert_one.return_value.inserted_id = "507f1f77bcf86cd799439013"
+        
+        await memory_storage.store_memory_fragment(fragment, fragment_id="507f1f77bcf86cd799439013")
+        
+        call_args = mock_collection.insert_one.call_args[0][0]
+        assert str(call_args["_id"]) == "507f1f77bcf86cd799439013"
+    
+    @pytest.mark.asyncio
+    async def test_get_distinct_tags(self, memory_storage, mock_collection):
+        """Test tags are collected with a server-side distinct"""
+        mock_collection.distinct = AsyncMock(return_value=["health", "daily"])
+        
+        tags = await memory_storage.get_distinct_tags("test_user")
+        
+        assert tags == ["daily", "health"]
+        mock_collection.distinct.assert_called_once_with(
+            "tags", {"user_id": "test_user", "retention": "active"}
+        )
+    
     @pytest.mark.asyncio
     async def test_get_active_memories(self, memory_storage, mock_collection):
         """Test retrieving active memories"""
@@ -189,15 +234,8 @@ class TestMemoryStorage:
             }
         ]
         
-        # Setup async iterator for cursor
-        async def async_iter():
-            for memory in mock_memories:
-                yield memory.copy()
-        
         cursor = mock_collection.find.return_value
-        cursor.sort.return_value = cursor
-        cursor.limit.return_value = cursor
-        cursor.__aiter__.return_value = async_iter()
+        cursor.to_list.return_value = [memory.copy() for memory in mock_memories]
         
         # Execute
         memories = await memory_storage.get_active_memories("test_user", limit=10)
@@ -213,6 +251,28 @@ class TestMemoryStorage:
         })
         cursor.sort.assert_called_once_with("timestamp", -1)
         cursor.limit.assert_called_once_with(10)
+        cursor.to_list.assert_called_once_with(length=10)
+    
+    @pytest.mark.asyncio
+    async def test_get_active_memories_with_fields(self, memory_storage, mock_collection):
+        """Test only the requested fields are fetched"""
+        cursor = mock_collection.find.return_value
+        cursor.to_list.return_value = [{
+            "user_id": "test_user",
+            "timestamp": datetime.utcnow(),
+            "type": "event",
+            "content": "Memory 1"
+        }]
+        
+        memories = await memory_storage.get_active_memories(
+            "test_user", limit=5, fields=["user_id", "timestamp", "type", "content"]
+        )
+        
+        assert memories[0].content == "Memory 1"
+        mock_collection.find.assert_called_once_with(
+            {"user_id": "test_user", "retention": "active"},
+            {"_id": 0, "user_id": 1, "timestamp": 1, "type": 1, "content": 1}
+        )
     
     @pytest.mark.asyncio
     async def test_search_memories_by_tags(self, memory_storage, mock_collection):
@@ -229,13 +289,8 @@ class TestMemoryStorage:
             }
         ]
         
-        async def async_iter():
-            for memory in mock_memories:
-                yield memory.copy()
-        
         cursor = mock_collection.find.return_value
-        cursor.sort.return_value = cursor
-        cursor.__aiter__.return_value = async_iter()
+        cursor.to_list.return_value = [memory.copy() for memory in mock_memories]
         
         # Execute
         memories = await memory_storage.search_memories_by_tags(
@@ -293,20 +348,30 @@ class TestMemoryStorage:
         assert result == "507f1f77bcf86cd799439013"
         mock_collection.insert_one.assert_called_once()
     
+    @staticmethod
+    def _aggregate_collection(results):
+        """Create a collection whose aggregate cursor yields results"""
+        collection = MagicMock()
+        collection.aggregate.return_value.to_list = AsyncMock(return_value=results)
+        return collection
+    
     @pytest.mark.asyncio
-    async def test_get_user_statistics(self, memory_storage, mock_collection):
+    async def test_get_user_statistics(self, memory_storage):
         """Test getting user statistics"""
         # Setup mocks
+        last_interaction = datetime.utcnow()
+        memories = self._aggregate_collection([
+            {"_id": "active", "count": 10},
+            {"_id": "archive", "count": 5}
+        ])
+        logs = self._aggregate_collection([
+            {"_id": None, "count": 25, "last_interaction": last_interaction}
+        ])
         memory_storage.db.get_collection.side_effect = lambda name: {
-            "memory_fragments": mock_collection,
-            "interaction_logs": mock_collection
+            "memory_fragments": memories,
+            "interaction_logs": logs
         }[name]
         
-        mock_collection.count_documents.side_effect = [10, 5, 25]  # active, archive, interactions
-        mock_collection.find_one.return_value = {
-            "timestamp": datetime.utcnow()
-        }
-        
         # Execute
         stats = await memory_storage.get_user_statistics("test_user")
         
@@ -314,22 +379,19 @@ class TestMemoryStorage:
         assert stats["active_memories"] == 10
         assert stats["archived_memories"] == 5
         assert stats["total_interactions"] == 25
-        assert stats["last_interaction"] is not None
-        
-        # Check count_documents calls
-        assert mock_collection.count_documents.call_count == 3
-        calls = mock_collection.count_documents.call_args_list
-        assert calls[0][0][0] == {"user_id": "test_user", "retention": "active"}
-        assert calls[1][0][0] == {"user_id": "test_user", "retention": "archive"}
-        assert calls[2][0][0] == {"user_id": "test_user"}
+        assert stats["last_interaction"] == last_interaction
+        
+        # One aggregate per collection, both scoped to the user
+        memories.aggregate.assert_called_once()
+        logs.aggregate.assert_called_once()
+        assert memories.aggregate.call_args[0][0][0] == {"$match": {"user_id": "test_user"}}
+        assert logs.aggregate.call_args[0][0][0] == {"$match": {"user_id": "test_user"}}
     
     @pytest.mark.asyncio
-    async def test_get_user_statistics_no_data(self, memory_storage, mock_collection):
+    async def test_get_user_statistics_no_data(self, memory_storage):
         """Test getting statistics for user with no data"""
-        memory_storage.db.get_collection.side_effect = lambda name: mock_collection
-        
-        mock_collection.count_documents.return_value = 0
-        mock_collection.find_one.return_value = None
+        empty = self._aggregate_collection([])
+        memory_storage.db.get_collection.side_effect = lambda name: empty
         
         stats = await memory_storage.get_user_statistics("new_user")
         
@@ -24,6 +24,9 @@ class TestSemanticMemory:
         embeddings = MagicMock()
         # Return a 384-dimensional vector (for all-MiniLM-L6-v2)
         embeddings.embed = Mock(return_value=[0.1] * 384)
+        embeddings.embed_batch = Mock(
+            side_effect=lambda texts, **kwargs: [[0.1] * 384 for _ in texts]
+        )
         return embeddings
     
     @pytest.fixture
@@ -58,9 +61,14 @@ class TestSemanticMemory:
             metadata={"type": "health", "tags": ["medication"]}
         )
         
+        # Vectors are queued until the next flush
+        mock_index.upsert.assert_not_called()
+        await semantic_memory.flush()
+        
         # Assert
         assert uuid.UUID(vector_id)  # Should be a valid UUID
-        mock_embeddings.embed.assert_called_once_with("I took my medication this morning")
+        mock_embeddings.embed_batch.assert_called_once()
+        assert mock_embeddings.embed_batch.call_args[0][0] == ["I took my medication this morning"]
         mock_index.upsert.assert_called_once()
         
         # Check upsert arguments
@@ -86,6 +94,7 @@ class TestSemanticMemory:
             content=long_content,
             metadata={}
         )
+        await semantic_memory.flush()
         
         # Check that content was truncated in metadata
         upsert_call = mock_index.upsert.call_args[1]["vectors"][0]
@@ -94,16 +103,60 @@ class TestSemanticMemory:
         assert metadata["content"] == "x" * 1000
     
     @pytest.mark.asyncio
-    async def test_store_memory_vector_error(self, semantic_memory, mock_index):
-        """Test error handling when storing vector fails"""
-        mock_index.upsert.side_effect = Exception("Pinecone error")
+    async def test_store_memory_vector_batches_upserts(self, semantic_memory, mock_index):
+        """Test queued vectors are upserted together in batches"""
+        semantic_memory.upsert_batch_size = 2
         
-        with pytest.raises(Exception):
+        vector_ids = [
             await semantic_memory.store_memory_vector(
                 user_id="test_user",
-                content="Test content",
+                content=f"Memory {i}",
                 metadata={}
             )
+            for i in range(3)
+        ]
+        await semantic_memory.shutdown()
+        
+        assert mock_index.upsert.call_count == 2
+        batches = [c[1]["vectors"] for c in mock_index.upsert.call_args_list]
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert [v[0] for batch in batches for v in batch] == vector_ids
+        
+        # Each batch is embedded with a single model call
+        assert semantic_memory.embeddings.embed_batch.call_count == 2
+        assert semantic_memory.embeddings.embed_batch.call_args_list[0][0][0] == [
+            "Memory 0", "Memory 1"
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_flush_embedding_error(self, semantic_memory, mock_index, mock_embeddings):
+        """Test a batch that fails to embed is logged and not upserted"""
+        mock_embeddings.embed_batch.side_effect = Exception("Embedding error")
+        
+        await semantic_memory.store_memory_vector(
+            user_id="test_user",
+            content="Test content",
+            metadata={}
+        )
+        
+        # Should not raise exception
+        await semantic_memory.shutdown()
+        mock_index.upsert.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_flush_upsert_error(self, semantic_memory, mock_index):
+        """Test a failed batch upsert is logged, not raised"""
+        mock_index.upsert.side_effect = Exception("Pinecone error")
+        
+        await semantic_memory.store_memory_vector(
+            user_id="test_user",
+            content="Test content",
+            metadata={}
+        )
+        
+        # Should not raise exception
+        await semantic_memory.shutdown()
+        assert semantic_memory._pending == []
     
     @pytest.mark.asyncio
     async def test_search_memories_success(self, semantic_memory, mock_index, mock_embeddings):
@@ -194,21 +247,7 @@ class TestSemanticMemory:
     @pytest.mark.asyncio
     async def test_update_memory_retention(self, semantic_memory, mock_index):
         """Test updating memory retention status"""
-        # Setup mock fetch results
-        mock_vector1 = MagicMock()
-        mock_vector1.values = [0.1] * 384
-        mock_vector1.metadata = {"user_id": "test_user", "retention": "active"}
-        
-        mock_vector2 = MagicMock()
-        mock_vector2.values = [0.2] * 384
-        mock_vector2.metadata = {"user_id": "test_user", "retention": "active"}
-        
-        mock_fetch_result = MagicMock()
-        mock_fetch_result.vectors = {
-            "vector1": mock_vector1,
-            "vector2": mock_vector2
-        }
-        mock_index.fetch.return_value = mock_fetch_result
+        mock_index.update = Mock()
         
         # Execute
         await semantic_memory.update_memory_retention(
@@ -216,32 +255,24 @@ class TestSemanticMemory:
             retention="archive"
         )
         
-        # Assert
-        mock_index.fetch.assert_called_once_with(ids=["vector1", "vector2"])
-        mock_index.upsert.assert_called_once()
-        
-        # Check updated vectors
-        upsert_vectors = mock_index.upsert.call_args[1]["vectors"]
-        assert len(upsert_vectors) == 2
+        # Only metadata is updated; vectors are never fetched or re-upserted
+        mock_index.fetch.assert_not_called()
+        mock_index.upsert.assert_not_called()
+        assert mock_index.update.call_count == 2
         
-        for vector_id, values, metadata in upsert_vectors:
-            assert metadata["retention"] == "archive"
+        updates = {c[1]["id"]: c[1]["set_metadata"] for c in mock_index.update.call_args_list}
+        assert updates == {
+            "vector1": {"retention": "archive"},
+            "vector2": {"retention": "archive"}
+        }
     
     @pytest.mark.asyncio
-    async def test_update_memory_retention_empty_vectors(self, semantic_memory, mock_index):
-        """Test updating retention when some vectors don't exist"""
-        mock_fetch_result = MagicMock()
-        mock_fetch_result.vectors = {
-            "vector1": None,  # Vector doesn't exist
-            "vector2": MagicMock(values=[0.1] * 384, metadata={"retention": "active"})
-        }
-        mock_index.fetch.return_value = mock_fetch_result
+    async def test_update_memory_retention_error(self, semantic_memory, mock_index):
+        """Test error handling when a retention update fails"""
+        mock_index.update = Mock(side_effect=Exception("Pinecone error"))
         
-        await semantic_memory.update_memory_retention(["vector1", "vector2"], "archive")
-        
-        # Should only update existing vector
-        upsert_vectors = mock_index.upsert.call_args[1]["vectors"]
-        assert len(upsert_vectors) == 1
+        # Should not raise exception
+        await semantic_memory.update_memory_retention(["vector1"], "archive")
     
     @pytest.mark.asyncio
     async def test_delete_memories(self, semantic_memory, mock_index):
@@ -264,13 +295,12 @@ class TestSemanticMemory:
     async def test_get_memory_stats(self, semantic_memory, mock_index):
         """Test getting memory statistics"""
         # Setup mock results
-        mock_active_results = MagicMock()
-        mock_active_results.matches = [MagicMock() for _ in range(10)]
-        
-        mock_archive_results = MagicMock()
-        mock_archive_results.matches = [MagicMock() for _ in range(5)]
-        
-        mock_index.query.side_effect = [mock_active_results, mock_archive_results]
+        counts = {"active": 10, "archive": 5}
+        mock_index.describe_index_stats = Mock(
+            side_effect=lambda filter: MagicMock(
+                total_vector_count=counts[filter["retention"]["$eq"]]
+            )
+        )
         
         # Execute
         stats = await semantic_memory.get_memory_stats("test_user")
@@ -279,23 +309,19 @@ class TestSemanticMemory:
         assert stats["active_vectors"] == 10
         assert stats["archive_vectors"] == 5
         
-        # Check query calls
-        assert mock_index.query.call_count == 2
+        # Counts come from index stats, not ANN queries
+        mock_index.query.assert_not_called()
+        assert mock_index.describe_index_stats.call_count == 2
         
-        # First call for active memories
-        first_call = mock_index.query.call_args_list[0][1]
-        assert first_call["filter"]["user_id"]["$eq"] == "test_user"
-        assert first_call["filter"]["retention"]["$eq"] == "active"
-        
-        # Second call for archive memories
-        second_call = mock_index.query.call_args_list[1][1]
-        assert second_call["filter"]["user_id"]["$eq"] == "test_user"
-        assert second_call["filter"]["retention"]["$eq"] == "archive"
+        # One filtered stats call per retention tier
+        filters = [c[1]["filter"] for c in mock_index.describe_index_stats.call_args_list]
+        assert all(f["user_id"]["$eq"] == "test_user" for f in filters)
+        assert sorted(f["retention"]["$eq"] for f in filters) == ["active", "archive"]
     
     @pytest.mark.asyncio
     async def test_get_memory_stats_error(self, semantic_memory, mock_index):
         """Test error handling when getting stats fails"""
-        mock_index.query.side_effect = Exception("Pinecone error")
+        mock_index.describe_index_stats = Mock(side_effect=Exception("Pinecone error"))
         
         stats = await semantic_memory.get_memory_stats("test_user")
         
@@ -36,28 +36,32 @@ class TestSessionManager:
             ai_response="Hi there!"
         )
         
-        # Assert Redis operations
-        assert mock_redis.rpush.called
-        assert mock_redis.ltrim.called
-        assert mock_redis.expire.called
+        # Assert Redis operations are sent as one pipeline
+        pipe = mock_redis.pipeline.return_value.__enter__.return_value
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        assert pipe.rpush.called
+        assert pipe.ltrim.called
+        assert pipe.expire.called
+        pipe.execute.assert_called_once()
         
         # Check the interaction data
-        call_args = mock_redis.rpush.call_args[0]
+        call_args = pipe.rpush.call_args[0]
         assert call_args[0] == "session:user123:history"
         
         interaction_data = json.loads(call_args[1])
         assert interaction_data["user"] == "Hello"
         assert interaction_data["ai"] == "Hi there!"
-        assert "timestamp" in interaction_data
+        assert interaction_data["timestamp"].endswith("Z")  # naive UTC, serialized by orjson
         
         # Check TTL was set
-        expire_call = mock_redis.expire.call_args[0]
+        expire_call = pipe.expire.call_args[0]
         assert expire_call[0] == "session:user123:history"
         assert expire_call[1] == 86400  # 24 hours
     
     def test_add_interaction_error(self, session_manager, mock_redis):
         """Test error handling when adding interaction fails"""
-        mock_redis.rpush.side_effect = Exception("Redis error")
+        pipe = mock_redis.pipeline.return_value.__enter__.return_value
+        pipe.execute.side_effect = Exception("Redis error")
         
         with pytest.raises(Exception):
             session_manager.add_interaction(
@@ -144,60 +148,42 @@ class TestSessionManager:
             session_manager.clear_session("user123")
     
     def test_format_recent_context_with_interactions(self, session_manager, mock_redis):
-        """Test formatting context with interactions"""
-        # Setup mock interactions
-        interactions = [
-            {
-                "timestamp": "2024-01-01T10:00:00",
-                "user": "Hello",
-                "ai": "Hi there!"
-            },
-            {
-                "timestamp": "2024-01-01T10:01:00",
-                "user": "How are you?",
-                "ai": "I'm doing well, thank you!"
-            }
-        ]
-        
-        # Mock get_recent_interactions
-        with patch.object(session_manager, 'get_recent_interactions', return_value=interactions):
-            context = session_manager.format_recent_context("user123")
-        
-        # Assert formatting
-        assert "[2024-01-01T10:00:00]" in context
-        assert "User: Hello" in context
-        assert "AI: Hi there!" in context
-        assert "[2024-01-01T10:01:00]" in context
-        assert "User: How are you?" in context
-        assert "AI: I'm doing well, thank you!" in context
+        """Test formatting context runs the registered script on the session key"""
+        formatted = "[2024-01-01T10:00:00]\nUser: Hello\nAI: Hi there!\n"
+        script = mock_redis.register_script.return_value
+        script.return_value = formatted
+        
+        context = session_manager.format_recent_context("user123")
+        
+        # Formatting happens server-side in one call
+        assert context == formatted
+        script.assert_called_once()
+        assert script.call_args[1]["keys"] == ["session:user123:history"]
+        mock_redis.lrange.assert_not_called()
+    
+    def test_format_recent_context_script_source(self, session_manager, mock_redis):
+        """Test the script formats the trailing interactions and skips bad rows"""
+        lua = mock_redis.register_script.call_args[0][0]
+        
+        assert "LRANGE" in lua
+        assert "-tonumber(ARGV[1])" in lua
+        assert "pcall(cjson.decode" in lua
     
     def test_format_recent_context_no_interactions(self, session_manager, mock_redis):
         """Test formatting context with no interactions"""
-        with patch.object(session_manager, 'get_recent_interactions', return_value=[]):
-            context = session_manager.format_recent_context("user123")
+        mock_redis.register_script.return_value.return_value = ""
+        
+        context = session_manager.format_recent_context("user123")
         
         assert context == "No recent interactions."
     
-    def test_format_recent_context_missing_fields(self, session_manager, mock_redis):
-        """Test formatting context with missing fields in interactions"""
-        # Interaction with missing fields
-        interactions = [
-            {
-                "user": "Hello",  # Missing timestamp and ai
-            },
-            {
-                "timestamp": "2024-01-01T10:00:00",
-                "ai": "Response"  # Missing user
-            }
-        ]
-        
-        with patch.object(session_manager, 'get_recent_interactions', return_value=interactions):
-            context = session_manager.format_recent_context("user123")
-        
-        # Should handle missing fields gracefully
-        assert "User: Hello" in context
-        assert "AI: Response" in context
-        assert "[]" in context  # Empty timestamp for first interaction
+    def test_format_recent_context_error(self, session_manager, mock_redis):
+        """Test formatting context falls back when the script fails"""
+        mock_redis.register_script.return_value.side_effect = Exception("Redis error")
+        
+        context = session_manager.format_recent_context("user123")
+        
+        assert context == "No recent interactions."
     
     @patch('src.memory.session.settings')
     def test_memory_context_limit(self, mock_settings, session_manager, mock_redis):
@@ -207,6 +193,7 @@ class TestSessionManager:
         session_manager.add_interaction("user123", "Message", "Response")
         
         # Check ltrim was called with correct limit
-        ltrim_call = mock_redis.ltrim.call_args[0]
+        pipe = mock_redis.pipeline.return_value.__enter__.return_value
+        ltrim_call = pipe.ltrim.call_args[0]
         assert ltrim_call[1] == -5
         assert ltrim_call[2] == -1
\ No newline at end of file